@@ -0,0 +1,230 @@
+import glob
+import json
+import multiprocessing
+import os
+import time
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from custom_exceptions import InvalidInputException
+from logger import Logger
+
+# suffixes of files written by an expansion, which are not batch inputs
+output_file_suffixes = ('_expanded.epJSON', '_hvac_templates.epJSON', '_base.epJSON')
+
+
+def get_batch_files(batch_reference):
+    """
+    Get the list of epJSON files for a batch.  The reference is either a manifest file that lists one epJSON file
+    per line (relative paths are relative to the manifest), or a glob pattern.  Expansion output files are not
+    included in glob results.
+
+    :param batch_reference: manifest file location or glob pattern
+    :return: list of epJSON file locations
+    """
+    if os.path.isfile(batch_reference) and not batch_reference.endswith('.epJSON'):
+        manifest_directory = os.path.dirname(os.path.abspath(batch_reference))
+        with open(batch_reference, 'r') as f:
+            batch_files = [
+                os.path.join(manifest_directory, i.strip()) for i in f
+                if i.strip() and not i.strip().startswith('#')]
+    else:
+        batch_files = sorted(
+            i for i in glob.glob(batch_reference, recursive=True)
+            if not i.endswith(output_file_suffixes))
+    return [os.path.abspath(i) for i in batch_files]
+
+
+def read_batch_status(status_location):
+    """
+    Read a batch status manifest.  Incomplete lines, such as one left by an interrupted run, are skipped.
+
+    :param status_location: status manifest location
+    :return: dictionary of the latest status record for each file
+    """
+    batch_status = {}
+    if os.path.isfile(status_location):
+        with open(status_location, 'r') as f:
+            for line in f:
+                try:
+                    status_record = json.loads(line)
+                    batch_status[status_record['file']] = status_record
+                except (ValueError, KeyError, TypeError):
+                    continue
+    return batch_status
+
+
+def expand_file(file_location, no_schema=False, schema_marker=False, output_directory=None, run_task_workers=None):
+    """
+    Expand one epJSON file in a batch worker.
+
+    :param file_location: epJSON file location
+    :param no_schema: skip schema validations
+    :param schema_marker: use the schema verification marker file
+    :param output_directory: (optional) output directory
+    :param run_task_workers: (optional) number of expansion phases that may run at the same time
+    :return: status record dictionary
+    """
+    from main import main
+    start_time = time.perf_counter()
+    status_record = {'file': file_location}
+    try:
+        output = main(
+            Namespace(
+                no_schema=no_schema,
+                schema_marker=schema_marker,
+                file=file_location,
+                output_directory=output_directory,
+                run_task_workers=run_task_workers))
+        if output.get('output_files'):
+            status_record.update({'status': 'success', 'output_files': output['output_files']})
+        else:
+            status_record.update({'status': 'failed', 'error': output['outputPreProcessorMessage'].strip()})
+    except Exception as e:
+        status_record.update({'status': 'failed', 'error': str(e)})
+    status_record['elapsed_time'] = round(time.perf_counter() - start_time, 4)
+    return status_record
+
+
+class BatchExpansion(Logger):
+    """
+    Expand many epJSON files with a pool of worker processes.
+
+    The expansion structure and schema validator are loaded before the workers start.  When processes are forked,
+    workers share the loaded objects through copy-on-write memory instead of loading them again.  A status record
+    is appended to a JSON-lines manifest as each file finishes, so an interrupted batch can be resumed by skipping
+    files that were already expanded.
+
+    Attributes:
+        no_schema: skip schema validations
+        schema_marker: use the schema verification marker file
+        workers: number of worker processes
+        output_directory: output directory for all files.  If not provided, each file's directory is used.
+        status_location: location of status manifest
+        resume: skip files that were expanded successfully in a previous run with the same status manifest
+        run_task_workers: number of expansion phases that may run at the same time for each file
+    """
+
+    def __init__(
+            self,
+            no_schema=False,
+            schema_marker=False,
+            workers=None,
+            output_directory=None,
+            status_location=None,
+            resume=False,
+            run_task_workers=None):
+        super().__init__()
+        self.no_schema = no_schema
+        self.schema_marker = schema_marker
+        self.workers = workers or os.cpu_count() or 1
+        self.output_directory = output_directory
+        self.status_location = status_location or os.path.join(
+            output_directory or os.getcwd(), 'expandobjects_batch_status.jsonl')
+        self.resume = resume
+        self.run_task_workers = run_task_workers
+        return
+
+    def load(self):
+        """
+        Load the expansion structure and schema validator into the process-wide caches.
+
+        :return: None
+        """
+        from expand_objects import ExpandObjects
+        from epjson_handler import EPJSON
+        ExpandObjects()
+        if not self.no_schema:
+            EPJSON(schema_marker=self.schema_marker)._load_schema()
+        return
+
+    def _get_executor(self):
+        """
+        Create the process pool.  Fork is used where it is available so workers inherit the loaded caches.
+
+        :return: ProcessPoolExecutor
+        """
+        if 'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        else:  # pragma: no cover - platform specific
+            mp_context = multiprocessing.get_context()
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context)
+
+    def run(self, batch_reference):
+        """
+        Expand the files of a batch and write their status records.
+
+        :param batch_reference: manifest file location or glob pattern
+        :return: list of status records for the files processed in this run
+        """
+        batch_files = get_batch_files(batch_reference)
+        if not batch_files:
+            raise InvalidInputException('No epJSON files found for batch: {}'.format(batch_reference))
+        if self.resume:
+            previous_status = read_batch_status(self.status_location)
+            expand_files = [i for i in batch_files if previous_status.get(i, {}).get('status') != 'success']
+            self.logger.info('Resuming batch, %s of %s files were already expanded',
+                             len(batch_files) - len(expand_files), len(batch_files))
+        else:
+            expand_files = batch_files
+            # start a new status manifest
+            with open(self.status_location, 'w'):
+                pass
+        self.load()
+        expand_kwargs = {
+            'no_schema': self.no_schema,
+            'schema_marker': self.schema_marker,
+            'output_directory': self.output_directory,
+            'run_task_workers': self.run_task_workers}
+        batch_status = []
+        if self.resume:
+            self._end_partial_status_line()
+        with open(self.status_location, 'a') as status_file:
+            if self.workers == 1 or len(expand_files) <= 1:
+                status_records = (expand_file(i, **expand_kwargs) for i in expand_files)
+                for status_record in status_records:
+                    self._write_status(status_file, status_record)
+                    batch_status.append(status_record)
+            else:
+                with self._get_executor() as executor:
+                    futures = [executor.submit(expand_file, i, **expand_kwargs) for i in expand_files]
+                    for future in as_completed(futures):
+                        status_record = future.result()
+                        self._write_status(status_file, status_record)
+                        batch_status.append(status_record)
+        self.logger.info(
+            'Batch complete: %s succeeded, %s failed.  Status written to %s',
+            len([i for i in batch_status if i['status'] == 'success']),
+            len([i for i in batch_status if i['status'] != 'success']),
+            self.status_location)
+        return batch_status
+
+    def _end_partial_status_line(self):
+        """
+        End an incomplete last line of the status manifest, such as one left by an interrupted run, so the next
+        status record is written on its own line.
+
+        :return: None
+        """
+        if not os.path.isfile(self.status_location) or not os.path.getsize(self.status_location):
+            return
+        with open(self.status_location, 'rb+') as status_file:
+            status_file.seek(-1, os.SEEK_END)
+            if status_file.read(1) != b'\n':
+                status_file.write(b'\n')
+        return
+
+    @staticmethod
+    def _write_status(status_file, status_record):
+        """
+        Append a status record to the status manifest.  The record is flushed to disk so the manifest is
+        complete up to the last finished file if the batch is interrupted.
+
+        :param status_file: open status manifest file
+        :param status_record: status record dictionary
+        :return: None
+        """
+        status_file.write(json.dumps(status_record) + '\n')
+        status_file.flush()
+        os.fsync(status_file.fileno())
+        return
@@ -0,0 +1,112 @@
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+source_dir = Path(__file__).parent
+default_yaml_location = source_dir / 'resources' / 'template_expansion_structures.yaml'
+
+
+def build_parser():  # pragma: no cover
+    """
+    Build argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog='compile_expansion_structure',
+        description='Compile the template expansion structure YAML file into a pre-resolved JSON artifact.')
+    parser.add_argument(
+        '--file',
+        '-f',
+        nargs='?',
+        default=str(default_yaml_location),
+        help='Path of expansion structure YAML file to compile'
+    )
+    parser.add_argument(
+        '--output',
+        '-o',
+        nargs='?',
+        help='Path of compiled file.  If not provided, a .json file is written next to the YAML file.'
+    )
+    return parser
+
+
+def get_compiled_location(yaml_location):
+    """
+    Get the compiled artifact location for an expansion structure YAML file
+
+    :param yaml_location: expansion structure YAML file location
+    :return: path of compiled artifact
+    """
+    return Path(yaml_location).with_suffix('.json')
+
+
+def get_source_hash(yaml_location):
+    """
+    Hash the contents of an expansion structure YAML file.  The hash is stored in the compiled artifact
+    to verify it was built from the current YAML file.
+
+    :param yaml_location: expansion structure YAML file location
+    :return: sha256 hex digest
+    """
+    with open(yaml_location, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_yaml_file(yaml_location):
+    """
+    Parse a YAML file, using the libyaml backed loader when it is available.
+
+    :param yaml_location: YAML file location
+    :return: parsed YAML object
+    """
+    import yaml
+    # todo_eo: discuss tradeoff of safety vs functionality of SafeLoader/FullLoader.
+    #   With FullLoader there would be more functionality but might not be necessary.
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(yaml_location, 'r') as f:
+        return yaml.load(f, Loader=loader)
+
+
+def compile_expansion_structure(yaml_location=default_yaml_location, output_location=None):
+    """
+    Write a YAML expansion structure to a JSON artifact.  Anchors, aliases, and merge keys are resolved by the
+    YAML loader, so the artifact can be loaded without a YAML parser.
+
+    :param yaml_location: expansion structure YAML file location
+    :param output_location: (optional) artifact location.  Default is the YAML location with a .json suffix
+    :return: path of the compiled artifact
+    """
+    output_location = Path(output_location or get_compiled_location(yaml_location))
+    compiled_structure = {
+        'source_sha256': get_source_hash(yaml_location),
+        'structure': load_yaml_file(yaml_location)
+    }
+    with open(output_location, 'w') as f:
+        json.dump(compiled_structure, f, separators=(',', ':'))
+    return output_location
+
+
+def load_compiled_expansion_structure(yaml_location):
+    """
+    Load the compiled artifact for a YAML expansion structure if it exists and was built from the current YAML
+    contents.
+
+    :param yaml_location: expansion structure YAML file location
+    :return: expansion structure object, or None if a usable artifact does not exist
+    """
+    compiled_location = get_compiled_location(yaml_location)
+    try:
+        with open(compiled_location, 'r') as f:
+            compiled_structure = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(compiled_structure, dict) or \
+            compiled_structure.get('source_sha256') != get_source_hash(yaml_location):
+        return None
+    return compiled_structure.get('structure')
+
+
+if __name__ == "__main__":
+    compile_parser = build_parser()
+    compile_args = compile_parser.parse_args()
+    compile_expansion_structure(yaml_location=compile_args.file, output_location=compile_args.output)
@@ -1,22 +1,62 @@
-import yaml
-from jsonschema.exceptions import SchemaError
+from functools import wraps
+import threading
+
 from logger import Logger
 
+optional_exception_lock = threading.Lock()
+
 
-class CustomException(Logger, Exception):
+class CustomException(Exception):
     """
-    Custom Exceptions used to write outputs to logger and
-    indicate program-specific issues
+    Custom Exceptions used to indicate program-specific issues.  Exceptions are not logged when they are created;
+    the top-level handler (see log_custom_exceptions) writes them to the logger with the log method.
     """
     def __init__(self, msg=''):
-        super().__init__()
+        super().__init__(msg)
         self.msg = msg
-        self.logger.error(msg)
+        self.logged = False
         return
 
     def __str__(self):
         return self.msg
 
+    def log(self, logger=None):
+        """
+        Write the exception message to the logger.  Messages of custom exceptions that were being handled when this
+        exception was raised are written first, in the order they were raised.  Each exception is only written once.
+
+        :param logger: (optional) logger object.  The default expand objects logger is used if not provided.
+        :return: None
+        """
+        exception_chain = []
+        exception = self
+        while isinstance(exception, CustomException) and not exception.logged:
+            exception_chain.append(exception)
+            exception = exception.__cause__ or exception.__context__
+        if exception_chain:
+            logger = logger or Logger().logger
+            for exception in reversed(exception_chain):
+                logger.error(exception.msg)
+                exception.logged = True
+        return
+
+
+def log_custom_exceptions(func):
+    """
+    Decorator for top-level functions that logs a custom exception before it is re-raised.
+
+    :param func: function to wrap
+    :return: wrapped function
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except CustomException as e:
+            e.log()
+            raise
+    return wrapper
+
 
 class InvalidInputException(CustomException):
     """
@@ -60,10 +100,6 @@ class PyExpandObjectsYamlStructureException(CustomException):
     pass
 
 
-class PyExpandObjectsSchemaError(CustomException, SchemaError):
-    pass
-
-
 class PyExpandObjectsFileNotFoundError(CustomException, FileNotFoundError):
     pass
 
@@ -72,5 +108,32 @@ class PyExpandObjectsTypeError(CustomException, TypeError):
     pass
 
 
-class PyExpandObjectsYamlError(CustomException, yaml.YAMLError):
-    pass
+def __getattr__(name):
+    """
+    Create exceptions that subclass optional dependency exceptions on first access, so that jsonschema and yaml
+    are only imported when they are used.
+
+    :param name: attribute name
+    :return: exception class
+    """
+    with optional_exception_lock:
+        if name in globals():
+            return globals()[name]
+        if name == 'PyExpandObjectsSchemaError':
+            from jsonschema.exceptions import SchemaError
+
+            class PyExpandObjectsSchemaError(CustomException, SchemaError):
+                pass
+            exception_class = PyExpandObjectsSchemaError
+        elif name == 'PyExpandObjectsYamlError':
+            import yaml
+
+            class PyExpandObjectsYamlError(CustomException, yaml.YAMLError):
+                pass
+            exception_class = PyExpandObjectsYamlError
+        else:
+            raise AttributeError("module {} has no attribute {}".format(__name__, name))
+        exception_class.__module__ = __name__
+        exception_class.__qualname__ = name
+        globals()[name] = exception_class
+    return exception_class
@@ -1,15 +1,216 @@
 import pathlib
 import re
+import os
 import json
-import jsonschema
+import hashlib
+import threading
 import copy
+from collections.abc import Mapping, MutableMapping
 from pathlib import Path
-from custom_exceptions import PyExpandObjectsFileNotFoundError, PyExpandObjectsSchemaError, \
-    PyExpandObjectsTypeError, UniqueNameException, InvalidEpJSONException
+# PyExpandObjectsSchemaError subclasses a jsonschema exception, so it is imported where it is raised in order to
+# only load jsonschema when schema validation is enabled.
+from custom_exceptions import PyExpandObjectsFileNotFoundError, PyExpandObjectsTypeError, UniqueNameException, \
+    InvalidEpJSONException
 from logger import Logger
 
 this_script_path = Path(__file__).resolve()
 
+# location of schemas built from part of the loaded schema during incremental validation (see
+# EPJSON._get_derived_schema_validator)
+derived_schema_uri = 'urn:pyexpandobjects:epjson-schema'
+derived_schema_key = 'pyexpandobjects_derived_schema'
+
+
+class SchemaValidatorCache:
+    """
+    Process-wide cache of schema validators.
+
+    Validators are stored by schema file location along with the file modification time, size, and content hash.  A
+    changed file is loaded again.  Content hashes that passed meta-validation (check_schema) are also stored so the
+    check is not repeated for the same schema.
+
+    Attributes:
+        hits: number of schema loads served from the cache
+        misses: number of schema loads that required the file to be read
+    """
+
+    def __init__(self):
+        self._validators = {}
+        self._verified = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        return
+
+    def get(self, schema_location, schema_stat):
+        """
+        Retrieve a cached validator
+
+        :param schema_location: resolved schema file location
+        :param schema_stat: os.stat result for the schema file
+        :return: validator and schema hash, or (None, None) if the schema is not cached or has changed
+        """
+        with self._lock:
+            cached = self._validators.get(schema_location)
+            if cached and cached[:2] == (schema_stat.st_mtime_ns, schema_stat.st_size):
+                self.hits += 1
+                return cached[3], cached[2]
+            self.misses += 1
+        return None, None
+
+    def add(self, schema_location, schema_stat, schema_hash, validator):
+        """
+        Store a validator
+
+        :param schema_location: resolved schema file location
+        :param schema_stat: os.stat result for the schema file
+        :param schema_hash: sha256 hex digest of the schema file
+        :param validator: validator object
+        :return: None
+        """
+        with self._lock:
+            self._validators[schema_location] = (
+                schema_stat.st_mtime_ns, schema_stat.st_size, schema_hash, validator)
+        return
+
+    def is_verified(self, validator_class, schema_hash):
+        """
+        Check if a schema has already passed meta-validation in this process
+
+        :param validator_class: jsonschema validator class
+        :param schema_hash: sha256 hex digest of the schema file
+        :return: boolean
+        """
+        return (validator_class.__name__, schema_hash) in self._verified
+
+    def set_verified(self, validator_class, schema_hash):
+        """
+        Record a schema that passed meta-validation
+
+        :param validator_class: jsonschema validator class
+        :param schema_hash: sha256 hex digest of the schema file
+        :return: None
+        """
+        with self._lock:
+            self._verified.add((validator_class.__name__, schema_hash))
+        return
+
+    def invalidate(self):
+        """
+        Remove all cached validators and verification records
+
+        :return: None
+        """
+        with self._lock:
+            self._validators.clear()
+            self._verified.clear()
+        return
+
+
+# Shared cache used by all EPJSON instances in the process
+schema_validator_cache = SchemaValidatorCache()
+
+
+class EPJSONView(MutableMapping):
+    """
+    Merged view of several epJSON dictionaries, keyed by object type.  The view presents the same objects, order,
+    and precedence as merging the dictionaries in sequence with EPJSON.merge_epjson, without copying them.  Object
+    types that are in only one layer are returned from that layer, and object types in several layers are merged
+    into a new dictionary when they are first read.  The view is materialized into a dictionary the first time it
+    is modified, and later reads and writes use that dictionary.
+
+    Object type dictionaries and objects that are read from the view are shared with the layers, so they must not be
+    modified unless the view has been materialized.
+
+    Attributes:
+        layers: list of epJSON dictionaries, in merge order
+    """
+
+    __slots__ = ('layers', '_object_types', '_merged', '_data')
+
+    def __init__(self, layers=()):
+        """
+        :param layers: epJSON dictionaries, in merge order.  Later layers take precedence for duplicate object names.
+        """
+        self.layers = [i for i in layers if i]
+        # object type structures of each layer, by object type in order of first appearance
+        self._object_types = {}
+        for layer in self.layers:
+            for object_type, object_structure in layer.items():
+                if not isinstance(object_structure, dict):
+                    raise PyExpandObjectsTypeError(
+                        'An Invalid object {} failed to merge'.format(object_structure))
+                self._object_types.setdefault(object_type, []).append(object_structure)
+        self._merged = {}
+        self._data = None
+        return
+
+    def __getitem__(self, object_type):
+        if self._data is not None:
+            return self._data[object_type]
+        object_structures = self._object_types[object_type]
+        if len(object_structures) == 1:
+            return object_structures[0]
+        merged_structure = self._merged.get(object_type)
+        if merged_structure is None:
+            merged_structure = {}
+            for object_structure in object_structures:
+                merged_structure.update(object_structure)
+            self._merged[object_type] = merged_structure
+        return merged_structure
+
+    def __iter__(self):
+        return iter(self._data if self._data is not None else self._object_types)
+
+    def __len__(self):
+        return len(self._data if self._data is not None else self._object_types)
+
+    def __contains__(self, object_type):
+        return object_type in (self._data if self._data is not None else self._object_types)
+
+    def __setitem__(self, object_type, object_structure):
+        self.materialize()[object_type] = object_structure
+        return
+
+    def __delitem__(self, object_type):
+        del self.materialize()[object_type]
+        return
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, dict(self.items()))
+
+    @property
+    def is_materialized(self):
+        """
+        Whether the view has been copied to a dictionary
+        """
+        return self._data is not None
+
+    def materialize(self):
+        """
+        Copy the merged view to a dictionary with new object type dictionaries.  Objects are not copied.  This is
+        done once, and the layers are no longer read afterwards.
+
+        :return: merged epJSON dictionary
+        """
+        if self._data is None:
+            self._data = {object_type: dict(self[object_type]) for object_type in self._object_types}
+            self._object_types = {}
+            self._merged = {}
+        return self._data
+
+
+def json_default(obj):
+    """
+    Default function for json.dump and json.dumps that writes mappings, such as EPJSONView objects, as dictionaries
+
+    :param obj: object that json cannot serialize
+    :return: dictionary of object types
+    """
+    if isinstance(obj, Mapping):
+        return {object_type: obj[object_type] for object_type in obj}
+    raise TypeError('Object of type {} is not JSON serializable'.format(obj.__class__.__name__))
+
 
 class EPJSON(Logger):
     """
@@ -21,18 +222,28 @@ class EPJSON(Logger):
         input_epjson: input epjson file
         schema_is_valid: initialized as None.  False if failed, True if passed.
         input_epjson_is_valid: initialized as None.  False if failed, True if passed.
+        schema_marker: write and read an on-disk marker next to the schema file to skip meta-validation on
+            repeated runs.
     """
 
-    def __init__(self, no_schema=False):
+    def __init__(self, no_schema=False, schema_marker=False):
         super().__init__()
         self.no_schema = no_schema
+        self.schema_marker = schema_marker
         self.schema = None
-        self.Validator = jsonschema.Draft4Validator
         self.schema_is_valid = None
         self.input_epjson = None
         self.input_epjson_is_valid = None
         return
 
+    @property
+    def Validator(self):
+        """
+        Schema validator class.  jsonschema is imported on first use.
+        """
+        from jsonschema import Draft4Validator
+        return Draft4Validator
+
     @staticmethod
     def merge_epjson(
             super_dictionary: dict,
@@ -161,6 +372,53 @@ class EPJSON(Logger):
         except json.decoder.JSONDecodeError as e:
             raise PyExpandObjectsTypeError("file is not a valid json: {}\n{}".format(json_location, str(e)))
 
+    @staticmethod
+    def _get_hashed_json_file(json_location):
+        """
+        Load json file and hash its contents
+
+        :param json_location: file location for json object
+        :return: loaded json object and sha256 hex digest of the file
+        """
+        try:
+            with open(json_location, 'rb') as f:
+                json_bytes = f.read()
+            return json.loads(json_bytes), hashlib.sha256(json_bytes).hexdigest()
+        except FileNotFoundError:
+            raise PyExpandObjectsFileNotFoundError("file does not exist: {}".format(json_location))
+        except ValueError as e:
+            raise PyExpandObjectsTypeError("file is not a valid json: {}\n{}".format(json_location, str(e)))
+
+    def _read_schema_marker(self, schema_location, schema_hash):
+        """
+        Check for an on-disk marker indicating the schema already passed meta-validation
+
+        :param schema_location: schema file location
+        :param schema_hash: sha256 hex digest of the schema file
+        :return: boolean
+        """
+        try:
+            with open(''.join([schema_location, '.verified']), 'r') as f:
+                marker = json.load(f)
+            return marker.get('sha256') == schema_hash and marker.get('validator') == self.Validator.__name__
+        except (OSError, ValueError, AttributeError):
+            return False
+
+    def _write_schema_marker(self, schema_location, schema_hash):
+        """
+        Write an on-disk marker indicating the schema passed meta-validation.  Failure to write is not an error.
+
+        :param schema_location: schema file location
+        :param schema_hash: sha256 hex digest of the schema file
+        :return: None
+        """
+        try:
+            with open(''.join([schema_location, '.verified']), 'w') as f:
+                json.dump({'sha256': schema_hash, 'validator': self.Validator.__name__}, f)
+        except OSError as e:
+            self.logger.warning('Schema verification marker could not be written: %s', str(e))
+        return
+
     def get_epjson_objects(
             self, epjson: dict,
             object_type_regexp: str = '.*',
@@ -187,27 +445,64 @@ class EPJSON(Logger):
         except (ValueError, AttributeError, KeyError):
             raise InvalidEpJSONException('Invalid epJSON formatted object: {}'.format(epjson))
 
-    def _validate_schema(self, schema):
+    def _validate_schema(self, schema, verified=False):
         """
         Validate schema based on the loaded
         jsonschema pre-built validator (self.Validator)
 
         :param schema: loaded schema object
+        :param verified: skip meta-validation for a schema that has already been checked
         :return: validated schema object.  object and boolean are added to class attributes.
         """
+        from jsonschema.exceptions import SchemaError
+        from custom_exceptions import PyExpandObjectsSchemaError
         try:
-            self.Validator.check_schema(schema)
+            if not verified:
+                self.Validator.check_schema(schema)
             validated_schema = self.Validator(schema)
             self.logger.info('schema version: %s', schema['epJSON_schema_version'])
             self.logger.info('schema build: %s', schema['epJSON_schema_build'])
             setattr(self, 'schema_is_valid', True)
             setattr(self, 'schema', validated_schema)
             return validated_schema
-        except jsonschema.exceptions.SchemaError as e:
+        except SchemaError as e:
             raise PyExpandObjectsSchemaError(e.message)
         except Exception as e:
             raise PyExpandObjectsSchemaError("Schema Validator Failed: {}".format(str(e)))
 
+    def _load_schema_file(self, schema_location):
+        """
+        Load schema file to class object.  Validators are reused from the process-wide schema_validator_cache and
+        meta-validation is skipped for schemas that have already been checked.
+
+        :param schema_location: location of json schema
+        :return: Validated schema and boolean flag as class attributes
+        """
+        if not isinstance(schema_location, (str, pathlib.PosixPath, pathlib.WindowsPath)):
+            raise PyExpandObjectsFileNotFoundError("JSON file location input is not a string: {}"
+                                                   .format(schema_location))
+        schema_location = os.path.realpath(schema_location)
+        try:
+            schema_stat = os.stat(schema_location)
+        except FileNotFoundError:
+            raise PyExpandObjectsFileNotFoundError("file does not exist: {}".format(schema_location))
+        validator, schema_hash = schema_validator_cache.get(schema_location, schema_stat)
+        if validator:
+            self.logger.info('schema version: %s', validator.schema['epJSON_schema_version'])
+            self.logger.info('schema build: %s', validator.schema['epJSON_schema_build'])
+            self.schema_is_valid = True
+            self.schema = validator
+            return validator
+        schema, schema_hash = self._get_hashed_json_file(schema_location)
+        verified = schema_validator_cache.is_verified(self.Validator, schema_hash) or \
+            (self.schema_marker and self._read_schema_marker(schema_location, schema_hash))
+        validator = self._validate_schema(schema, verified=verified)
+        schema_validator_cache.set_verified(self.Validator, schema_hash)
+        schema_validator_cache.add(schema_location, schema_stat, schema_hash, validator)
+        if self.schema_marker and not verified:
+            self._write_schema_marker(schema_location, schema_hash)
+        return validator
+
     def _load_schema(self, schema_ref=None):
         """
         Load schema to class object.
@@ -222,7 +517,7 @@ class EPJSON(Logger):
             self.schema_is_valid = False
         else:
             if isinstance(schema_ref, dict):
-                schema = schema_ref
+                self._validate_schema(schema_ref)
             else:
                 # load schema from default if location is not provided.
                 if not schema_ref:
@@ -230,8 +525,7 @@ class EPJSON(Logger):
                         schema_ref = str(this_script_path.parent / 'resources' / 'Energy+.schema.epJSON')
                     except FileNotFoundError:
                         raise PyExpandObjectsFileNotFoundError('Schema default file path is not valid; \n%s')
-                schema = self._get_json_file(schema_ref)
-            self._validate_schema(schema)
+                self._load_schema_file(schema_ref)
             self.logger.info('Schema loaded')
         return
 
@@ -242,6 +536,7 @@ class EPJSON(Logger):
         :param epjson: epJSON object
         :return: validated epJSON object
         """
+        from custom_exceptions import PyExpandObjectsSchemaError
         try:
             file_validation = self.schema.is_valid(epjson)
             if not file_validation:
@@ -255,6 +550,100 @@ class EPJSON(Logger):
         except Exception as e:
             raise PyExpandObjectsSchemaError("epJSON validation failed: {}".format(str(e)))
 
+    @staticmethod
+    def _get_shallow_schema(schema):
+        """
+        Create a copy of a schema where member subschemas are replaced with empty schemas.  The result only checks
+        the keys and member count of an object, not the member values.
+
+        :param schema: object schema
+        :return: schema dictionary
+        """
+        shallow_schema = dict(schema)
+        for keyword in ('properties', 'patternProperties'):
+            if isinstance(schema.get(keyword), dict):
+                shallow_schema[keyword] = {k: {} for k in schema[keyword].keys()}
+        if isinstance(schema.get('additionalProperties'), dict):
+            shallow_schema['additionalProperties'] = {}
+        return shallow_schema
+
+    def _get_derived_schema_validator(self, derived_schema):
+        """
+        Create a validator for a schema derived from the loaded schema.  References in the derived schema (e.g.
+        '#/definitions/...') are resolved against the loaded schema.  A referencing registry is used when jsonschema
+        supports it, otherwise the resolver of the loaded schema validator is used.
+
+        :param derived_schema: schema built from part of the loaded schema
+        :return: jsonschema validator
+        """
+        try:
+            from referencing import Registry
+            from referencing.jsonschema import DRAFT4
+        except ImportError:
+            return self.Validator(derived_schema, resolver=self.schema.resolver)
+        # the derived schema is stored in a copy of the loaded schema, so references are resolved from its root
+        resource = DRAFT4.create_resource(dict(self.schema.schema, **{derived_schema_key: derived_schema}))
+        registry = Registry().with_resource(derived_schema_uri, resource)
+        try:
+            return self.Validator(
+                {'$ref': '{}#/{}'.format(derived_schema_uri, derived_schema_key)},
+                registry=registry)
+        except TypeError:  # pragma: no cover - jsonschema versions without registry support
+            return self.Validator(derived_schema, resolver=self.schema.resolver)
+
+    def validate_epjson_incremental(self, epjson, validated_epjson):
+        """
+        Validate json object as epJSON when part of the object has already been validated.  Only objects that are
+        not shared (by reference) with validated_epjson are checked against their object schema.  Object counts and
+        required objects are checked on the full epJSON, so the result is equivalent to a full validation.
+
+        :param epjson: epJSON object
+        :param validated_epjson: epJSON object that has already passed schema validation.
+        :return: validated epJSON object
+        """
+        from custom_exceptions import PyExpandObjectsSchemaError
+        try:
+            # the validator only reads dictionaries as objects
+            if not isinstance(epjson, dict):
+                epjson = {object_type: epjson[object_type] for object_type in epjson}
+            # collect objects that were not part of the validated epJSON
+            new_epjson = {}
+            for object_type, object_structure in epjson.items():
+                validated_objects = validated_epjson.get(object_type) or {}
+                for object_name, object_fields in object_structure.items():
+                    if validated_objects.get(object_name) is not object_fields:
+                        new_epjson.setdefault(object_type, {})[object_name] = object_fields
+            schema = self.schema.schema
+            # check top level requirements (required objects, unknown object types) on the full epJSON
+            errors = list(self._get_derived_schema_validator(self._get_shallow_schema(schema)).iter_errors(epjson))
+            object_schemas = schema.get('properties', {})
+            for object_type, object_structure in new_epjson.items():
+                object_schema = object_schemas.get(object_type)
+                if not isinstance(object_schema, dict):
+                    continue
+                # check object counts on the full object type dictionary
+                errors.extend(
+                    self._get_derived_schema_validator(self._get_shallow_schema(object_schema))
+                        .iter_errors(epjson[object_type]))
+                # check field values on new objects only
+                member_schema = {
+                    k: v for k, v in object_schema.items() if k not in ('minProperties', 'maxProperties', 'required')}
+                errors.extend(self._get_derived_schema_validator(member_schema).iter_errors(object_structure))
+            if errors:
+                # if the schema validation fails for the epJSON object, write out specific errors that occurred.
+                self.logger.error("epJSON object does not meet schema format")
+                for err in errors:
+                    self.logger.error(err.message)
+                raise PyExpandObjectsSchemaError("Schema Format is invalid")
+            self.logger.info(
+                'epJSON validated: %s new objects checked, %s previously validated objects reused. Result is '
+                'equivalent to a full validation',
+                sum(len(i) for i in new_epjson.values()),
+                sum(len(i) for i in epjson.values()) - sum(len(i) for i in new_epjson.values()))
+            return epjson
+        except Exception as e:
+            raise PyExpandObjectsSchemaError("epJSON validation failed: {}".format(str(e)))
+
     def _validate_epjson(self, input_epjson):
         """
         Validate json file based on loaded schema.  I schema validation is off, then will return True for any
@@ -270,6 +659,7 @@ class EPJSON(Logger):
                 return input_epjson
             else:
                 raise PyExpandObjectsTypeError("input epJSON is not a dictionary object")
+        from custom_exceptions import PyExpandObjectsSchemaError
         try:
             file_validation = self.schema.is_valid(input_epjson)
             if not file_validation:
@@ -313,3 +703,16 @@ class EPJSON(Logger):
         self._load_schema()
         self._load_epjson(epjson_ref=epjson_ref)
         return
+
+
+def __getattr__(name):
+    """
+    Provide exceptions that are imported on first use as module attributes.
+
+    :param name: attribute name
+    :return: exception class
+    """
+    if name == 'PyExpandObjectsSchemaError':
+        from custom_exceptions import PyExpandObjectsSchemaError
+        return PyExpandObjectsSchemaError
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
@@ -0,0 +1,128 @@
+import json
+
+from custom_exceptions import InvalidInputException
+
+# key orders for written epJSON files
+#   sorted: all dictionaries are sorted (same as json.dump with sort_keys=True)
+#   top: only object types are sorted.  Objects and fields keep their insertion order.
+#   insertion: all dictionaries keep their insertion order
+key_orders = ('sorted', 'top', 'insertion')
+
+
+def get_fast_json_backend():
+    """
+    Get orjson if it is installed.  It is an optional dependency, which is only used to encode compact output.
+
+    :return: orjson module or None
+    """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+class EPJSONWriter:
+    """
+    Write epJSON dictionaries, or EPJSONView objects, to a file one object at a time instead of building the full
+    text in memory.
+
+    Indented output is byte-for-byte the same as json.dump with the same indent and key order.  Compact output has no
+    whitespace and is encoded with the C accelerated json encoder, or with orjson when it is installed.
+
+    Attributes:
+        compact: write without indentation or whitespace
+        indent: number of spaces used for indentation when output is not compact
+        key_order: sorted, top, or insertion (see key_orders)
+        backend: orjson module used for compact output, or None to use json
+    """
+
+    def __init__(self, compact=False, indent=4, key_order='sorted', use_fast_backend=True):
+        """
+        :param compact: write without indentation or whitespace
+        :param indent: number of spaces used for indentation when output is not compact
+        :param key_order: sorted, top, or insertion (see key_orders)
+        :param use_fast_backend: use orjson for compact output if it is installed
+        """
+        if key_order not in key_orders:
+            raise InvalidInputException('Invalid key order {}, valid key orders are {}'.format(key_order, key_orders))
+        self.compact = compact
+        self.indent = indent
+        self.key_order = key_order
+        self.backend = get_fast_json_backend() if compact and use_fast_backend else None
+        sort_keys = key_order == 'sorted'
+        if compact:
+            # the C encoder is used when indent is None
+            self._encoder = json.JSONEncoder(separators=(',', ':'), sort_keys=sort_keys)
+        else:
+            self._encoder = json.JSONEncoder(indent=indent, sort_keys=sort_keys)
+        return
+
+    def _encode(self, obj, level):
+        """
+        Encode one value at an indentation level
+
+        :param obj: JSON serializable object
+        :param level: indentation level of the value
+        :return: JSON string
+        """
+        if self.backend:
+            try:
+                option = self.backend.OPT_SORT_KEYS if self.key_order == 'sorted' else 0
+                return self.backend.dumps(obj, option=option).decode('utf-8')
+            except (TypeError, self.backend.JSONEncodeError):
+                pass
+        encoded_obj = self._encoder.encode(obj)
+        if not self.compact and level:
+            # JSON strings never contain a raw line break, so each line can be indented to the nesting level
+            encoded_obj = encoded_obj.replace('\n', '\n' + ' ' * (self.indent * level))
+        return encoded_obj
+
+    def iterencode(self, epjson):
+        """
+        Encode an epJSON dictionary in chunks, one object at a time
+
+        :param epjson: epJSON dictionary or EPJSONView
+        :return: generator of JSON strings
+        """
+        if not epjson:
+            yield '{}'
+            return
+        if self.compact:
+            key_separator, type_newline, object_newline, type_end = ':', '', '', '}'
+        else:
+            key_separator = ': '
+            type_newline = '\n' + ' ' * self.indent
+            object_newline = '\n' + ' ' * (self.indent * 2)
+            type_end = type_newline + '}'
+        object_types = sorted(epjson) if self.key_order in ('sorted', 'top') else list(epjson)
+        for type_idx, object_type in enumerate(object_types):
+            object_structure = epjson[object_type]
+            type_start = ''.join([
+                ',' if type_idx else '{',
+                type_newline, json.dumps(object_type), key_separator])
+            if not object_structure:
+                yield type_start + '{}'
+                continue
+            yield type_start + '{'
+            object_names = sorted(object_structure) if self.key_order == 'sorted' else list(object_structure)
+            for object_idx, object_name in enumerate(object_names):
+                yield ''.join([
+                    ',' if object_idx else '',
+                    object_newline, json.dumps(object_name), key_separator,
+                    self._encode(object_structure[object_name], level=2)])
+            yield type_end
+        yield '}' if self.compact else '\n}'
+        return
+
+    def write(self, epjson, file_handle):
+        """
+        Write an epJSON dictionary to an open file
+
+        :param epjson: epJSON dictionary or EPJSONView
+        :param file_handle: file object opened for writing text
+        :return: None
+        """
+        for chunk in self.iterencode(epjson):
+            file_handle.write(chunk)
+        return
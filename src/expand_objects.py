@@ -1,57 +1,1321 @@
 import copy
-import yaml
 import re
+import os
+import string
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
 from pathlib import Path
 import numbers
 import typing
 
+# PyExpandObjectsYamlError subclasses a yaml exception, so it is imported where it is raised in order to only
+# load yaml when it is needed.
 from custom_exceptions import PyExpandObjectsTypeError, InvalidTemplateException, \
-    PyExpandObjectsYamlError, PyExpandObjectsFileNotFoundError, PyExpandObjectsYamlStructureException, \
-    PyExpandObjectsException
+    PyExpandObjectsFileNotFoundError, PyExpandObjectsYamlStructureException, PyExpandObjectsException, \
+    CustomException
 from epjson_handler import EPJSON
+from logger import Logger
+from compile_expansion_structure import load_compiled_expansion_structure, load_yaml_file
 
 source_dir = Path(__file__).parent
+template_expansion_structure_location = str(source_dir / 'resources' / 'template_expansion_structures.yaml')
+
+
+class ExpansionCounters:
+    """
+    Process-wide counters of object resolution and copy operations performed during expansion.  These are used to
+    verify that objects are not resolved or copied more than needed.
+
+    Attributes:
+        resolved_objects: number of objects materialized by resolve_objects
+        deep_copies: number of deep copies made with deep_copy
+    """
+
+    def __init__(self):
+        self.resolved_objects = 0
+        self.deep_copies = 0
+        return
+
+    def reset(self):
+        """
+        Reset counters
+
+        :return: None
+        """
+        self.resolved_objects = 0
+        self.deep_copies = 0
+        return
+
+    def stats(self):
+        """
+        Summarize counters
+
+        :return: dictionary of counter values
+        """
+        return {
+            'resolved_objects': self.resolved_objects,
+            'deep_copies': self.deep_copies
+        }
+
+
+# Shared counters used by all ExpandObjects instances in the process
+expansion_counters = ExpansionCounters()
+
+
+def deep_copy(structure):
+    """
+    Deep copy a structure and count the operation in expansion_counters
+
+    :param structure: object to copy
+    :return: copied object
+    """
+    expansion_counters.deep_copies += 1
+    return copy.deepcopy(structure)
+
+
+class FrozenStructure(Mapping):
+    """
+    Read-only mapping used to hold a loaded expansion structure.  Nested dictionaries are stored as FrozenStructure
+    objects and lists as tuples, so the structure can be shared without copying.  Use thaw_structure to get a
+    mutable copy of a subtree.  Like a dictionary, it compares equal by contents and is not hashable, so caches of
+    loaded structures use id() and keep a reference to the structure with each entry.
+    """
+    __slots__ = ('_data', )
+
+    def __init__(self, data):
+        self._data = data
+        return
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self._data)
+
+
+def freeze_structure(structure, _memo=None):
+    """
+    Convert a loaded expansion structure into read-only objects.  Objects shared by reference, such as yaml
+    aliases, are only converted once.
+
+    :param structure: dictionary, list, or value from a loaded expansion structure
+    :return: FrozenStructure, tuple, or value
+    """
+    if _memo is None:
+        _memo = {}
+    if isinstance(structure, (dict, list)):
+        frozen = _memo.get(id(structure))
+        if frozen is None:
+            if isinstance(structure, dict):
+                frozen = FrozenStructure({k: freeze_structure(v, _memo) for k, v in structure.items()})
+            else:
+                frozen = tuple(freeze_structure(i, _memo) for i in structure)
+            _memo[id(structure)] = frozen
+        return frozen
+    return structure
+
+
+def thaw_structure(structure):
+    """
+    Create a mutable copy of a frozen structure.  Only the provided subtree is copied.
+
+    :param structure: FrozenStructure, tuple, or value
+    :return: dictionary, list, or value
+    """
+    if isinstance(structure, FrozenStructure):
+        return {k: thaw_structure(v) for k, v in structure.items()}
+    elif isinstance(structure, tuple):
+        return [thaw_structure(i) for i in structure]
+    return structure
+
+
+class ObjectTypePatternIndex:
+    """
+    Compiled table of the object type references used in expansion structures (e.g. '^Coil:Cooling:.*').  Each
+    reference is compiled once and resolves to the set of EnergyPlus object types it matches.  Matches are memoized per
+    reference and object type, so repeated checks are set lookups instead of regex evaluations.
+
+    References in Transitions, Mappings and BuildPath lookups are compiled when an expansion structure is loaded.
+    Other references are compiled on first use.
+    """
+
+    def __init__(self):
+        # reference -> (compiled pattern, set of matching object types, set of non-matching object types).  Entries
+        # are created under the lock and published in one step, so threads never see a partially compiled reference.
+        self._references = {}
+        self._lock = threading.Lock()
+        return
+
+    def _get_entry(self, reference: str) -> tuple:
+        """
+        Retrieve the compiled entry of an object type reference, compiling it if needed
+
+        :param reference: regular expression string
+        :return: tuple of compiled regular expression, matching object types, and non-matching object types
+        """
+        entry = self._references.get(reference)
+        if entry is None:
+            with self._lock:
+                entry = self._references.get(reference)
+                if entry is None:
+                    entry = (re.compile(reference), set(), set())
+                    self._references[reference] = entry
+        return entry
+
+    def compile(self, reference: str):
+        """
+        Compile an object type reference
+
+        :param reference: regular expression string
+        :return: compiled regular expression
+        """
+        return self._get_entry(reference)[0]
+
+    def match(self, reference: str, object_type: str) -> bool:
+        """
+        Check if an object type matches a reference, using the same rules as re.match
+
+        :param reference: regular expression string
+        :param object_type: EnergyPlus object type
+        :return: boolean
+        """
+        pattern, matches, non_matches = self._get_entry(reference)
+        if object_type in matches:
+            return True
+        if object_type in non_matches:
+            return False
+        if pattern.match(object_type):
+            matches.add(object_type)
+            return True
+        non_matches.add(object_type)
+        return False
+
+    def add_structure_references(self, structure):
+        """
+        Compile the object type references in an expansion structure.  These are the keys of Transitions and Mappings
+        items, as well as string Location and ObjectReference values.
+
+        :param structure: FrozenStructure, dictionary, list, or value
+        :return: None
+        """
+        if isinstance(structure, Mapping):
+            for key, value in structure.items():
+                if key in ('Transitions', 'Mappings'):
+                    items = value if isinstance(value, (list, tuple)) else [value, ]
+                    for item in items:
+                        for sub_item in (item if isinstance(item, (list, tuple)) else [item, ]):
+                            if isinstance(sub_item, Mapping):
+                                for reference in sub_item.keys():
+                                    self.compile(reference)
+                elif key in ('Location', 'ObjectReference') and isinstance(value, str):
+                    self.compile(value)
+                self.add_structure_references(value)
+        elif isinstance(structure, (list, tuple)):
+            for item in structure:
+                self.add_structure_references(item)
+        return
+
+
+# Shared pattern table used by all ExpandObjects instances in the process
+object_type_pattern_index = ObjectTypePatternIndex()
+
+
+class NameFormatPlan:
+    """
+    Render plan for a string value from an expansion structure (e.g. '{} Supply Inlet' or '{zone_name}').
+
+    The template field reference is extracted and the string is rewritten to read the class attribute once, when the
+    plan is compiled.  A string that references a template field is formatted with the ExpandObjects class, and other
+    strings are formatted with the unique name.
+
+    Attributes:
+        template: original string
+        attribute: template field referenced by the string, or None.  If several fields are referenced, the last one
+            is applied to every reference.
+        format_string: string to format
+        literal: True if the string has no braces, so rendering returns it unchanged
+        numeric: False if the rendered value can not be a numeric string
+    """
+    __slots__ = ('template', 'attribute', 'format_string', 'literal', 'numeric')
+
+    numeric_characters = frozenset('-0123456789.')
+
+    def __init__(self, template: str):
+        self.template = template
+        template_field_rgx = re.search(r'.*{(\w+)}.*', template)
+        if template_field_rgx:
+            self.attribute = template_field_rgx.group(1)
+            self.format_string = re.sub(r'{(\w+)}', '{0.' + self.attribute + '}', template)
+        else:
+            self.attribute = None
+            self.format_string = template
+        self.literal = '{' not in template and '}' not in template
+        try:
+            literal_text = ''.join(text for text, *_ in string.Formatter().parse(self.format_string))
+            self.numeric = self.numeric_characters.issuperset(literal_text)
+        except ValueError:
+            self.numeric = True
+        return
+
+    def render(self, expand_object) -> str:
+        """
+        Format the string for an ExpandObjects class
+
+        :param expand_object: ExpandObjects class with template fields and unique name
+        :return: formatted string.  AttributeError is raised if a referenced template field does not exist.
+        """
+        if self.literal:
+            return self.template
+        if self.attribute is None:
+            return self.format_string.format(expand_object.unique_name)
+        return self.format_string.format(expand_object)
+
+
+class NameFormatPlanIndex:
+    """
+    Table of NameFormatPlan objects by string.  Strings in an expansion structure are compiled when the structure is
+    loaded.  Other strings are compiled on first use and stored until the table is full.
+
+    Attributes:
+        maxsize: maximum number of plans stored for strings that are not in an expansion structure
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._plans = {}
+        return
+
+    def get(self, template: str) -> NameFormatPlan:
+        """
+        Retrieve the plan for a string, compiling it if needed
+
+        :param template: string value
+        :return: NameFormatPlan
+        """
+        plan = self._plans.get(template)
+        if plan is None:
+            plan = NameFormatPlan(template)
+            if len(self._plans) < self.maxsize:
+                self._plans[template] = plan
+        return plan
+
+    def add_structure_strings(self, structure):
+        """
+        Compile the string values of an expansion structure that contain braces
+
+        :param structure: FrozenStructure, dictionary, list, or value
+        :return: None
+        """
+        if isinstance(structure, Mapping):
+            for value in structure.values():
+                self.add_structure_strings(value)
+        elif isinstance(structure, (list, tuple)):
+            for item in structure:
+                self.add_structure_strings(item)
+        elif isinstance(structure, str) and '{' in structure and structure not in self._plans:
+            self._plans[structure] = NameFormatPlan(structure)
+        return
+
+
+# Shared plan table used by all ExpandObjects instances in the process
+name_format_plans = NameFormatPlanIndex()
+
+
+class ObjectReferenceIndex:
+    """
+    Index of the objects in a reference epJSON dictionary that match object type references.  Each reference is
+    resolved against the object types once and the matching (object_type, object_name) entries are reused for every
+    field that uses the reference.  The reference epJSON object types and names must not change while the index is in
+    use.
+    """
+
+    def __init__(self, epjson: dict):
+        self.epjson = epjson
+        self._entries = {}
+        return
+
+    def get(self, reference: str) -> list:
+        """
+        Retrieve the objects matching an object type reference
+
+        :param reference: regular expression string
+        :return: list of (object_type, object_name) tuples in epJSON order
+        """
+        entries = self._entries.get(reference)
+        if entries is None:
+            entries = []
+            for object_type, object_structure in self.epjson.items():
+                if object_type_pattern_index.match(reference, object_type):
+                    (object_name, _), = object_structure.items()
+                    entries.append((object_type, object_name))
+            self._entries[reference] = entries
+        return entries
+
+
+class ComplexInputResolver:
+    """
+    Resolve complex inputs against a reference epJSON dictionary.
+
+    Object field references form a dependency graph with (object_type, object_name, field_name) nodes.  The nodes an
+    input depends on are resolved in topological order with an explicit stack, so long reference chains do not use
+    the interpreter stack, and a circular reference is reported with the path that forms it.  Resolved nodes are
+    memoized, so shared references are only resolved once.  The reference epJSON must not change while the resolver
+    is in use.
+
+    Resolved inputs are lists of (format_field, value) entries.  format_field indicates that the field name is
+    formatted with the unique name when the entry is output.
+    """
+
+    def __init__(self, expand_object, epjson: dict, build_path: list = None):
+        self.expand_object = expand_object
+        self.epjson = epjson
+        self.reference_index = ObjectReferenceIndex(epjson)
+        self._build_path = build_path
+        self._resolved_nodes = {}
+        return
+
+    @property
+    def build_path(self):
+        return self._build_path or getattr(self.expand_object, 'build_path', None)
+
+    @staticmethod
+    def _unpack_reference(input_value: dict) -> tuple:
+        """
+        Get the referenced object type and lookup instructions from a dictionary input
+
+        :param input_value: complex input dictionary
+        :return: tuple of reference object type and lookup instructions
+        """
+        try:
+            (reference_object_type, lookup_instructions), = input_value.items()
+        except ValueError:
+            raise PyExpandObjectsYamlStructureException('Complex input reference is invalid: {}'
+                                                        .format(input_value))
+        return reference_object_type, lookup_instructions
+
+    def _extract_build_path_value(self, field_name, input_value: dict, lookup_instructions: dict):
+        """
+        Get the referenced value from the build path
+
+        :param field_name: field name, used for error output
+        :param input_value: complex input dictionary, used for error output
+        :param lookup_instructions: BuildPathReference instructions
+        :return: extracted field value
+        """
+        build_path = self.build_path
+        if not build_path:
+            raise PyExpandObjectsYamlStructureException("BuildPath complex input was specified with no build"
+                                                        " path available: field {}, input {}"
+                                                        .format(field_name, input_value))
+        try:
+            # the lookup instructions are copied because the lookup removes keys as they are read
+            return self.expand_object._resolve_complex_input_from_build_path(
+                build_path=build_path,
+                lookup_instructions=dict(lookup_instructions))
+        except (KeyError, PyExpandObjectsYamlStructureException):
+            raise self._build_path_error(field_name, input_value)
+
+    def _build_path_error(self, field_name, input_value):
+        return PyExpandObjectsYamlStructureException("Object field could not be resolved: input {}, "
+                                                     "field {}, template name {}"
+                                                     .format(input_value, field_name, self.expand_object.unique_name))
+
+    def _dependencies(self, field_name, input_value) -> list:
+        """
+        Get the object field nodes that hold complex inputs and are referenced by an input
+
+        :param field_name: field name, used for error output
+        :param input_value: field value input
+        :return: list of (object_type, object_name, field_name) nodes
+        """
+        dependencies = []
+        if isinstance(input_value, dict):
+            reference_object_type, lookup_instructions = self._unpack_reference(input_value)
+            if reference_object_type.lower() == 'buildpathreference':
+                extracted_value = self._extract_build_path_value(field_name, input_value, lookup_instructions)
+                try:
+                    dependencies.extend(self._dependencies(field_name, extracted_value))
+                except (KeyError, PyExpandObjectsYamlStructureException):
+                    raise self._build_path_error(field_name, input_value)
+            else:
+                for object_type, object_name in self.reference_index.get(reference_object_type):
+                    if lookup_instructions.lower() not in ('self', 'key') and \
+                            isinstance(self.epjson[object_type][object_name][lookup_instructions], dict):
+                        dependencies.append((object_type, object_name, lookup_instructions))
+        elif isinstance(input_value, list):
+            for input_list_item in input_value:
+                for input_list_field, input_list_value in input_list_item.items():
+                    dependencies.extend(self._dependencies(input_list_field, input_list_value))
+        return dependencies
+
+    def _resolve_dependencies(self, field_name, input_value):
+        """
+        Resolve and memoize the object field nodes an input depends on, in topological order
+
+        :param field_name: field name, used for error output
+        :param input_value: field value input
+        :return: None
+        """
+        stack = [(node, False) for node in reversed(self._dependencies(field_name, input_value))]
+        # nodes that are being resolved, in order.  These form the path from the input to the current node.
+        resolving_path = []
+        resolving_nodes = set()
+        while stack:
+            node, dependencies_resolved = stack.pop()
+            if dependencies_resolved:
+                resolving_path.pop()
+                resolving_nodes.discard(node)
+                self._resolved_nodes[node] = self._resolve_value(node[2], self.epjson[node[0]][node[1]][node[2]])
+                continue
+            if node in self._resolved_nodes:
+                continue
+            if node in resolving_nodes:
+                cycle = resolving_path[resolving_path.index(node):] + [node, ]
+                raise PyExpandObjectsYamlStructureException(
+                    "Circular complex input reference when resolving {} for {}: {}".format(
+                        input_value, field_name, ' -> '.join(
+                            '{}:{}:{}'.format(*cycle_node) for cycle_node in cycle)))
+            resolving_path.append(node)
+            resolving_nodes.add(node)
+            stack.append((node, True))
+            for dependency in reversed(self._dependencies(node[2], self.epjson[node[0]][node[1]][node[2]])):
+                if dependency not in self._resolved_nodes:
+                    stack.append((dependency, False))
+        return
+
+    def _format_field(self, field_name, format_field):
+        if format_field and isinstance(field_name, str):
+            return field_name.format(self.expand_object.unique_name)
+        return field_name
+
+    def _resolve_value(self, field_name, input_value) -> list:
+        """
+        Resolve an input whose referenced object field nodes are already resolved
+
+        :param field_name: field name, used for list items and error output
+        :param input_value: field value input
+        :return: list of (format_field, value) entries
+        """
+        if isinstance(input_value, (numbers.Number, str)):
+            return [(False, value) for value in self.expand_object._resolve_simple_input(input_value)]
+        elif isinstance(input_value, dict):
+            reference_object_type, lookup_instructions = self._unpack_reference(input_value)
+            # If the input_value is instructing to use a 'BuildPathReference' then insert the object by build
+            # path location
+            if reference_object_type.lower() == 'buildpathreference':
+                extracted_value = self._extract_build_path_value(field_name, input_value, lookup_instructions)
+                try:
+                    return self._resolve_value(field_name, extracted_value)
+                except (KeyError, PyExpandObjectsYamlStructureException):
+                    raise self._build_path_error(field_name, input_value)
+            resolved_entries = []
+            # If the input_value is an object type reference then retrieve the matching EnergyPlus objects in
+            # the reference dictionary from the index.
+            for object_type, object_name in self.reference_index.get(reference_object_type):
+                # if 'self' is used as the reference node, return the energyplus object type
+                # if 'key' is used as the reference node, return the unique object name
+                # if the reference node is a dictionary, then it is a nested complex input and the resolved node is used
+                # For anything else, process the reference node and return a value.
+                if lookup_instructions.lower() == 'self':
+                    resolved_entries.append((False, object_type))
+                elif lookup_instructions.lower() == 'key':
+                    resolved_entries.append((False, object_name))
+                else:
+                    reference_value = self.epjson[object_type][object_name][lookup_instructions]
+                    if isinstance(reference_value, dict):
+                        resolved_entries.extend(self._resolved_nodes[(object_type, object_name, lookup_instructions)])
+                    elif isinstance(reference_value, str):
+                        resolved_entries.append((True, reference_value.format(self.expand_object.unique_name)))
+                    else:
+                        resolved_entries.append((True, reference_value))
+            return resolved_entries
+        elif isinstance(input_value, list):
+            # When the input is a list, resolve each object.
+            tmp_list = []
+            for input_list_item in input_value:
+                tmp_d = {}
+                for input_list_field, input_list_value in input_list_item.items():
+                    for format_field, value in self._resolve_value(input_list_field, input_list_value):
+                        tmp_d[self._format_field(input_list_field, format_field)] = value
+                tmp_list.append(tmp_d)
+            return [(False, tmp_list), ]
+        return []
+
+    def resolve(self, field_name, input_value) -> list:
+        """
+        Resolve a complex input into field values
+
+        :param field_name: field name
+        :param input_value: field value input
+        :return: list of dictionaries with 'field' and 'value' keys
+        """
+        self._resolve_dependencies(field_name, input_value)
+        return [
+            {"field": self._format_field(field_name, format_field), "value": value}
+            for format_field, value in self._resolve_value(field_name, input_value)]
+
+
+class BuildPath:
+    """
+    Ordered list of the super objects that form a build path.
+
+    The build path holds its super objects by reference and takes ownership of them, so changing the path does not
+    copy objects.  The positions of each object type are indexed to find the nth occurrence of an object type reference.
+    The index is rebuilt on the next lookup after the path changes.  Node connections are made once, when the path is
+    connected.
+    """
+    __slots__ = ('_super_objects', '_type_positions', '_object_list', '_loop_type')
+
+    def __init__(self, super_objects=()):
+        self._super_objects = self._flatten(super_objects)
+        self._changed()
+        return
+
+    def __len__(self):
+        return len(self._super_objects)
+
+    def __iter__(self):
+        return iter(self._super_objects)
+
+    def __getitem__(self, index):
+        return self._super_objects[index]
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self._super_objects)
+
+    @staticmethod
+    def _flatten(super_objects) -> list:
+        """
+        Flatten nested lists of super objects.  Values that are not lists are treated as a single object.
+
+        :param super_objects: super object, or nested list of super objects
+        :return: list of super objects
+        """
+        if not isinstance(super_objects, (list, tuple, BuildPath)):
+            return [super_objects, ]
+        flat_list = []
+        stack = [iter(super_objects), ]
+        while stack:
+            for super_object in stack[-1]:
+                if isinstance(super_object, list):
+                    stack.append(iter(super_object))
+                    break
+                flat_list.append(super_object)
+            else:
+                stack.pop()
+        return flat_list
+
+    def _changed(self):
+        self._type_positions = None
+        self._object_list = None
+        self._loop_type = None
+        return
+
+    def to_list(self) -> list:
+        """
+        :return: list of the super objects in the build path
+        """
+        return list(self._super_objects)
+
+    def find(self, object_reference: str, occurrence: int) -> tuple:
+        """
+        Find the nth occurrence of an object type reference
+
+        :param object_reference: regular expression string matched to object types
+        :param occurrence: occurrence number to find, starting at 1
+        :return: tuple of the index of the occurrence, or None if it was not found, and the number of matches
+        """
+        if self._type_positions is None:
+            self._type_positions = {}
+            for idx, super_object in enumerate(self._super_objects):
+                for super_object_type in super_object.keys():
+                    self._type_positions.setdefault(super_object_type, []).append(idx)
+        positions = sorted(
+            position
+            for super_object_type, type_positions in self._type_positions.items()
+            if object_type_pattern_index.match(object_reference, super_object_type)
+            for position in type_positions)
+        if 0 < occurrence <= len(positions):
+            return positions[occurrence - 1], len(positions)
+        return None, len(positions)
+
+    def insert(self, index: int, super_objects):
+        """
+        Insert super objects before an index
+
+        :param index: list index
+        :param super_objects: super object or list of super objects
+        :return: None
+        """
+        if index < 0:
+            index = max(len(self._super_objects) + index, 0)
+        self._super_objects[index:index] = self._flatten(super_objects)
+        self._changed()
+        return
+
+    def replace(self, index: int, super_objects):
+        """
+        Replace the super object at an index
+
+        :param index: list index
+        :param super_objects: super object or list of super objects
+        :return: None
+        """
+        if index < 0:
+            index = len(self._super_objects) + index
+        if not 0 <= index < len(self._super_objects):
+            raise IndexError('build path index out of range')
+        self._super_objects[index:index + 1] = self._flatten(super_objects)
+        self._changed()
+        return
+
+    def remove(self, index: int):
+        """
+        Remove the super object at an index
+
+        :param index: list index
+        :return: None
+        """
+        self._super_objects.pop(index)
+        self._changed()
+        return
+
+    def connect(self, loop_type: str = 'AirLoop') -> list:
+        """
+        Connect the nodes of the super objects.  Each object's inlet node is set to the previous object's outlet node.
+        The objects are modified in place, and the connection is only made once unless the path changes.
+
+        :param loop_type: connector path to use
+        :return: list of epJSON formatted objects
+        """
+        if self._object_list is not None and self._loop_type == loop_type:
+            return list(self._object_list)
+        object_list = []
+        out_node = None
+        for idx, super_object in enumerate(self._super_objects):
+            (super_object_type, super_object_structure), = super_object.items()
+            connectors = super_object_structure.get('Connectors')
+            if not connectors:
+                raise PyExpandObjectsYamlStructureException("Super object is missing Connectors key: {}"
+                                                            .format(super_object))
+            try:
+                # The first object only sets the outlet node variable and remains unchanged
+                if idx == 0:
+                    out_node = super_object_structure['Fields'][connectors[loop_type]['Outlet']]
+                else:
+                    # After the first object, the inlet node name is changed to the previous object's outlet node
+                    # name.  Then the outlet node variable is reset.
+                    super_object_structure['Fields'][connectors[loop_type]['Inlet']] = out_node
+                    out_node = super_object_structure['Fields'][connectors[loop_type]['Outlet']]
+                object_list.append({super_object_type: super_object_structure['Fields']})
+            except (AttributeError, KeyError):
+                raise PyExpandObjectsYamlStructureException("Field/Connector mismatch. Object: {}, connectors: {}"
+                                                            .format(super_object_structure, connectors))
+        self._object_list = object_list
+        self._loop_type = loop_type
+        return list(object_list)
+
+
+class ExpansionStructureCache:
+    """
+    Process-wide cache of parsed expansion structure files.
+
+    Files are keyed by their resolved path and modification time, so an edited file is parsed again on the next
+    request.  The parsed structures are frozen and shared by every ExpandObjects instance.
+
+    Attributes:
+        hits: number of requests served from the cache
+        misses: number of requests that required the file to be parsed
+    """
+
+    def __init__(self):
+        self._structures = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        return
+
+    @staticmethod
+    def _load_file(file_path):
+        """
+        Load a yaml file.  A compiled artifact (see compile_expansion_structure.py) is used when it is current,
+        otherwise the yaml file is parsed.
+
+        :param file_path: yaml file location
+        :return: parsed yaml object
+        """
+        compiled_structure = load_compiled_expansion_structure(file_path)
+        if compiled_structure is not None:
+            return compiled_structure
+        return load_yaml_file(file_path)
+
+    def get(self, file_path):
+        """
+        Retrieve a parsed expansion structure, loading it from file if it is not cached or the file has changed.
+
+        :param file_path: yaml file location
+        :return: parsed yaml object
+        """
+        cache_key = os.path.realpath(file_path)
+        modified_time = os.stat(cache_key).st_mtime_ns
+        with self._lock:
+            cached = self._structures.get(cache_key)
+            if cached and cached[0] == modified_time:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        parsed_value = freeze_structure(self._load_file(cache_key))
+        object_type_pattern_index.add_structure_references(parsed_value)
+        name_format_plans.add_structure_strings(parsed_value)
+        with self._lock:
+            self._structures[cache_key] = (modified_time, parsed_value)
+        return parsed_value
+
+    def invalidate(self, file_path=None):
+        """
+        Remove cached structures so they are parsed again on the next request.
+
+        :param file_path: (optional) yaml file location to remove.  If not provided, all entries are removed.
+        :return: None
+        """
+        with self._lock:
+            if file_path is None:
+                self._structures.clear()
+            else:
+                self._structures.pop(os.path.realpath(file_path), None)
+        return
+
+    def clear_stats(self):
+        """
+        Reset hit and miss counters
+
+        :return: None
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+        return
+
+    def stats(self):
+        """
+        Summarize cache usage
+
+        :return: dictionary of hits, misses, and number of cached files
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._structures)
+            }
+
+
+# Shared cache used by all ExpandObjects instances in the process
+expansion_structure_cache = ExpansionStructureCache()
+
+
+class OptionTreePlan:
+    """
+    Expansion plan compiled from an OptionTree for one set of template branching options.  The plan holds references
+    to the selected read-only leaves, so applying it does not require the tree to be traversed again.
+
+    Attributes:
+        build_path: tuple of the BuildPath base objects leaf and the selected action instructions, or None
+        base_objects: BaseObjects leaf, or None
+        template_objects: tuple of the selected TemplateObjects leaves
+    """
+    __slots__ = ('build_path', 'base_objects', 'template_objects')
+
+    def __init__(self, build_path=None, base_objects=None, template_objects=()):
+        self.build_path = build_path
+        self.base_objects = base_objects
+        self.template_objects = template_objects
+        return
+
+
+class OptionTreePlanCache:
+    """
+    Process-wide, least recently used cache of compiled OptionTree expansion plans.
+
+    Plans are keyed by the id of the option tree, the template type, and the values of the template fields that
+    select branches of the tree.  Templates with the same options share a plan.  The option tree is stored with the
+    plan, so its id can not be reused by another structure while the plan is cached.
+
+    Attributes:
+        maxsize: maximum number of plans to keep
+        hits: number of requests served from the cache
+        misses: number of requests that required a plan to be compiled
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        return
+
+    def get(self, key):
+        """
+        Retrieve a plan and mark it as recently used
+
+        :param key: plan key
+        :return: OptionTreePlan or None if the key is not cached
+        """
+        with self._lock:
+            entry = self._plans.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, plan, structure=None):
+        """
+        Store a plan, evicting the least recently used plans if the cache is full
+
+        :param key: plan key
+        :param plan: OptionTreePlan
+        :param structure: (optional) structure whose id is part of the key, which is kept alive with the plan
+        :return: None
+        """
+        with self._lock:
+            self._plans[key] = (plan, structure)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+        return
+
+    def invalidate(self):
+        """
+        Remove all cached plans
+
+        :return: None
+        """
+        with self._lock:
+            self._plans.clear()
+        return
+
+    def clear_stats(self):
+        """
+        Reset hit and miss counters
+
+        :return: None
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+        return
+
+    def stats(self):
+        """
+        Summarize cache usage
+
+        :return: dictionary of hits, misses, and number of cached plans
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._plans)
+            }
+
+
+# Shared cache used by all ExpandObjects instances in the process
+option_tree_plan_cache = OptionTreePlanCache()
+
+
+class ExpansionPrototypeCache:
+    """
+    Process-wide, least recently used cache of expansion prototypes.
+
+    A prototype is the epJSON created from a template where the fields that only name objects (e.g. zone_name) are
+    replaced with placeholders.  Prototypes are keyed by the id of the expansion structure, which is stored with the
+    prototype, the template type, and the remaining template fields.  Templates that differ only by name are created from the prototype by replacing the
+    placeholders, instead of expanding the template again.
+
+    Attributes:
+        maxsize: maximum number of prototypes to keep
+        hits: number of templates created from a cached prototype
+        misses: number of templates that required a prototype to be expanded
+    """
+
+    placeholder = '<<{}>>'
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._prototypes = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        return
+
+    def get(self, key):
+        """
+        Retrieve a prototype and mark it as recently used
+
+        :param key: prototype key
+        :return: prototype epJSON, False if the template can not be created from a prototype, or None if the key is
+            not cached
+        """
+        with self._lock:
+            entry = self._prototypes.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._prototypes.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, prototype, structure=None):
+        """
+        Store a prototype, evicting the least recently used prototypes if the cache is full
+
+        :param key: prototype key
+        :param prototype: prototype epJSON, or False if the template can not be created from a prototype
+        :param structure: (optional) structure whose id is part of the key, which is kept alive with the prototype
+        :return: None
+        """
+        with self._lock:
+            self._prototypes[key] = (prototype, structure)
+            self._prototypes.move_to_end(key)
+            while len(self._prototypes) > self.maxsize:
+                self._prototypes.popitem(last=False)
+        return
+
+    def invalidate(self):
+        """
+        Remove all cached prototypes
+
+        :return: None
+        """
+        with self._lock:
+            self._prototypes.clear()
+        return
+
+    def clear_stats(self):
+        """
+        Reset hit and miss counters
+
+        :return: None
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+        return
+
+    def stats(self):
+        """
+        Summarize cache usage
+
+        :return: dictionary of hits, misses, and number of cached prototypes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._prototypes)
+            }
+
+    @classmethod
+    def substitute_names(cls, structure, replacements: tuple):
+        """
+        Create a copy of a prototype structure with the placeholders replaced by names
+
+        :param structure: prototype epJSON or part of it
+        :param replacements: tuple of (placeholder, name) pairs
+        :return: copy of the structure with names applied
+        """
+        if isinstance(structure, str):
+            if '<<' in structure:
+                for placeholder, name in replacements:
+                    structure = structure.replace(placeholder, name)
+            return structure
+        if isinstance(structure, dict):
+            return {
+                cls.substitute_names(key, replacements): cls.substitute_names(value, replacements)
+                for key, value in structure.items()}
+        if isinstance(structure, list):
+            return [cls.substitute_names(value, replacements) for value in structure]
+        return structure
+
+
+# Shared cache used by all ExpandObjects instances in the process
+expansion_prototype_cache = ExpansionPrototypeCache()
 
 
 class ExpansionStructureLocation:
     """
-    Verify expansion structure file location or object
+    Verify expansion structure file location or object.  Files are loaded through the process-wide
+    expansion_structure_cache.  The stored structure is frozen (read-only).
+    """
+    def __get__(self, obj, owner):
+        return obj._expansion_structure
+
+    def __set__(self, obj, value):
+        if isinstance(value, FrozenStructure):
+            parsed_value = value
+        elif isinstance(value, dict):
+            parsed_value = freeze_structure(value)
+        elif isinstance(value, str):
+            value_is_path = Path(value)
+            if value_is_path.is_file():
+                if not value.endswith(('.yaml', '.yml')):
+                    raise PyExpandObjectsTypeError('File extension does not match yaml type: {}'.format(value))
+                else:
+                    # parsed files are shared process-wide and must not be mutated.
+                    parsed_value = expansion_structure_cache.get(value)
+            else:
+                import yaml
+                from custom_exceptions import PyExpandObjectsYamlError
+                try:
+                    # if the string is not a file, then try to load it directly with SafeLoader.
+                    parsed_value = yaml.load(value, Loader=yaml.SafeLoader)
+                    # if the parsed value is the same as the input value, it's probably a bad file path
+                    if parsed_value == value:
+                        raise PyExpandObjectsFileNotFoundError('File does not exist: {}'.format(value))
+                    parsed_value = freeze_structure(parsed_value)
+                except yaml.YAMLError as exc:
+                    if hasattr(exc, 'problem_mark'):
+                        mark = exc.problem_mark
+                        raise PyExpandObjectsYamlError("Problem loading yaml at ({}, {})".format(
+                            mark.line + 1, mark.column + 1))
+                    else:  # pragma: no cover
+                        raise PyExpandObjectsYamlError()
+        else:
+            raise PyExpandObjectsTypeError(
+                'Template expansion structure reference is not a file path or dictionary: {}'.format(value))
+        obj._expansion_structure = parsed_value
+        return
+
+
+class TemplateRecord:
+    """
+    Fields of one HVACTemplate object.  A record class with a slot for each field is made by TemplateRecordTypes for
+    each template type and set of fields, so records do not carry an instance dictionary.  Fields that were not
+    provided are unset and raise AttributeError when read.
+    """
+    __slots__ = ()
+    _template_type = None
+    _fields = ()
+
+    def __reduce__(self):
+        return restore_template_record, (self._template_type, self.as_dict())
+
+    def __repr__(self):
+        return '{}({!r}, {!r})'.format(self.__class__.__name__, self._template_type, self.as_dict())
+
+    def as_dict(self) -> dict:
+        """
+        :return: dictionary of the fields that are set on the record
+        """
+        record_dictionary = {}
+        for template_field in self._fields:
+            try:
+                record_dictionary[template_field] = getattr(self, template_field)
+            except AttributeError:
+                continue
+        return record_dictionary
+
+
+class TemplateRecordTypes:
+    """
+    Process-wide registry of TemplateRecord classes and of HVACTemplate field types read from the epJSON schema.
+
+    Template values that are strings are converted to numbers when they look numeric.  When the schema is registered,
+    fields that only accept strings are stored unchanged, and the check is skipped.  Without a schema every string
+    value is checked.
+
+    Attributes:
+        hits: number of record classes served from the registry
+        misses: number of record classes that were created
+    """
+
+    numeric_rgx = re.compile(r'^[-\d\.]+$')
+
+    def __init__(self):
+        self._field_types = {}
+        self._record_classes = {}
+        # the registered schema is kept, instead of its id, so a new schema can not reuse the id of a freed one
+        self._schema = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        return
+
+    @staticmethod
+    def _get_schema_types(field_schema) -> set:
+        """
+        Collect the json types a field schema accepts
+
+        :param field_schema: schema of one object field
+        :return: set of json type names
+        """
+        schema_types = set()
+        for sub_schema in [field_schema, *field_schema.get('anyOf', [])]:
+            schema_type = sub_schema.get('type')
+            if isinstance(schema_type, str):
+                schema_types.add(schema_type)
+            elif isinstance(schema_type, list):
+                schema_types.update(schema_type)
+        return schema_types
+
+    def add_schema(self, schema: dict):
+        """
+        Read the field types of HVACTemplate objects from an epJSON schema
+
+        :param schema: epJSON schema dictionary
+        :return: None
+        """
+        if schema is self._schema:
+            return
+        field_types = {}
+        for object_type, object_schema in schema.get('properties', {}).items():
+            if not object_type.startswith('HVACTemplate:'):
+                continue
+            for object_fields_schema in object_schema.get('patternProperties', {}).values():
+                for template_field, field_schema in object_fields_schema.get('properties', {}).items():
+                    # Only string fields skip the numeric check.  Number fields and fields with an unknown type keep
+                    #   the original conversion.
+                    if self._get_schema_types(field_schema) == {'string', }:
+                        field_types.setdefault(object_type, {})[template_field] = 'string'
+        with self._lock:
+            self._field_types = field_types
+            self._record_classes.clear()
+            self._schema = schema
+        return
+
+    def clear(self):
+        """
+        Remove registered schema field types and record classes
+
+        :return: None
+        """
+        with self._lock:
+            self._field_types = {}
+            self._record_classes.clear()
+            self._schema = None
+        return
+
+    def get_class(self, template_type: str, template_fields: tuple):
+        """
+        Retrieve the record class for a template type and set of fields
+
+        :param template_type: HVACTemplate object type
+        :param template_fields: tuple of template field names
+        :return: TemplateRecord subclass
+        """
+        key = (template_type, template_fields)
+        with self._lock:
+            record_class = self._record_classes.get(key)
+            if record_class is not None:
+                self.hits += 1
+                return record_class
+            self.misses += 1
+        field_types = self._field_types.get(template_type, {})
+        try:
+            record_class = type('TemplateRecord', (TemplateRecord, ), {
+                '__slots__': template_fields,
+                '_template_type': template_type,
+                '_fields': template_fields,
+                '_string_fields': frozenset(f for f in template_fields if field_types.get(f) == 'string')})
+        except (TypeError, ValueError):
+            raise InvalidTemplateException(
+                'Template {} has invalid field names: {}'.format(template_type, template_fields))
+        with self._lock:
+            record_class = self._record_classes.setdefault(key, record_class)
+        return record_class
+
+    def convert_value(self, value):
+        """
+        Convert a template value to a number if it is a numeric string
+
+        :param value: template value
+        :return: formatted value
+        """
+        if not isinstance(value, str) or not self.numeric_rgx.match(value):
+            return value
+        try:
+            if '.' in value:
+                return float(value)
+            return int(value)
+        except ValueError:
+            return value
+
+    def build(self, template_type: str, template_structure: dict) -> TemplateRecord:
+        """
+        Create a record from the fields of a template
+
+        :param template_type: HVACTemplate object type
+        :param template_structure: dictionary of template fields and values
+        :return: TemplateRecord
+        """
+        record_class = self.get_class(template_type, tuple(template_structure.keys()))
+        string_fields = record_class._string_fields
+        record = record_class()
+        for template_field, template_value in template_structure.items():
+            if template_field not in string_fields:
+                template_value = self.convert_value(template_value)
+            setattr(record, template_field, template_value)
+        return record
+
+    def stats(self):
+        """
+        Summarize registry usage
+
+        :return: dictionary of record class counts
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'record_classes': len(self._record_classes),
+                'template_types': len(self._field_types)
+            }
+
+
+# Shared registry used by all ExpandObjects instances in the process
+template_record_types = TemplateRecordTypes()
+
+# Marker for template fields that are not set, since None is a valid template value
+template_field_unset = object()
+
+
+def restore_template_record(template_type: str, template_structure: dict) -> TemplateRecord:
+    """
+    Recreate a template record from values that were already converted, such as when a record is unpickled.
+
+    :param template_type: HVACTemplate object type
+    :param template_structure: dictionary of template fields and values
+    :return: TemplateRecord
     """
-    def __get__(self, obj, owner):
-        return obj._expansion_structure
+    record = template_record_types.get_class(template_type, tuple(template_structure.keys()))()
+    for template_field, template_value in template_structure.items():
+        setattr(record, template_field, template_value)
+    return record
 
-    def __set__(self, obj, value):
-        if isinstance(value, dict):
-            parsed_value = value
-        elif isinstance(value, str):
-            value_is_path = Path(value)
-            if value_is_path.is_file():
-                if not value.endswith(('.yaml', '.yml')):
-                    raise PyExpandObjectsTypeError('File extension does not match yaml type: {}'.format(value))
-                else:
-                    with open(value, 'r') as f:
-                        # todo_eo: discuss tradeoff of safety vs functionality of SafeLoader/FullLoader.
-                        #   With FullLoader there would be more functionality but might not be necessary.
-                        parsed_value = yaml.load(f, Loader=yaml.SafeLoader)
-            else:
-                try:
-                    # if the string is not a file, then try to load it directly with SafeLoader.
-                    parsed_value = yaml.load(value, Loader=yaml.SafeLoader)
-                    # if the parsed value is the same as the input value, it's probably a bad file path
-                    if parsed_value == value:
-                        raise PyExpandObjectsFileNotFoundError('File does not exist: {}'.format(value))
-                except yaml.YAMLError as exc:
-                    if hasattr(exc, 'problem_mark'):
-                        mark = exc.problem_mark
-                        raise PyExpandObjectsYamlError("Problem loading yaml at ({}, {})".format(
-                            mark.line + 1, mark.column + 1))
-                    else:  # pragma: no cover
-                        raise PyExpandObjectsYamlError()
-        else:
-            raise PyExpandObjectsTypeError(
-                'Template expansion structure reference is not a file path or dictionary: {}'.format(value))
-        obj._expansion_structure = parsed_value
-        return
+
+def restore_expand_object(payload: dict):
+    """
+    Recreate an expanded object from the payload created by ExpandObjects.to_payload, such as when a template was
+    expanded in a worker.  The logger and expansion structure are attached from the current process.
+
+    :param payload: dictionary of the expand class, expansion structure, and instance attributes
+    :return: ExpandObjects object
+    """
+    expand_object = payload['expand_class'].__new__(payload['expand_class'])
+    Logger.__init__(expand_object)
+    expand_object.__dict__.update(payload['attributes'])
+    expand_object.expansion_structure = payload['expansion_structure'] or template_expansion_structure_location
+    return expand_object
 
 
 class VerifyTemplate:
@@ -99,16 +1363,21 @@ class ExpandObjects(EPJSON):
         template_name: HVACTemplate unique name
         epjson: dictionary of epSJON objects to write to file
         unique_name: unique string used to modify to epJSON object names within the class
-        HVACTemplate fields are stored as class attributes
+        template_record: TemplateRecord of the HVACTemplate fields, which are read as class attributes
     """
 
     template = VerifyTemplate()
     expansion_structure = ExpansionStructureLocation()
+    # template fields that only name the created objects.  Templates that differ only by these fields are created
+    #   from a shared prototype.
+    prototype_name_fields = ()
+    # attribute names defined on each subclass, which take precedence over template fields
+    _class_attributes = {}
 
     def __init__(
             self,
             template=None,
-            expansion_structure=str(source_dir / 'resources' / 'template_expansion_structures.yaml')):
+            expansion_structure=template_expansion_structure_location):
         super().__init__()
         self.expansion_structure = expansion_structure
         self.template = template
@@ -121,28 +1390,67 @@ class ExpandObjects(EPJSON):
                     'An Invalid object {} failed verification'.format(template))
             self.template_type = hvac_template_type
             self.template_name = template_name
-            # apply template name and fields as class attributes
-            for template_field in template_structure.keys():
-                # If the value can be a numeric, then format it, otherwise save as a string.
-                template_string_value = str(template_structure[template_field])
-                num_rgx = re.match(r'^[-\d\.]+$', template_string_value)
-                if num_rgx:
-                    try:
-                        if '.' in template_string_value:
-                            setattr(self, template_field, float(template_structure[template_field]))
-                        else:
-                            setattr(self, template_field, int(template_structure[template_field]))
-                    except ValueError:
-                        setattr(self, template_field, template_structure[template_field])
-                else:
-                    setattr(self, template_field, template_structure[template_field])
+            # store template fields on a record, which are read as class attributes
+            self.template_record = template_record_types.build(hvac_template_type, template_structure)
         else:
             self.template_type = None
             self.template_name = None
+            self.template_record = None
         self.unique_name = None
         self.epjson = {}
         return
 
+    def __getattr__(self, name):
+        """
+        Read template fields from the template record.  This is only called when normal attribute lookup fails, so
+        attributes set on the instance take precedence.
+
+        :param name: attribute name
+        :return: template field value
+        """
+        template_record = self.__dict__.get('template_record')
+        if template_record is not None and not name.startswith('__'):
+            try:
+                return getattr(template_record, name)
+            except AttributeError:
+                pass
+        raise AttributeError("'{}' object has no attribute '{}'".format(self.__class__.__name__, name))
+
+    def to_payload(self):
+        """
+        Create a plain payload of the object, which holds the epJSON output and the attributes used after expansion.
+        The logger is not included, and the expansion structure is only included if it is not the default
+        structure.  Use restore_expand_object to recreate the object.
+
+        :return: dictionary of the expand class, expansion structure, and instance attributes
+        """
+        expansion_structure = self.__dict__.get('_expansion_structure')
+        if expansion_structure is expansion_structure_cache.get(template_expansion_structure_location):
+            expansion_structure = None
+        return {
+            'expand_class': self.__class__,
+            'expansion_structure': expansion_structure,
+            'attributes': {
+                k: v for k, v in self.__dict__.items()
+                if k not in ('logger', '_expansion_structure')}}
+
+    def _get_template_value(self, template_field, default=None):
+        """
+        Retrieve a template field value.  Fields are read from the template record directly unless an instance or
+        class attribute of the same name takes precedence.
+
+        :param template_field: template field name
+        :param default: value returned if the field is not set
+        :return: template field value
+        """
+        template_record = self.__dict__.get('template_record')
+        class_attributes = self._class_attributes.get(self.__class__)
+        if class_attributes is None:
+            class_attributes = self._class_attributes.setdefault(self.__class__, frozenset(dir(self.__class__)))
+        if template_record is None or template_field in self.__dict__ or template_field in class_attributes:
+            return getattr(self, template_field, default)
+        return getattr(template_record, template_field, default)
+
     def _flatten_list(
             self,
             nested_list: list,
@@ -165,21 +1473,19 @@ class ExpandObjects(EPJSON):
                 flat_list.append(i)
         return flat_list
 
-    def get_structure(
+    def _lookup_structure(
             self,
             structure_hierarchy: list,
-            structure=None) -> dict:
+            structure=None):
         """
-        Retrieve structure from YAML loaded object.  When retrieving TemplateObjects, the last item in the hierarchy
-        will be matched via regex instead of a direct key call for TemplateObjects.  This is done to allow for
-        multiple template options in a single mapping.
+        Retrieve the stored structure from YAML loaded object without copying it.  See get_structure for lookup rules.
 
         :param structure_hierarchy: list representing structure hierarchy
         :param structure: YAML loaded dictionary, default is loaded yaml loaded object
-        :return: structured object as dictionary
+        :return: structured object, read-only if it is part of the loaded expansion structure
         """
         try:
-            structure = copy.deepcopy(structure or self.expansion_structure)
+            structure = structure or self.expansion_structure
             if not isinstance(structure_hierarchy, list):
                 raise PyExpandObjectsTypeError("Input must be a list of structure keys: {}".format(structure_hierarchy))
             # iterate over structure hierarchy list. For each item, call the key to the YAML object.  When looking up
@@ -197,12 +1503,45 @@ class ExpandObjects(EPJSON):
                 structure_hierarchy))
         return structure
 
+    @staticmethod
+    def _copy_structure(structure):
+        """
+        Create a mutable copy of a structure retrieved from the YAML loaded object.
+
+        :param structure: FrozenStructure, dictionary, list, or value
+        :return: mutable copy of the structure
+        """
+        if isinstance(structure, (FrozenStructure, tuple)):
+            return thaw_structure(structure)
+        return deep_copy(structure)
+
+    def get_structure(
+            self,
+            structure_hierarchy: list,
+            structure=None) -> dict:
+        """
+        Retrieve structure from YAML loaded object.  When retrieving TemplateObjects, the last item in the hierarchy
+        will be matched via regex instead of a direct key call for TemplateObjects.  This is done to allow for
+        multiple template options in a single mapping.
+
+        The hierarchy is traversed without copying and only the returned subtree is copied, so the caller is free to
+        mutate the output.
+
+        :param structure_hierarchy: list representing structure hierarchy
+        :param structure: YAML loaded dictionary, default is loaded yaml loaded object
+        :return: structured object as dictionary
+        """
+        return self._copy_structure(
+            self._lookup_structure(structure_hierarchy=structure_hierarchy, structure=structure))
+
     def _get_option_tree(
             self,
-            structure_hierarchy: list) -> dict:
+            structure_hierarchy: list,
+            frozen: bool = False) -> dict:
         """
         Retrieve structure from YAML loaded object and verify it is correctly formatted for an option tree
         :param structure_hierarchy: list representing structure hierarchy
+        :param frozen: return the read-only structure instead of a copy
         :return: structured object as dictionary
         """
         try:
@@ -213,63 +1552,155 @@ class ExpandObjects(EPJSON):
         except TypeError:
             raise PyExpandObjectsTypeError(
                 "Call to YAML object was not a list of structure keys: {}".format(structure_hierarchy))
-        structure = self.get_structure(structure_hierarchy=structure_hierarchy)
+        structure = self._lookup_structure(structure_hierarchy=structure_hierarchy)
         # Check structure keys.  Return error if there is an unexpected value
         for key in structure:
             if key not in ['BuildPath', 'InsertObject', 'ReplaceObject', 'RemoveObject',
                            'BaseObjects', 'TemplateObjects']:
                 raise PyExpandObjectsYamlStructureException(
                     "YAML object is incorrectly formatted: {}, bad key: {}".format(structure, key))
-        return structure
+        if frozen:
+            return structure
+        return self._copy_structure(structure)
 
-    def _get_option_tree_objects(
+    def _template_option_selected(
             self,
-            structure_hierarchy: list) -> dict:
+            template_field: str,
+            template_value: str) -> bool:
         """
-        Return objects from option tree leaves.
+        Check if an OptionTree branch applies to the template.  If the template value is 'None' in the yaml, then the
+        branch applies if the class attribute is missing.  Otherwise, the template value is matched as a regex.
 
-        :return: epJSON dictionary with unresolved complex inputs
+        :param template_field: template field name, which is stored as a class attribute
+        :param template_value: option value from the yaml file
+        :return: boolean
+        """
+        field_value = self._get_template_value(template_field, template_field_unset)
+        if field_value is template_field_unset:
+            return template_value == 'None'
+        return bool(field_value and re.match(template_value, field_value))
+
+    @staticmethod
+    def _get_option_tree_branch_fields(option_tree) -> typing.Optional[tuple]:
+        """
+        Get the template fields that select branches of an option tree.  These are the TemplateObjects fields and the
+        BuildPath Actions fields.
+
+        :param option_tree: Yaml object holding HVACTemplate option tree
+        :return: tuple of template field names, or None if the option tree is not formatted as expected
+        """
+        branch_fields = []
+        try:
+            for template_field in (option_tree.get('TemplateObjects') or {}):
+                branch_fields.append(template_field)
+            for action in (option_tree.get('BuildPath') or {}).get('Actions') or ():
+                branch_fields.extend(action.keys())
+        except (AttributeError, TypeError):
+            return None
+        return tuple(sorted(set(branch_fields)))
+
+    def _compile_option_tree_plan(
+            self,
+            option_tree: dict) -> 'OptionTreePlan':
+        """
+        Select the OptionTree leaves and build path actions that apply to the template.
+
+        :param option_tree: Yaml object holding HVACTemplate option tree
+        :return: OptionTreePlan
         """
-        option_tree = self._get_option_tree(structure_hierarchy=structure_hierarchy)
         options = option_tree.keys()
-        option_tree_dictionary = {}
         if not set(list(options)).issubset({'BaseObjects', 'TemplateObjects', 'BuildPath'}):
+            from custom_exceptions import PyExpandObjectsYamlError
             raise PyExpandObjectsYamlError("Invalid OptionTree leaf type provided in YAML: {}"
                                            .format(options))
-        if "BuildPath" in options:
-            object_list = self._process_build_path(option_tree=option_tree['BuildPath'])
-            self.merge_epjson(
-                super_dictionary=option_tree_dictionary,
-                object_dictionary=self.yaml_list_to_epjson_dictionaries(object_list))
+        build_path = None
+        base_objects = None
+        template_objects = []
+        if 'BuildPath' in options:
+            build_path = self._compile_build_path(option_tree=option_tree['BuildPath'])
         if 'BaseObjects' in options:
-            option_tree_leaf = self._get_option_tree_leaf(
-                option_tree=option_tree,
-                leaf_path=['BaseObjects', ])
-            object_list = self._apply_transitions(option_tree_leaf=option_tree_leaf)
-            self.merge_epjson(
-                super_dictionary=option_tree_dictionary,
-                object_dictionary=self.yaml_list_to_epjson_dictionaries(object_list))
+            base_objects = self._lookup_structure(structure_hierarchy=['BaseObjects', ], structure=option_tree)
         if 'TemplateObjects' in options and option_tree['TemplateObjects']:
             try:
                 for template_field, template_tree in option_tree['TemplateObjects'].items():
-                    for field_option, objects in template_tree.items():
-                        # check if field option is 'None' and if object doesn't exist in the class, or if
-                        #   the fields match
-                        if (field_option == 'None' and not hasattr(self, template_field)) or \
-                                (getattr(self, template_field, None) and (
-                                 re.match(field_option, getattr(self, template_field)))):
-                            option_tree_leaf = self._get_option_tree_leaf(
-                                option_tree=option_tree,
-                                leaf_path=['TemplateObjects', template_field, getattr(self, template_field, 'None')])
-                            object_list = self._apply_transitions(option_tree_leaf=option_tree_leaf)
-                            self.merge_epjson(
-                                super_dictionary=option_tree_dictionary,
-                                object_dictionary=self.yaml_list_to_epjson_dictionaries(object_list))
+                    for field_option in template_tree.keys():
+                        if self._template_option_selected(template_field=template_field, template_value=field_option):
+                            template_objects.append(self._lookup_structure(
+                                structure_hierarchy=[
+                                    'TemplateObjects', template_field, getattr(self, template_field, 'None')],
+                                structure=option_tree))
                             # Only one field option should be applied, so break after it is successful
                             break
             except (AttributeError, KeyError):
                 raise PyExpandObjectsYamlStructureException('TemplateObjects section for system type {} is invalid in '
                                                             'yaml file.'.format(self.template_type))
+        return OptionTreePlan(
+            build_path=build_path,
+            base_objects=base_objects,
+            template_objects=tuple(template_objects))
+
+    def _get_option_tree_plan(
+            self,
+            option_tree: dict) -> 'OptionTreePlan':
+        """
+        Retrieve the expansion plan for an option tree from option_tree_plan_cache, compiling it on a miss.  Plans are
+        only cached for read-only option trees, since those are shared and cannot change.
+
+        :param option_tree: Yaml object holding HVACTemplate option tree
+        :return: OptionTreePlan
+        """
+        branch_fields = None
+        if isinstance(option_tree, FrozenStructure):
+            branch_fields = self._get_option_tree_branch_fields(option_tree)
+        if branch_fields is None:
+            return self._compile_option_tree_plan(option_tree=option_tree)
+        plan_key = (
+            id(option_tree),
+            self.template_type,
+            tuple((bf, self._get_template_value(bf, template_field_unset)) for bf in branch_fields))
+        try:
+            plan = option_tree_plan_cache.get(plan_key)
+        except TypeError:
+            # unhashable template values are not cached
+            return self._compile_option_tree_plan(option_tree=option_tree)
+        if plan is None:
+            plan = self._compile_option_tree_plan(option_tree=option_tree)
+            option_tree_plan_cache.set(plan_key, plan, structure=option_tree)
+        return plan
+
+    def _get_option_tree_objects(
+            self,
+            structure_hierarchy: list) -> dict:
+        """
+        Return objects from option tree leaves.  The leaves are selected by a compiled expansion plan, which is shared
+        by templates of the same type with the same branching options.
+
+        :return: epJSON dictionary with unresolved complex inputs
+        """
+        option_tree = self._get_option_tree(structure_hierarchy=structure_hierarchy, frozen=True)
+        plan = self._get_option_tree_plan(option_tree=option_tree)
+        option_tree_dictionary = {}
+        if plan.build_path is not None:
+            object_list = self._run_build_path(build_path_plan=plan.build_path)
+            self.merge_epjson(
+                super_dictionary=option_tree_dictionary,
+                object_dictionary=self.yaml_list_to_epjson_dictionaries(object_list))
+        if plan.base_objects is not None:
+            option_tree_leaf = self._format_option_tree_leaf(option_leaf=self._copy_structure(plan.base_objects))
+            object_list = self._apply_transitions(option_tree_leaf=option_tree_leaf)
+            self.merge_epjson(
+                super_dictionary=option_tree_dictionary,
+                object_dictionary=self.yaml_list_to_epjson_dictionaries(object_list))
+        try:
+            for template_leaf in plan.template_objects:
+                option_tree_leaf = self._format_option_tree_leaf(option_leaf=self._copy_structure(template_leaf))
+                object_list = self._apply_transitions(option_tree_leaf=option_tree_leaf)
+                self.merge_epjson(
+                    super_dictionary=option_tree_dictionary,
+                    object_dictionary=self.yaml_list_to_epjson_dictionaries(object_list))
+        except (AttributeError, KeyError):
+            raise PyExpandObjectsYamlStructureException('TemplateObjects section for system type {} is invalid in '
+                                                        'yaml file.'.format(self.template_type))
         return option_tree_dictionary
 
     def _get_option_tree_leaf(
@@ -284,6 +1715,19 @@ class ExpandObjects(EPJSON):
         :return: Formatted dictionary with objects and alternative options to be applied.
         """
         option_leaf = self.get_structure(structure_hierarchy=leaf_path, structure=option_tree)
+        return self._format_option_tree_leaf(option_leaf=option_leaf, option_tree=option_tree)
+
+    def _format_option_tree_leaf(
+            self,
+            option_leaf: dict,
+            option_tree: dict = None) -> dict:
+        """
+        Format a copied OptionTree leaf into a dictionary of objects and alternative options
+
+        :param option_leaf: mutable copy of the option tree leaf
+        :param option_tree: (optional) option tree holding the leaf, used for error output
+        :return: Formatted dictionary with objects and alternative options to be applied.
+        """
         if option_leaf:
             transitions = option_leaf.pop('Transitions', None)
             mappings = option_leaf.pop('Mappings', None)
@@ -291,7 +1735,8 @@ class ExpandObjects(EPJSON):
             try:
                 objects = self._flatten_list(option_leaf['Objects'])
             except KeyError:
-                raise PyExpandObjectsTypeError("Invalid or missing Objects location: {}".format(option_tree))
+                raise PyExpandObjectsTypeError("Invalid or missing Objects location: {}".format(
+                    option_tree if option_tree is not None else option_leaf))
             return {
                 'Objects': objects,
                 'Transitions': transitions,
@@ -339,29 +1784,31 @@ class ExpandObjects(EPJSON):
                         # Ensure there is only one object_key and it is 'Objects'
                         (object_key, tree_objects), = option_tree_leaf.items()
                         if not object_key == 'Objects':
+                            from custom_exceptions import PyExpandObjectsYamlError
                             raise PyExpandObjectsYamlError(
                                 "Objects key missing from OptionTree leaf: {}".format(option_tree_leaf))
                         # iterate over each object from 'Objects' dictionary
                         for tree_object in tree_objects:
                             for object_type, _ in tree_object.items():
                                 # if the object reference matches the object, apply the transition
-                                if re.match(object_type_reference, object_type):
+                                if object_type_pattern_index.match(object_type_reference, object_type):
                                     # if the object_field is a dictionary, then the value is a formatted string to
                                     # apply with the template_field.  Otherwise, just try to get the value from the
                                     # template field, which is stored as a class attribute (on class initialization).
-                                    try:
-                                        if isinstance(object_field, dict):
-                                            (object_field, object_val), = object_field.items()
-                                            object_value = object_val.format(getattr(self, template_field))
-                                        else:
-                                            object_value = getattr(self, template_field)
-                                    except AttributeError:
+                                    if isinstance(object_field, dict):
+                                        (object_field, object_val), = object_field.items()
+                                    else:
+                                        object_val = None
+                                    object_value = self._get_template_value(template_field, template_field_unset)
+                                    if object_value is template_field_unset:
                                         object_value = None
                                         self.logger.info("A template value was attempted to be applied "
                                                          "to an object field but the template "
                                                          "field was not present in template object. "
                                                          "object: {}, object fieled: {}, template field: {}"
                                                          .format(object_type, object_field, template_field))
+                                    elif object_val is not None:
+                                        object_value = object_val.format(object_value)
                                     if object_value:
                                         # On a match and valid value, apply the field.
                                         # If the object is a 'super' object used in a
@@ -382,15 +1829,16 @@ class ExpandObjects(EPJSON):
                         # Ensure there is only one object_key and it is 'Objects'
                         (object_key, tree_objects), = option_tree_leaf.items()
                         if not object_key == 'Objects':
+                            from custom_exceptions import PyExpandObjectsYamlError
                             raise PyExpandObjectsYamlError(
                                 "Objects key missing from OptionTree leaf: {}".format(option_tree_leaf))
                         # iterate over each object from 'Objects' dictionary
                         for tree_object in tree_objects:
                             for object_type, object_fields in tree_object.items():
                                 # if the object reference in the mapping dictionary matches the object, apply the map
-                                if re.match(object_type_reference, object_type):
+                                if object_type_pattern_index.match(object_type_reference, object_type):
                                     for map_option, sub_dictionary in mapping_dictionary.items():
-                                        if hasattr(self, mapping_field) and getattr(self, mapping_field) == map_option:
+                                        if self._get_template_value(mapping_field, template_field_unset) == map_option:
                                             for field, val in sub_dictionary.items():
                                                 try:
                                                     # On a match and valid value, apply the field.
@@ -419,7 +1867,7 @@ class ExpandObjects(EPJSON):
         output_dictionary = {}
         for transitioned_object in yaml_list:
             try:
-                (transitioned_object_type, transitioned_object_structure), = copy.deepcopy(transitioned_object).items()
+                (transitioned_object_type, transitioned_object_structure), = deep_copy(transitioned_object).items()
                 # get the dictionary nested in 'Fields' for super objects
                 if transitioned_object_structure.get('Fields'):
                     object_name = transitioned_object_structure['Fields'].pop('name').format(self.unique_name)
@@ -448,7 +1896,7 @@ class ExpandObjects(EPJSON):
         :return: Resolved field value
         """
         # keep a copy for output
-        backup_copy = copy.deepcopy(lookup_instructions)
+        backup_copy = deep_copy(lookup_instructions)
         # retrieve the necessary instructions from the instructions
         # if Location is an integer, lookup by index.  If it is a string, treat is as a regex and look for an
         # 'occurrence' key as well
@@ -474,7 +1922,7 @@ class ExpandObjects(EPJSON):
                 match_count = 0
                 for super_object in build_path:
                     (super_object_type_check, _), = super_object.items()
-                    if re.match(location, super_object_type_check):
+                    if object_type_pattern_index.match(location, super_object_type_check):
                         (super_object_type, super_object_structure), = super_object.items()
                         match_count += 1
                         if match_count == occurrence:
@@ -496,160 +1944,79 @@ class ExpandObjects(EPJSON):
             raise PyExpandObjectsYamlStructureException("Invalid complex input for build path lookup: lookup, {}, "
                                                         "value_location {}".format(backup_copy, value_location))
 
+    def _resolve_simple_input(
+            self,
+            input_value: typing.Union[str, int, float]) -> list:
+        """
+        Resolve a number or string input into a field value.  Strings are formatted with class attributes, or the
+        unique name, and converted to a numeric type if possible.
+
+        :param input_value: field value input
+        :return: list of resolved values.  The list is empty if the input did not resolve to a value, and contains
+            None if a referenced class attribute does not exist.
+        """
+        if isinstance(input_value, numbers.Number):
+            return [input_value, ]
+        # if a string is present within the formatting brackets, it is intended to be the template field (which is
+        # a class attribute).  Otherwise, the unique name is applied.  The format plan is compiled once per string.
+        plan = name_format_plans.get(input_value)
+        try:
+            formatted_value = plan.render(self)
+        except AttributeError:
+            if plan.attribute is None:
+                raise
+            # If the class attribute does not exist, return None as flag to handle in parent process.
+            return [None, ]
+        if not formatted_value:
+            return []
+        # if a simple schedule is indicated by name, create it here.  The schedule
+        # is stored to the class epjson attribute.
+        if formatted_value.startswith('HVACTemplate-Always'):
+            always_val_rgx = re.search(r'^HVACTemplate-Always([\d\.]+)', formatted_value)
+            if always_val_rgx:
+                always_val = always_val_rgx.group(1)
+                self.build_compact_schedule(
+                    structure_hierarchy=['CommonObjects', 'Schedule', 'Compact', 'ALWAYS_VAL'],
+                    insert_values=[always_val, ]
+                )
+        # Try to convert formatted value to correct type
+        if plan.numeric and template_record_types.numeric_rgx.match(formatted_value):
+            if '.' in formatted_value:
+                formatted_value = float(formatted_value)
+            else:
+                formatted_value = int(formatted_value)
+        return [formatted_value, ]
+
     def _resolve_complex_input(
             self,
             field_name: str,
             input_value: typing.Union[str, int, float, dict, list],
             epjson: dict = None,
-            build_path: list = None) -> \
+            build_path: list = None,
+            resolver: 'ComplexInputResolver' = None) -> \
             typing.Generator[str, typing.Dict[str, str], None]:
         """
         Resolve a complex input into a field value
 
         :param epjson: epJSON dictionary of objects
         :param input_value: field value input
+        :param resolver: (optional) ComplexInputResolver of the epJSON dictionary, which shares resolved references
+            between calls.  If None, one is created.
         :return: resolved field value
         """
         # Try class attributes if variables not defined in function
         epjson = epjson or self.epjson
-        build_path = build_path or getattr(self, 'build_path', None)
-        if isinstance(input_value, numbers.Number):
-            yield {"field": field_name, "value": input_value}
-        elif isinstance(input_value, str):
-            # if a string is present within the formatting brackets, it is intended to be the template field (which is
-            # a class attribute).
-            # Extract the attribute reference and attempt to apply it.
-            formatted_value = None
-            template_field_rgx = re.search(r'.*{(\w+)}.*', input_value)
-            if template_field_rgx:
-                # if class field present, reformat the string to call the class attribute and apply.
-                template_attribute = '0.{}'.format(template_field_rgx.group(1))
-                formatted_string_rgx = re.sub(r'{(\w+)}', '{' + template_attribute + '}', input_value)
-                try:
-                    formatted_value = formatted_string_rgx.format(self)
-                except AttributeError:
-                    # If the class attribute does not exist, yield None as flag to handle in parent process.
-                    yield {'field': field_name, 'value': None}
-            else:
-                # if no class attribute was specified {i.e. {}), just use the unique name.
-                formatted_value = input_value.format(getattr(self, 'unique_name'))
-            if formatted_value:
-                # if a simple schedule is indicated by name, create it here.  The schedule
-                # is stored to the class epjson attribute.
-                always_val_rgx = re.search(r'^HVACTemplate-Always([\d\.]+)', str(formatted_value))
-                if always_val_rgx:
-                    always_val = always_val_rgx.group(1)
-                    self.build_compact_schedule(
-                        structure_hierarchy=['CommonObjects', 'Schedule', 'Compact', 'ALWAYS_VAL'],
-                        insert_values=[always_val, ]
-                    )
-                # Try to convert formatted value to correct type
-                num_rgx = re.match(r'^[-\d\.]+$', formatted_value)
-                if num_rgx:
-                    if '.' in formatted_value:
-                        formatted_value = float(formatted_value)
-                    else:
-                        formatted_value = int(formatted_value)
-                yield {"field": field_name, "value": formatted_value}
-        elif isinstance(input_value, dict):
-            # unpack the referenced object type and the lookup instructions
-            try:
-                (reference_object_type, lookup_instructions), = input_value.items()
-            except ValueError:
-                raise PyExpandObjectsYamlStructureException('Complex input reference is invalid: {}'
-                                                            .format(input_value))
-            # If the input_value is instructing to use a 'BuildPathReference' then insert the object by build
-            # path location
-            if reference_object_type.lower() == 'buildpathreference':
-                if not build_path:
-                    raise PyExpandObjectsYamlStructureException("BuildPath complex input was specified with no build"
-                                                                " path available: field {}, input {}"
-                                                                .format(field_name, input_value))
-                try:
-                    # Get the referenced node value
-                    extracted_value = self._resolve_complex_input_from_build_path(
-                        build_path=build_path,
-                        lookup_instructions=lookup_instructions)
-                    # Resolve the extracted value with this function.
-                    try:
-                        complex_generator = self._resolve_complex_input(
-                            epjson=epjson,
-                            field_name=field_name,
-                            input_value=extracted_value)
-                        for cg in complex_generator:
-                            yield cg
-                    except RecursionError:
-                        raise PyExpandObjectsYamlStructureException(
-                            "Maximum Recursion limit exceeded when resolving {} for {}"
-                            .format(input_value, field_name))
-                except (KeyError, PyExpandObjectsYamlStructureException):
-                    raise PyExpandObjectsYamlStructureException("Object field could not be resolved: input {}, "
-                                                                "field {}, template name {}"
-                                                                .format(input_value, field_name, self.unique_name))
-            else:
-                # If the input_value is an object type reference then try to match it with the EnergyPlus objects in
-                # the super dictionary.
-                for object_type in epjson.keys():
-                    if re.match(reference_object_type, object_type):
-                        # if 'self' is used as the reference node, return the energyplus object type
-                        # if 'key' is used as the reference node, return the unique object name
-                        # if the reference node is a dictionary, then it is a nested complex input and the function
-                        #  is reapplied recursively
-                        # For anything else, process the reference node and return a value.
-                        (object_name, _), = epjson[object_type].items()
-                        if lookup_instructions.lower() == 'self':
-                            yield {"field": field_name, "value": object_type}
-                        elif lookup_instructions.lower() == 'key':
-                            yield {"field": field_name, "value": object_name}
-                        elif isinstance(epjson[object_type][object_name][lookup_instructions], dict):
-                            try:
-                                complex_generator = self._resolve_complex_input(
-                                    epjson=epjson,
-                                    field_name=field_name,
-                                    input_value=epjson[object_type][object_name][lookup_instructions])
-                                for cg in complex_generator:
-                                    yield cg
-                            except RecursionError:
-                                raise PyExpandObjectsYamlStructureException(
-                                    "Maximum Recursion limit exceeded when resolving {} for {}"
-                                    .format(input_value, field_name))
-                        else:
-                            # attempt to format both the field and value to be returned.
-                            if isinstance(field_name, str):
-                                formatted_field_name = field_name.format(self.unique_name)
-                            else:
-                                formatted_field_name = field_name
-                            if isinstance(epjson[object_type][object_name][lookup_instructions], str):
-                                formatted_value = epjson[object_type][object_name][lookup_instructions]\
-                                    .format(self.unique_name)
-                            else:
-                                formatted_value = epjson[object_type][object_name][lookup_instructions]
-                            yield {"field": formatted_field_name,
-                                   "value": formatted_value}
-        elif isinstance(input_value, list):
-            # When the input is a list, iterate and apply this function recursively to each object.
-            try:
-                tmp_list = []
-                for input_list_item in input_value:
-                    tmp_d = {}
-                    for input_list_field, input_list_value in input_list_item.items():
-                        complex_generator = self._resolve_complex_input(
-                            epjson=epjson,
-                            field_name=input_list_field,
-                            input_value=input_list_value)
-                        for cg in complex_generator:
-                            tmp_d[cg["field"]] = cg["value"]
-                    tmp_list.append(tmp_d)
-                yield {"field": field_name, "value": tmp_list}
-            except RecursionError:
-                raise PyExpandObjectsYamlStructureException(
-                    "Maximum Recursion limit exceeded when resolving {} for {}"
-                    .format(input_value, field_name))
+        if resolver is None or resolver.epjson is not epjson:
+            resolver = ComplexInputResolver(expand_object=self, epjson=epjson, build_path=build_path)
+        for resolved_input in resolver.resolve(field_name=field_name, input_value=input_value):
+            yield resolved_input
         return
 
     def resolve_objects(self, epjson, reference_epjson=None):
         """
-        Resolve complex inputs in epJSON formatted dictionary
+        Resolve complex inputs in epJSON formatted dictionary.  Each object is resolved once into a new field
+        dictionary, which replaces the unresolved object in the input epJSON dictionary after all objects are resolved.
+        The input is used as the reference until then, so it does not need to be copied.
 
         :param epjson: epJSON dictionary with complex inputs
         :param reference_epjson: (optional) epJSON dictionary to be used as reference objects for complex lookups.  If
@@ -658,24 +2025,30 @@ class ExpandObjects(EPJSON):
         """
         schedule_dictionary = None
         if not reference_epjson:
-            reference_epjson = copy.deepcopy(epjson)
+            reference_epjson = epjson
+        # build the object reference lookups once and share resolved references for all fields
+        resolver = ComplexInputResolver(expand_object=self, epjson=reference_epjson)
+        resolved_objects = []
         for object_type, object_structure in epjson.items():
             for object_name, object_fields in object_structure.items():
                 # If a Schedule:Compact object is specified, and has special formatting, build it here.  The object
                 # is saved to the class epjson attribute.
                 if object_type == 'Schedule:Compact' and \
                         object_fields.get('structure') and object_fields.get('insert_values'):
-                    structure = object_fields.pop('structure')
-                    insert_values = object_fields.pop('insert_values')
+                    resolved_fields = {
+                        field_name: field_value for field_name, field_value in object_fields.items()
+                        if field_name not in ('structure', 'insert_values')}
                     schedule_dictionary = self.build_compact_schedule(
-                        structure_hierarchy=structure.split(':'),
-                        insert_values=insert_values)
+                        structure_hierarchy=object_fields['structure'].split(':'),
+                        insert_values=object_fields['insert_values'])
                 else:
-                    for field_name, field_value in copy.deepcopy(object_fields).items():
+                    resolved_fields = dict(object_fields)
+                    for field_name, field_value in object_fields.items():
                         input_generator = self._resolve_complex_input(
                             epjson=reference_epjson,
                             field_name=field_name,
-                            input_value=field_value)
+                            input_value=field_value,
+                            resolver=resolver)
                         for ig in input_generator:
                             # if None was returned as the value, pop the key out of the dictionary and skip it.
                             # use the zero comparison to specifically pass that number.  The 'is not None' clause is
@@ -690,9 +2063,13 @@ class ExpandObjects(EPJSON):
                             except (TypeError, ValueError):
                                 test_zero = ig['value']
                             if test_zero == 0 or ig['value']:
-                                object_fields[ig['field']] = ig['value']
+                                resolved_fields[ig['field']] = ig['value']
                             else:
-                                object_fields.pop(ig['field'])
+                                resolved_fields.pop(ig['field'])
+                resolved_objects.append((object_structure, object_name, resolved_fields))
+        for object_structure, object_name, resolved_fields in resolved_objects:
+            object_structure[object_name] = resolved_fields
+        expansion_counters.resolved_objects += len(resolved_objects)
         # if a schedule dictionary was created, add it to the class epjson
         if schedule_dictionary:
             self.merge_epjson(
@@ -715,19 +2092,122 @@ class ExpandObjects(EPJSON):
         epjson_from_option_tree = self._get_option_tree_objects(structure_hierarchy=structure_hierarchy)
         # Always use merge_epjson to store objects in self.epjson in case objects have already been stored to
         # that dictionary during processing
+        resolved_epjson = self.resolve_objects(epjson_from_option_tree)
         self.merge_epjson(
             super_dictionary=epjson,
-            object_dictionary=self.resolve_objects(epjson_from_option_tree))
-        return self.resolve_objects(epjson_from_option_tree)
+            object_dictionary=resolved_epjson)
+        return resolved_epjson
+
+    def _get_prototype_names(self) -> typing.Optional[dict]:
+        """
+        Get the template fields that only name objects, along with the unique name and template name.  Names that
+        could change how the template is expanded, such as numeric or formatting strings, are rejected.
+
+        :return: dictionary of placeholders and names, or None if the names can not be used with a prototype
+        """
+        template_record = self.template_record
+        names = {'template_name': self.template_name}
+        for template_field in self.prototype_name_fields:
+            name = getattr(template_record, template_field, template_field_unset)
+            if name is not template_field_unset:
+                names[template_field] = name
+        if self.unique_name not in names.values():
+            return None
+        for name in names.values():
+            if not isinstance(name, str) or not name or '{' in name or '}' in name or '<<' in name or \
+                    name.startswith('HVACTemplate-Always') or template_record_types.numeric_rgx.match(name):
+                return None
+        return {expansion_prototype_cache.placeholder.format(field): name for field, name in names.items()}
+
+    def _get_prototype_key(self, prototype_names: dict) -> typing.Optional[tuple]:
+        """
+        Create the prototype cache key from the template fields that do not name objects
+
+        :param prototype_names: dictionary of placeholders and names
+        :return: tuple key, or None if the template can not be created from a prototype
+        """
+        # Templates changed after initialization are not created from a prototype.
+        initial_attributes = self.__dict__.get('_prototype_attributes')
+        if not initial_attributes or self.__dict__.keys() - {'_prototype_attributes', } != initial_attributes or \
+                self.epjson or not isinstance(self.expansion_structure, FrozenStructure):
+            return None
+        template_fields = self.template_record.as_dict()
+        for template_field in self.prototype_name_fields:
+            template_fields.pop(template_field, None)
+        key = (
+            self.__class__,
+            id(self.expansion_structure),
+            self.template_type,
+            tuple(sorted(template_fields.items())),
+            tuple(sorted(prototype_names.keys())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _create_prototype(self, prototype_names: dict) -> typing.Union[dict, bool]:
+        """
+        Expand a copy of the template with placeholders in place of names
+
+        :param prototype_names: dictionary of placeholders and names
+        :return: prototype epJSON, or False if the expansion changed the class in a way a prototype can not reproduce
+        """
+        placeholders = {name: placeholder for placeholder, name in prototype_names.items()}
+        prototype = self.__class__.__new__(self.__class__)
+        prototype.__dict__.update(self.__dict__)
+        prototype_fields = self.template_record.as_dict()
+        for template_field in self.prototype_name_fields:
+            if template_field in prototype_fields:
+                prototype_fields[template_field] = expansion_prototype_cache.placeholder.format(template_field)
+        prototype.template = {
+            self.template_type: {expansion_prototype_cache.placeholder.format('template_name'): prototype_fields}}
+        prototype.template_name = placeholders[self.template_name]
+        prototype.template_record = restore_template_record(self.template_type, prototype_fields)
+        prototype.unique_name = placeholders[self.unique_name]
+        prototype.epjson = {}
+        prototype_attributes = prototype.__dict__.keys() - {'_prototype_attributes', }
+        prototype._create_objects()
+        if prototype.__dict__.keys() - {'_prototype_attributes', } != prototype_attributes:
+            return False
+        return prototype.epjson
+
+    def _create_objects_from_prototype(self):
+        """
+        Create a set of EnergyPlus objects for a given template from a cached prototype of templates that differ only
+        by name.  Templates that can not be created from a prototype are expanded with _create_objects.
+
+        :return: epJSON dictionary of newly created objects.  The class epJSON dictionary is also modified to include
+            the newly created objects
+        """
+        prototype_names = self._get_prototype_names()
+        prototype_key = self._get_prototype_key(prototype_names) if prototype_names else None
+        if prototype_key is None:
+            return self._create_objects()
+        prototype = expansion_prototype_cache.get(prototype_key)
+        if prototype is None:
+            try:
+                prototype = self._create_prototype(prototype_names)
+            except CustomException:
+                # Expand the template itself so the error refers to the template names
+                return self._create_objects()
+            expansion_prototype_cache.set(prototype_key, prototype, structure=self.expansion_structure)
+        if prototype is False:
+            return self._create_objects()
+        created_epjson = expansion_prototype_cache.substitute_names(prototype, tuple(prototype_names.items()))
+        self.merge_epjson(
+            super_dictionary=self.epjson,
+            object_dictionary=created_epjson)
+        return created_epjson
 
     def _apply_build_path_action(self, build_path, action_instructions):
         """
         Mutate a build path list based on a set of action instructions
 
-        :param build_path: Input build path list
+        :param build_path: Input build path.  A BuildPath is changed in place, while a list is left unchanged.
         :param action_instructions: Formatted instructions to apply an action.  Valid actions are 'Insert', 'Remove',
             and 'Replace' (case insensitive).
-        :return: mutated dictionary with action applied.
+        :return: build path with action applied, of the same type as the input.
         """
         # get the indicated occurrence that the regex will match.  First match is default.
         occurrence = action_instructions.pop('Occurrence', 1)
@@ -735,8 +2215,8 @@ class ExpandObjects(EPJSON):
         if not isinstance(occurrence, int) or (isinstance(occurrence, int) and occurrence < 0):
             raise PyExpandObjectsYamlStructureException('Occurrence must be a non-negative integer: {}'
                                                         .format(occurrence))
-        # backup copy for output
-        backup_copy = copy.deepcopy(action_instructions)
+        # backup copy for error messages.  Only top level keys are removed, so a shallow copy is sufficient.
+        backup_copy = dict(action_instructions)
         try:
             # Format check inputs for action_type and location
             action_type = action_instructions.pop('ActionType').lower()
@@ -779,11 +2259,14 @@ class ExpandObjects(EPJSON):
         if object_list:
             # make a temporary object list since non-super objects will be removed from the list
             tmp_object_list = []
+            # reference objects are created once, when the first non-super object is found
+            epjson_objects = None
             for o in object_list:
                 (object_type, object_structure), = o.items()
                 if not object_structure.get('Fields') and not object_structure.get('Connectors'):
                     epjson_object = self.yaml_list_to_epjson_dictionaries([o, ])
-                    epjson_objects = self.yaml_list_to_epjson_dictionaries(object_list)
+                    if epjson_objects is None:
+                        epjson_objects = self.yaml_list_to_epjson_dictionaries(object_list)
                     epjson_resolved_object = self.resolve_objects(epjson=epjson_object, reference_epjson=epjson_objects)
                     self.merge_epjson(
                         super_dictionary=self.epjson,
@@ -793,129 +2276,130 @@ class ExpandObjects(EPJSON):
                     tmp_object_list.append(o)
             # set the object list to only contain super objects
             object_list = tmp_object_list
-        # Create new build path dictionary since the input dictionary will be mutated
-        output_build_path = copy.deepcopy(build_path)
-        # if the location is an integer, just perform the action on that index, otherwise, iterate over super objects
-        #   keeping count of the index
+        # A BuildPath is changed in place.  A list is not modified, so a new BuildPath is made with the same objects.
+        if isinstance(build_path, BuildPath):
+            output_build_path = build_path
+        else:
+            output_build_path = BuildPath(build_path)
+        # if the location is an integer, just perform the action on that index, otherwise, find the indexed
+        #   occurrence of the object reference
         if isinstance(location, int):
             if action_type == 'insert':
                 # if location is negative, then get the positive list index by subtraction
                 if location < 0:
-                    location = len(build_path) + location + 1
+                    location = len(output_build_path) + location + 1
                 output_build_path.insert(location, object_list)
             elif action_type == 'remove':
-                output_build_path.pop(location)
+                output_build_path.remove(location)
             elif action_type == 'replace':
-                output_build_path[location] = object_list
+                output_build_path.replace(location, object_list)
         else:
-            # Iterate over the objects finding the appropriate location for the action.
-            # Keep a count of number of times object has been matched.  This is for the 'Occurrence' key to
-            #   perform an action on the nth occurrence of a match.
-            match_count = 0
-            for idx, super_object in enumerate(build_path):
-                # if there is a match to the object type, and the occurrence is correct, then perform the action
-                for super_object_type, super_object_structure in super_object.items():
-                    if object_reference and re.match(object_reference, super_object_type):
-                        match_count += 1
-                        if match_count == occurrence:
-                            if action_type == 'insert' and isinstance(location, str):
-                                # The location variable is now either 'before' or 'after',
-                                #   so mutate the variable to be an integer value for offset
-                                location = 0 if location == 'before' else 1
-                                output_build_path.insert(idx + location, object_list)
-                            elif action_type == 'remove':
-                                output_build_path.pop(idx)
-                            elif action_type == 'replace':
-                                output_build_path[idx] = object_list
-                            else:
-                                raise PyExpandObjectsYamlStructureException(
-                                    "Action could not be performed on build path for an "
-                                    "unknown reason: build path {}, action: {}".format(build_path, action_instructions))
+            # Find the location for the action.  The 'Occurrence' key is used to perform an action on the nth
+            #   occurrence of a match.
+            if object_reference:
+                idx, match_count = output_build_path.find(object_reference, occurrence)
+            else:
+                idx, match_count = None, 0
+            if idx is not None:
+                if action_type == 'insert' and isinstance(location, str):
+                    # The location variable is now either 'before' or 'after',
+                    #   so mutate the variable to be an integer value for offset
+                    location = 0 if location == 'before' else 1
+                    output_build_path.insert(idx + location, object_list)
+                elif action_type == 'remove':
+                    output_build_path.remove(idx)
+                elif action_type == 'replace':
+                    output_build_path.replace(idx, object_list)
+                else:
+                    raise PyExpandObjectsYamlStructureException(
+                        "Action could not be performed on build path for an "
+                        "unknown reason: build path {}, action: {}".format(build_path, action_instructions))
             # check if the number of matches actually met the occurrence threshold
             if not match_count >= occurrence:
                 raise PyExpandObjectsYamlStructureException(
                     "The number of occurrences in a build path was never reached for "
                     "an action. build path: {}, action: {}".format(build_path, action_instructions))
-        # flatten build path list before output
-        output_build_path = self._flatten_list(output_build_path)
-        return output_build_path
+        if isinstance(build_path, BuildPath):
+            return output_build_path
+        return output_build_path.to_list()
 
     def _connect_and_convert_build_path_to_object_list(self, build_path=None, loop_type='AirLoop'):
         """
         Connect nodes in build path and convert to list of epJSON formatted objects
 
-        :param build_path: build path of EnergyPlus super objects
+        :param build_path: build path of EnergyPlus super objects.  A BuildPath is connected in place, while a list is
+            copied first.
         :return: object list of modified super objects.  The build path is also saved as a class attribute for
             future reference
         """
         build_path = build_path or getattr(self, 'build_path', None)
         if not build_path:
             raise PyExpandObjectsException("Build path was not provided nor was it available as a class attribute")
-        object_list = []
-        formatted_build_path = []
-        for idx, super_object in enumerate(copy.deepcopy(build_path)):
-            (super_object_type, super_object_structure), = super_object.items()
-            connectors = super_object_structure.get('Connectors')
-            if not connectors:
-                raise PyExpandObjectsYamlStructureException("Super object is missing Connectors key: {}"
-                                                            .format(super_object))
-            try:
-                # The first object only sets the outlet node variable and remains unchanged
-                if idx == 0:
-                    out_node = super_object_structure['Fields'][connectors[loop_type]['Outlet']]
-                else:
-                    # After the first object, the inlet node name is changed to the previous object's outlet node
-                    # name.  Then the outlet node variable is reset.
-                    super_object_structure['Fields'][connectors[loop_type]['Inlet']] = out_node
-                    out_node = super_object_structure['Fields'][connectors[loop_type]['Outlet']]
-                object_list.append({super_object_type: super_object_structure['Fields']})
-                formatted_build_path.append({super_object_type: super_object_structure})
-            except (AttributeError, KeyError):
-                raise PyExpandObjectsYamlStructureException("Field/Connector mismatch. Object: {}, connectors: {}"
-                                                            .format(super_object_structure, connectors))
+        if not isinstance(build_path, BuildPath):
+            build_path = BuildPath(deep_copy(build_path))
+        object_list = build_path.connect(loop_type=loop_type)
         # Save build path to class attribute for later reference.
-        self.build_path = formatted_build_path
+        self.build_path = build_path.to_list()
         return object_list
 
-    def _process_build_path(self, option_tree):
+    def _compile_build_path(self, option_tree) -> tuple:
         """
-        Create a connected group of objects from the BuildPath branch in the OptionTree.  A build path is a list of
-        'super objects' which have an extra layer of structure.  These keys are 'Fields' and 'Connectors'.  The Fields
-        are regular EnergyPlus field name-value pairs.  The connectors are structured dictionaries that provide
-        information on how one object should connect the previous/next object in the build path list.  A branch of
-        connected objects is also produced.
+        Select the BuildPath base objects and the actions that apply to the template.
 
-        :return: list of EnergyPlus super objects.  Additional EnergyPlus objects (Branch, Branchlist) that require
-            the build path for their creation.
+        :param option_tree: BuildPath branch of the OptionTree
+        :return: tuple of the base objects leaf and a tuple of selected action instructions
         """
-        # Get the base objects from the build path dictionary and apply transitions to obtain a list of dictionary
-        #  objects that have been formatted.
-        build_path_leaf = self._get_option_tree_leaf(
-            option_tree=option_tree,
-            leaf_path=['BaseObjects', ])
-        build_path = self._apply_transitions(build_path_leaf)
-        # Get the list actions to perform on a build bath, based on template inputs, and process them in order
-        actions = option_tree.pop('Actions', None)
+        build_path_leaf = self._lookup_structure(structure_hierarchy=['BaseObjects', ], structure=option_tree)
+        # Get the list actions to perform on a build bath, based on template inputs, in order
+        selected_actions = []
+        actions = option_tree.get('Actions')
         if actions:
             for action in actions:
                 try:
                     for template_field, action_structure in action.items():
                         for template_value, action_instructions in action_structure.items():
                             # check if the option tree template value matches a class template field.
-                            # If the template value is 'None' in the yaml, then perform the operation if the class
-                            # attribute is missing or None.
-                            if (template_value == 'None' and not hasattr(self, template_field)) or \
-                                    (getattr(self, template_field, None) and (
-                                     re.match(template_value, getattr(self, template_field)))):
-                                build_path = self._apply_build_path_action(
-                                    build_path=build_path,
-                                    action_instructions=action_instructions)
+                            if self._template_option_selected(
+                                    template_field=template_field,
+                                    template_value=template_value):
+                                selected_actions.append(action_instructions)
                 except (AttributeError, KeyError):
                     raise PyExpandObjectsYamlStructureException("Action is incorrectly formatted: {}".format(action))
+        return build_path_leaf, tuple(selected_actions)
+
+    def _run_build_path(self, build_path_plan: tuple) -> list:
+        """
+        Create a connected group of objects from a compiled BuildPath.
+
+        :param build_path_plan: tuple of the base objects leaf and selected action instructions
+        :return: list of EnergyPlus super objects
+        """
+        build_path_leaf, actions = build_path_plan
+        # Apply transitions to the base objects to obtain a list of dictionary objects that have been formatted.
+        #   The objects are new copies, so the build path can change and connect them in place.
+        build_path = BuildPath(self._apply_transitions(self._format_option_tree_leaf(
+            option_leaf=self._copy_structure(build_path_leaf))))
+        for action_instructions in actions:
+            build_path = self._apply_build_path_action(
+                build_path=build_path,
+                action_instructions=self._copy_structure(action_instructions))
         # Format the created build path
         object_list = self._connect_and_convert_build_path_to_object_list(build_path)
         return object_list
 
+    def _process_build_path(self, option_tree):
+        """
+        Create a connected group of objects from the BuildPath branch in the OptionTree.  A build path is a list of
+        'super objects' which have an extra layer of structure.  These keys are 'Fields' and 'Connectors'.  The Fields
+        are regular EnergyPlus field name-value pairs.  The connectors are structured dictionaries that provide
+        information on how one object should connect the previous/next object in the build path list.  A branch of
+        connected objects is also produced.
+
+        :return: list of EnergyPlus super objects.  Additional EnergyPlus objects (Branch, Branchlist) that require
+            the build path for their creation.
+        """
+        return self._run_build_path(build_path_plan=self._compile_build_path(option_tree=option_tree))
+
     def build_compact_schedule(
             self,
             structure_hierarchy: list,
@@ -943,7 +2427,7 @@ class ExpandObjects(EPJSON):
         if insert_values:
             formatted_data_lines = [
                 {j: float(k.format(float(*insert_values)))}
-                if re.match(r'.*{.*f}', k, re.IGNORECASE) else {j: k}
+                if '{' in k and re.match(r'.*{.*f}', k, re.IGNORECASE) else {j: k}
                 for i in structure_object['data'] for j, k in i.items()]
         else:
             formatted_data_lines = [{j: k} for i in structure_object for j, k in i.items()]
@@ -1049,6 +2533,9 @@ class ExpandZone(ExpandObjects):
     """
     Zone expansion operations
     """
+
+    prototype_name_fields = ('zone_name', 'template_thermostat_name')
+
     def __init__(self, template):
         # fill/create class attributes values with template inputs
         super().__init__(template=template)
@@ -1058,6 +2545,8 @@ class ExpandZone(ExpandObjects):
                 raise InvalidTemplateException("Zone name not provided in template: {}".format(template))
         except AttributeError:
             raise InvalidTemplateException("Zone name not provided in zone template: {}".format(template))
+        # attribute names after initialization, used to check the template has not changed before using a prototype
+        self._prototype_attributes = frozenset(self.__dict__)
         return
 
     def run(self):
@@ -1065,7 +2554,7 @@ class ExpandZone(ExpandObjects):
         Process zone template
         :return: Class object with epJSON dictionary as class attribute
         """
-        self._create_objects()
+        self._create_objects_from_prototype()
         return self
 
 
@@ -1112,10 +2601,11 @@ class ExpandSystem(ExpandObjects):
                                                    .format(controller_objects))
                 object_list.append({'AirLoopHVAC:ControllerList': airloop_hvac_controllerlist_object})
         controller_epjson = self.yaml_list_to_epjson_dictionaries(object_list)
+        resolved_epjson = self.resolve_objects(epjson=controller_epjson)
         self.merge_epjson(
             super_dictionary=epjson,
-            object_dictionary=self.resolve_objects(epjson=controller_epjson))
-        return self.resolve_objects(epjson=controller_epjson)
+            object_dictionary=resolved_epjson)
+        return resolved_epjson
 
     def _create_outdoor_air_equipment_list_from_build_path(
             self, build_path: list = None, epjson: dict = None) -> dict:
@@ -1161,10 +2651,11 @@ class ExpandSystem(ExpandObjects):
                 object_count += 1
         outdoor_air_equipment_list_object = self.yaml_list_to_epjson_dictionaries([
             {'AirLoopHVAC:OutdoorAirSystem:EquipmentList': oa_equipment_list_dictionary}, ])
+        resolved_epjson = self.resolve_objects(epjson=outdoor_air_equipment_list_object)
         self.merge_epjson(
             super_dictionary=epjson,
-            object_dictionary=self.resolve_objects(epjson=outdoor_air_equipment_list_object))
-        return self.resolve_objects(epjson=outdoor_air_equipment_list_object)
+            object_dictionary=resolved_epjson)
+        return resolved_epjson
 
     def _create_availability_manager_assignment_list(self, epjson: dict = None) -> dict:
         """
@@ -1195,10 +2686,11 @@ class ExpandSystem(ExpandObjects):
                                            .format(availability_managers))
         availability_manager_assignment_list_object = self.yaml_list_to_epjson_dictionaries([
             {'AvailabilityManagerAssignmentList': availability_manager_list_object}, ])
+        resolved_epjson = self.resolve_objects(epjson=availability_manager_assignment_list_object)
         self.merge_epjson(
             super_dictionary=epjson,
-            object_dictionary=self.resolve_objects(epjson=availability_manager_assignment_list_object))
-        return self.resolve_objects(epjson=availability_manager_assignment_list_object)
+            object_dictionary=resolved_epjson)
+        return resolved_epjson
 
     def _create_outdoor_air_system(self, epjson: dict = None) -> dict:
         """
@@ -1245,10 +2737,11 @@ class ExpandSystem(ExpandObjects):
         outdoor_air_system_yaml_object['outdoor_air_equipment_list_name'] = oa_system_equipment_name
         outdoor_air_system_list_object = self.yaml_list_to_epjson_dictionaries([
             {'AirLoopHVAC:OutdoorAirSystem': outdoor_air_system_yaml_object}, ])
+        resolved_epjson = self.resolve_objects(epjson=outdoor_air_system_list_object)
         self.merge_epjson(
             super_dictionary=epjson,
-            object_dictionary=self.resolve_objects(epjson=outdoor_air_system_list_object))
-        return self.resolve_objects(epjson=outdoor_air_system_list_object)
+            object_dictionary=resolved_epjson)
+        return resolved_epjson
 
     def _modify_build_path_for_outside_air_system(
             self, loop_type: str = 'AirLoop', epjson: dict = None, build_path: list = None) -> list:
@@ -1273,7 +2766,7 @@ class ExpandSystem(ExpandObjects):
         # iterate backwards over build_path and insert each object until the OutdoorAir:Mixer is hit.
         # Do first append with OutdoorAirSystem object
         parsed_build_path = []
-        for super_object in copy.deepcopy(build_path)[::-1]:
+        for super_object in deep_copy(build_path)[::-1]:
             (super_object_type, super_object_structure), = super_object.items()
             if not super_object_type == 'OutdoorAir:Mixer':
                 parsed_build_path.insert(0, super_object)
@@ -1314,7 +2807,7 @@ class ExpandSystem(ExpandObjects):
                 raise PyExpandObjectsException('Return fan was specified in HVACTemplate:System, however, a fan was not '
                                                'the first object specified in the build path: {}'.format(build_path))
             else:
-                parsed_build_path.insert(0, copy.deepcopy(build_path[0]))
+                parsed_build_path.insert(0, deep_copy(build_path[0]))
         return parsed_build_path
 
     def _create_branch_and_branchlist_from_build_path(
@@ -1339,15 +2832,16 @@ class ExpandSystem(ExpandObjects):
         build_path = build_path or getattr(self, 'build_path', None)
         if not build_path:
             raise PyExpandObjectsException("Build path was not provided nor was it available as a class attribute")
+        # The modified build path is a copy, and it is only read here, so it does not need to be copied again.
         build_path = self._modify_build_path_for_outside_air_system(
             epjson=epjson,
-            build_path=copy.deepcopy(build_path))
+            build_path=build_path)
         components = []
-        for super_object in copy.deepcopy(build_path):
+        for super_object in build_path:
             component = {}
             (super_object_type, super_object_structure), = super_object.items()
             try:
-                connectors = super_object_structure.pop('Connectors')
+                connectors = super_object_structure['Connectors']
             except KeyError:
                 raise PyExpandObjectsYamlStructureException("Super object is missing Connectors key: {}"
                                                             .format(super_object))
@@ -1373,10 +2867,11 @@ class ExpandSystem(ExpandObjects):
             "BranchList": branchlist_fields
         }
         branch_and_branchlist_objects = self.yaml_list_to_epjson_dictionaries([branch, branchlist])
+        resolved_epjson = self.resolve_objects(epjson=branch_and_branchlist_objects)
         self.merge_epjson(
             super_dictionary=epjson,
-            object_dictionary=self.resolve_objects(epjson=branch_and_branchlist_objects))
-        return self.resolve_objects(epjson=branch_and_branchlist_objects)
+            object_dictionary=resolved_epjson)
+        return resolved_epjson
 
     def run(self):
         """
@@ -1498,3 +2993,16 @@ class ExpandPlantEquipment(ExpandObjects):
         """
         self._create_objects()
         return self
+
+
+def __getattr__(name):
+    """
+    Provide exceptions that are imported on first use as module attributes.
+
+    :param name: attribute name
+    :return: exception class
+    """
+    if name == 'PyExpandObjectsYamlError':
+        from custom_exceptions import PyExpandObjectsYamlError
+        return PyExpandObjectsYamlError
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
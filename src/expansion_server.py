@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import socketserver
+import sys
+from argparse import Namespace
+
+from custom_exceptions import CustomException, InvalidInputException
+from logger import Logger, get_log_capture, start_log_capture
+
+
+class ExpansionServer(Logger):
+    """
+    Expand multiple epJSON requests in one process so that the expansion structure and schema validator are only
+    loaded once.
+
+    Requests and responses are JSON objects written one per line.  A request is either
+        {"file": "<path of epJSON file>", "output_directory": "<optional>", "no_schema": <optional>}
+    which is processed the same way as a command line call, including writing the output files, or
+        {"epJSON": {<epJSON object>}, "no_schema": <optional>}
+    which returns the expanded output without writing files.  The response is the output dictionary built by
+    main (epJSON, epJSON_base, epJSON_hvac_templates, outputPreProcessorMessage).  If the request fails, the
+    response holds an 'error' message and the outputPreProcessorMessage of the request.
+
+    Attributes:
+        no_schema: default schema validation option for requests
+        schema_marker: use the schema verification marker file
+        run_task_workers: number of expansion phases that may run at the same time for each request
+        request_count: number of requests processed
+    """
+
+    def __init__(self, no_schema=False, schema_marker=False, run_task_workers=None):
+        super().__init__()
+        self.no_schema = no_schema
+        self.schema_marker = schema_marker
+        self.run_task_workers = run_task_workers or 1
+        self.request_count = 0
+        return
+
+    def load(self):
+        """
+        Load the expansion structure and schema validator into the process-wide caches.
+
+        :return: None
+        """
+        from expand_objects import ExpandObjects
+        from epjson_handler import EPJSON
+        ExpandObjects()
+        if not self.no_schema:
+            EPJSON(schema_marker=self.schema_marker)._load_schema()
+        self.logger.info('Expansion server loaded')
+        return
+
+    def handle_request(self, request):
+        """
+        Process one expansion request.
+
+        :param request: request dictionary
+        :return: output dictionary
+        """
+        from main import main, expand_epjson
+        self.request_count += 1
+        try:
+            if not isinstance(request, dict):
+                raise InvalidInputException('Request is not a JSON object: {}'.format(request))
+            no_schema = request.get('no_schema', self.no_schema)
+            if 'epJSON' in request:
+                from hvac_template import HVACTemplate
+                # capture log messages for this request only
+                start_log_capture()
+                hvt = HVACTemplate(
+                    no_schema=no_schema,
+                    schema_marker=self.schema_marker,
+                    run_task_workers=self.run_task_workers)
+                output = expand_epjson(hvt=hvt, input_epjson=request['epJSON'], no_schema=no_schema)
+            elif 'file' in request:
+                output = main(
+                    Namespace(
+                        no_schema=no_schema,
+                        schema_marker=self.schema_marker,
+                        file=request['file'],
+                        output_directory=request.get('output_directory'),
+                        run_task_workers=self.run_task_workers))
+            else:
+                raise InvalidInputException('Request does not contain a file or epJSON object: {}'.format(request))
+        except Exception as e:
+            if isinstance(e, CustomException):
+                e.log(self.logger)
+            else:
+                self.logger.error('Request failed: %s', str(e))
+            output = {
+                'outputPreProcessorMessage': get_log_capture().getvalue(),
+                'error': str(e)}
+        return output
+
+    def handle_line(self, line):
+        """
+        Process one JSON formatted request line.
+
+        :param line: request line
+        :return: JSON formatted response line, or None for a blank line
+        """
+        if not line.strip():
+            return None
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            self.request_count += 1
+            response = {'outputPreProcessorMessage': '', 'error': 'Request is not valid JSON: {}'.format(str(e))}
+        else:
+            response = self.handle_request(request)
+        from epjson_handler import json_default
+        return json.dumps(response, default=json_default) + '\n'
+
+    @staticmethod
+    def _redirect_console_output(output_stream):
+        """
+        Write console log messages to stderr so they are not mixed with responses.
+
+        :param output_stream: response stream
+        :return: None
+        """
+        for handler in logging.root.handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is output_stream:
+                handler.setStream(sys.stderr)
+        return
+
+    def serve_stdio(self, input_stream=None, output_stream=None):
+        """
+        Read requests from stdin and write responses to stdout until the input is closed.
+
+        :param input_stream: (optional) request stream.  Default is stdin.
+        :param output_stream: (optional) response stream.  Default is stdout.
+        :return: None
+        """
+        input_stream = input_stream or sys.stdin
+        output_stream = output_stream or sys.stdout
+        self._redirect_console_output(output_stream)
+        for line in input_stream:
+            response = self.handle_line(line)
+            if response:
+                output_stream.write(response)
+                output_stream.flush()
+        return
+
+    def create_socket_server(self, socket_path):
+        """
+        Create a Unix socket server that processes requests.  Requests are handled one at a time, and each
+        connection can send multiple request lines.
+
+        :param socket_path: path of Unix socket
+        :return: socket server
+        """
+        if not hasattr(socketserver, 'UnixStreamServer'):  # pragma: no cover - platform specific
+            raise InvalidInputException('Unix sockets are not available on this platform')
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        expansion_server = self
+
+        class ExpansionRequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    response = expansion_server.handle_line(line.decode('utf-8'))
+                    if response:
+                        self.wfile.write(response.encode('utf-8'))
+                        self.wfile.flush()
+                return
+
+        return socketserver.UnixStreamServer(socket_path, ExpansionRequestHandler)
+
+    def serve_socket(self, socket_path):
+        """
+        Process requests on a Unix socket until the process is interrupted.
+
+        :param socket_path: path of Unix socket
+        :return: None
+        """
+        socket_server = self.create_socket_server(socket_path)
+        self.logger.info('Expansion server listening on %s', socket_path)
+        try:
+            socket_server.serve_forever()
+        except KeyboardInterrupt:  # pragma: no cover - interactive
+            pass
+        finally:
+            socket_server.server_close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+        return
+
+    def serve(self, socket_path=None):
+        """
+        Load the caches and process requests from a Unix socket, if provided, or stdin/stdout.
+
+        :param socket_path: (optional) path of Unix socket
+        :return: None
+        """
+        if not socket_path:
+            self._redirect_console_output(sys.stdout)
+        self.load()
+        if socket_path:
+            self.serve_socket(socket_path)
+        else:
+            self.serve_stdio()
+        return
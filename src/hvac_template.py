@@ -1,9 +1,177 @@
 import re
 import copy
-from epjson_handler import EPJSON
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from epjson_handler import EPJSON, EPJSONView
 from expand_objects import ExpandObjects, ExpandThermostat, ExpandZone, ExpandSystem, ExpandPlantLoop, \
-    ExpandPlantEquipment
-from custom_exceptions import InvalidTemplateException, InvalidEpJSONException, PyExpandObjectsYamlStructureException
+    ExpandPlantEquipment, template_record_types, restore_expand_object
+from custom_exceptions import InvalidTemplateException, InvalidEpJSONException, PyExpandObjectsYamlStructureException, \
+    InvalidInputException, log_custom_exceptions
+from logger import start_log_capture
+from task_graph import Task, TaskGraph
+
+# executor types for expanding the templates of one category concurrently
+expansion_executor_types = ('thread', 'process')
+
+
+def expand_template(expand_class, template, capture_log=False, **kwargs):
+    """
+    Expand one template in an executor worker.  Dictionaries of expanded objects in the keyword arguments, such as
+    plant_loop_class_objects, are passed as payloads and restored before expansion.
+
+    :param expand_class: ExpandObjects child class to operate on template (e.g. ExpandZone).
+    :param template: HVACTemplate:.* object
+    :param capture_log: capture the log output of the worker and return it with the payload.  Used for worker
+        processes, which do not write to the capture stream of the main process.
+    :param kwargs: keyword arguments for expand_class
+    :return: payload of the expanded object (see ExpandObjects.to_payload) with the captured log output
+    """
+    log_stream = start_log_capture() if capture_log else None
+    expand_kwargs = {
+        k: {n: restore_expand_object(o) for n, o in v.items()} if isinstance(v, dict) else v
+        for k, v in kwargs.items()}
+    payload = expand_class(template=template, **expand_kwargs).run().to_payload()
+    payload['log'] = log_stream.getvalue() if log_stream else ''
+    return payload
+
+
+class ZoneSystemIndex:
+    """
+    Index of expanded zones by the system template they reference.  Zones are added once, after zone expansion, so
+    creating the supply and return paths of each system does not search every zone.
+
+    Attributes:
+        zone_system_fields: zone template fields that reference a system template name
+    """
+
+    zone_system_fields = (
+        'template_constant_volume_system_name',
+        'dedicated_outdoor_air_system_name',
+        'template_dual_duct_system_name',
+        'template_unitary_system_name',
+        'template_vav_system_name',
+        'template_vrf_system_name')
+
+    def __init__(self, expanded_zones=None):
+        """
+        :param expanded_zones: (optional) dictionary of ExpandZone objects to add
+        """
+        self._zones = {}
+        for ez in (expanded_zones or {}).values():
+            self.add_zone(ez)
+        return
+
+    def add_zone(self, zone_class_object):
+        """
+        Add a zone under each system it references
+
+        :param zone_class_object: ExpandZone object
+        :return: None
+        """
+        for zone_system_template_field_name in self.zone_system_fields:
+            system_template_name = getattr(zone_class_object, zone_system_template_field_name, None)
+            if system_template_name is not None:
+                try:
+                    self._zones.setdefault(
+                        (zone_system_template_field_name, system_template_name), []).append(zone_class_object)
+                except TypeError:
+                    continue
+        return
+
+    def get_zones(self, zone_system_template_field_name, system_template_name) -> list:
+        """
+        Retrieve the zones that reference a system, in the order they were added
+
+        :param zone_system_template_field_name: zone template field that references the system
+        :param system_template_name: system template name
+        :return: list of ExpandZone objects
+        """
+        return self._zones.get((zone_system_template_field_name, system_template_name), [])
+
+
+class WaterLoopBranchIndex:
+    """
+    Index of the Branch objects of expanded zones, systems and plant equipment by water loop type.  Branches are
+    classified once per loop type and shared by reference, so connecting each plant loop does not copy or search
+    every branch again.
+
+    Attributes:
+        demand_branch_patterns: regular expressions, by loop type, matched to the first component of zone and system
+            branches that are on the demand side of the loop
+    """
+
+    demand_branch_patterns = {
+        # todo_eo: object searching regex need to be expanded.
+        'chilledwater': ('^Coil:Cooling:Water($|:DetailedGeometry)+', ),
+        'hotwater': ('^Coil:Heating:Water($|:DetailedGeometry)+', '^ZoneHVAC:Baseboard.*Water'),
+        'mixedwater': ('^Coil:.*HeatPump.*', )}
+
+    def __init__(self, expanded_zones=None, expanded_systems=None, expanded_plant_equipment=None):
+        """
+        :param expanded_zones: dictionary of ExpandZone objects
+        :param expanded_systems: dictionary of ExpandSystem objects
+        :param expanded_plant_equipment: dictionary of ExpandPlantEquipment objects
+        """
+        self._zones_and_systems = [expanded_zones or {}, expanded_systems or {}]
+        self._expanded_plant_equipment = expanded_plant_equipment or {}
+        self._demand_branches = None
+        self._plant_equipment_branches = {}
+        return
+
+    def get_zone_system_branches(self, plant_loop_template_type):
+        """
+        Retrieve zone and system branches that are on the demand side of a loop type
+
+        :param plant_loop_template_type: HVACTemplate:Plant:.*Loop type
+        :return: dictionary of branch objects, or None if there are no branches
+        """
+        plant_loop_type = plant_loop_template_type.lower()
+        if 'condenserwater' in plant_loop_type:
+            return None
+        loop_kind = next((lk for lk in self.demand_branch_patterns.keys() if lk in plant_loop_type), None)
+        if not loop_kind:
+            raise InvalidTemplateException('an invalid loop type was specified when creating plant loop connections: {}'
+                                           .format(plant_loop_template_type))
+        # all zone and system branches are classified in one pass
+        if self._demand_branches is None:
+            self._demand_branches = {lk: {} for lk in self.demand_branch_patterns.keys()}
+            for class_object in self._zones_and_systems:
+                for co in class_object.values():
+                    for branch_name, branch_structure in co.epjson.get('Branch', {}).items():
+                        component_type = branch_structure['components'][0]['component_object_type']
+                        for lk, branch_patterns in self.demand_branch_patterns.items():
+                            if any(re.match(br, component_type) for br in branch_patterns):
+                                self._demand_branches[lk][branch_name] = branch_structure
+        return self._demand_branches[loop_kind] or None
+
+    def get_plant_equipment_branches(self, plant_loop_template_type):
+        """
+        Retrieve plant equipment branches that connect to a loop type
+
+        :param plant_loop_template_type: HVACTemplate:Plant:.*Loop type
+        :return: dictionary of branch objects, or None if there are no branches
+        """
+        if plant_loop_template_type in self._plant_equipment_branches:
+            return self._plant_equipment_branches[plant_loop_template_type]
+        plant_loop_type = plant_loop_template_type.lower()
+        branch_dictionary = {}
+        for pe in self._expanded_plant_equipment.values():
+            branch_objects = pe.epjson.get('Branch', {})
+            # Special handling for chillers with condenser water and chilled water branches
+            # todo_eo: find a better way to separate the branches instead of searching for chw or cnd in the branch
+            #  names.  It may be unreliable with future user inputs.
+            if pe.template_type == 'HVACTemplate:Plant:Chiller' and getattr(pe, 'condenser_type', None) == 'WaterCooled':
+                for branch_name, branch_structure in branch_objects.items():
+                    if 'chilledwater' in plant_loop_type and 'chw' in branch_name.lower():
+                        branch_dictionary[branch_name] = branch_structure
+                    if 'condenserwater' in plant_loop_type and 'cnd' in branch_name.lower():
+                        branch_dictionary[branch_name] = branch_structure
+            # typical handling when all plant equipment branches belong in one loop
+            elif pe.template_plant_loop_type in plant_loop_template_type:
+                branch_dictionary.update(branch_objects)
+        self._plant_equipment_branches[plant_loop_template_type] = branch_dictionary or None
+        return branch_dictionary or None
 
 
 class HVACTemplate(EPJSON):
@@ -21,16 +189,43 @@ class HVACTemplate(EPJSON):
         templates_plant_equipment: HVACTemplate:Plant equipment objects
         templates_plant_loops: HVACTemplate:Plant: loop objects
         expanded_*: List of class objects for each template type
+        zone_system_index: ZoneSystemIndex of the expanded zones
+        water_loop_branch_index: WaterLoopBranchIndex of the expanded zones, systems, and plant equipment
+        expansion_executor: executor type (thread or process) used to expand the templates of one category
+            concurrently.  If not set, templates are expanded serially.
+        expansion_workers: number of executor workers
+        run_task_workers: number of run tasks (see _get_task_graph) that may run at the same time
+        task_timings: dictionary of elapsed seconds for each run task from the last run
         epjson: epJSON used to store connection objects
     """
 
     def __init__(
             self,
-            no_schema=False):
+            no_schema=False,
+            schema_marker=False,
+            expansion_executor=None,
+            expansion_workers=None,
+            run_task_workers=1):
         """
         :param no_schema: Boolean flag for skipping schema validation
+        :param schema_marker: Boolean flag for using an on-disk marker to skip schema meta-validation
+        :param expansion_executor: (optional) executor type, thread or process, used to expand templates concurrently
+        :param expansion_workers: (optional) number of executor workers.  Default is the number of CPUs
+        :param run_task_workers: number of run tasks that may run at the same time.  Tasks are run in a fixed order
+            when set to 1.  More than one worker can not be used with the process expansion executor.
         """
-        super().__init__(no_schema=no_schema)
+        super().__init__(no_schema=no_schema, schema_marker=schema_marker)
+        if expansion_executor and expansion_executor not in expansion_executor_types:
+            raise InvalidInputException('Invalid expansion executor type {}, valid types are {}'
+                                        .format(expansion_executor, expansion_executor_types))
+        if expansion_executor == 'process' and run_task_workers > 1:
+            # worker processes are forked from a run task thread, and would inherit locks held by other threads
+            raise InvalidInputException('The process expansion executor can not be used with more than one run '
+                                        'task worker')
+        self.expansion_executor = expansion_executor
+        self.expansion_workers = expansion_workers or os.cpu_count() or 1
+        self.run_task_workers = run_task_workers
+        self.task_timings = {}
         self.templates = {}
         self.base_objects = {}
         self.templates_systems = {}
@@ -43,6 +238,9 @@ class HVACTemplate(EPJSON):
         self.expanded_systems = {}
         self.expanded_plant_loops = {}
         self.expanded_plant_equipment = {}
+        self.zone_system_index = None
+        self.water_loop_branch_index = None
+        self._path_expansion_structure = None
         self.epjson = {}
         return
 
@@ -103,20 +301,56 @@ class HVACTemplate(EPJSON):
                     unique_name_override=False)
         return
 
+    def _get_executor(self):
+        """
+        Create the executor used to expand templates.  Worker processes are forked where it is available so they
+        inherit the loaded expansion structure and template field types.
+
+        :return: ThreadPoolExecutor or ProcessPoolExecutor
+        """
+        if self.expansion_executor == 'thread':
+            return ThreadPoolExecutor(max_workers=self.expansion_workers)
+        if 'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        else:  # pragma: no cover - platform specific
+            mp_context = multiprocessing.get_context()
+        return ProcessPoolExecutor(max_workers=self.expansion_workers, mp_context=mp_context)
+
     def _expand_templates(self, templates, expand_class, **kwargs):
         """
-        Run Expand operations on multiple templates
+        Run Expand operations on multiple templates.  If an expansion executor is set, the templates are expanded
+        concurrently and the results are merged in template order.
+
         :param templates: dictionary of HVACTemplate:.* objects
         :param expand_class: ExpandObjects child class to operate on template (e.g. ExpandZone).
         :return: dictionary of expanded objects with unique name as key
         """
         expanded_template_dictionary = {}
-        templates = self.epjson_genexp(templates)
-        for template in templates:
-            (_, template_structure), = template.items()
-            (template_name, _), = template_structure.items()
-            expanded_template = expand_class(template=template, **kwargs).run()
-            expanded_template_dictionary[template_name] = expanded_template
+        templates = list(self.epjson_genexp(templates))
+        if not self.expansion_executor or self.expansion_workers == 1 or len(templates) <= 1:
+            for template in templates:
+                (_, template_structure), = template.items()
+                (template_name, _), = template_structure.items()
+                expanded_template = expand_class(template=template, **kwargs).run()
+                expanded_template_dictionary[template_name] = expanded_template
+            return expanded_template_dictionary
+        # workers receive and return payloads instead of class objects
+        worker_kwargs = {
+            k: {n: o.to_payload() for n, o in v.items()} if isinstance(v, dict) else v
+            for k, v in kwargs.items()}
+        capture_log = self.expansion_executor == 'process'
+        with self._get_executor() as executor:
+            futures = [
+                executor.submit(expand_template, expand_class, template, capture_log=capture_log, **worker_kwargs)
+                for template in templates]
+            for template, future in zip(templates, futures):
+                (_, template_structure), = template.items()
+                (template_name, _), = template_structure.items()
+                payload = future.result()
+                worker_log = payload.pop('log')
+                if worker_log:
+                    self.stream.write(worker_log)
+                expanded_template_dictionary[template_name] = restore_expand_object(payload)
         return expanded_template_dictionary
 
     def _create_zonecontrol_thermostat(self, zone_class_object):
@@ -208,7 +442,7 @@ class HVACTemplate(EPJSON):
                                            .format(template_type))
         return zone_system_template_field_name
 
-    def _create_system_path_connection_objects(self, system_class_object, expanded_zones):
+    def _create_system_path_connection_objects(self, system_class_object, expanded_zones, zone_system_index=None):
         """
         Create objects connecting system supply air to zone objects.  An AirLoopHVAC:SupplyPath object is created with
         either an AirLoopHVAC:SupplyPlenum or an AirLoopHVAC:ZoneSplitter object.  The same is true for
@@ -216,54 +450,58 @@ class HVACTemplate(EPJSON):
 
         :param system_class_object: Expanded HVACTemplate:System:.* class object
         :param expanded_zones: dictionary of ExpandZone objects
+        :param zone_system_index: (optional) ZoneSystemIndex of expanded_zones.  If not provided, it is created.
         :return: system supply air connection objects.  AirLoopHVAC:SupplyPath object and either
             AirLoopHVAC:SupplyPlenum or AirLoopHVAC:ZoneSplitter object as well ass AirLoopHVAC:ReturnPath and either
             AirLoopHVAC:ReturnPlenum or AirLoopHVAC:ZoneMixer.
         """
         zone_system_template_field_name = \
             self._get_zone_template_field_from_system_type(template_type=system_class_object.template_type)
+        zone_system_index = zone_system_index or ZoneSystemIndex(expanded_zones)
         zone_splitters = []
         zone_mixers = []
-        # iterate over expanded zones and if the system reference field exists, and is for the referenced system,
-        # append them in the splitter and mixer lists
-        for _, ez in expanded_zones.items():
-            if getattr(ez, zone_system_template_field_name, None) == system_class_object.template_name:
-                # todo_eo: Only AirTerminal has been used for this test when all zone equipment objects should be
-                #  included.  Check zonehvac_or_air_terminal_equipment_object_type in the schema for a list of valid
-                #  objects to construct a better regex.
-                zone_equipment = self.get_epjson_objects(
-                    epjson=ez.epjson,
-                    object_type_regexp=r'^AirTerminal:.*')
-                try:
-                    (zone_equipment_type, zone_equipment_structure), = zone_equipment.items()
-                    (zone_equipment_name, zone_equipment_fields), = zone_equipment_structure.items()
-                    outlet_node_name = zone_equipment_fields['air_inlet_node_name']
-                except (KeyError, AttributeError, ValueError):
-                    raise InvalidTemplateException('Search for zone equipment from Supply Path creation failed for '
-                                                   'outlet node.  system {}, zone {}, zone equipment {}'
-                                                   .format(system_class_object.template_name, ez.unique_name,
-                                                           zone_equipment))
-                try:
-                    (zone_equipment_connection_name, zone_equipment_connection_fields), = \
-                        ez.epjson['ZoneHVAC:EquipmentConnections'].items()
-                    inlet_node_name = zone_equipment_connection_fields['zone_return_air_node_or_nodelist_name']
-                except (KeyError, AttributeError, ValueError):
-                    raise InvalidTemplateException('Search for ZoneHVAC:EquipmentConnections object from Supply '
-                                                   'Path creation failed for inlet node.  system {}, zone {}'
-                                                   .format(system_class_object.template_name, ez.unique_name))
-                zone_splitters.append(
-                    {
-                        "outlet_node_name": outlet_node_name
-                    }
-                )
-                zone_mixers.append(
-                    {
-                        "inlet_node_name": inlet_node_name
-                    }
-                )
+        # for each zone that references the system, append the nodes to the splitter and mixer lists
+        for ez in zone_system_index.get_zones(zone_system_template_field_name, system_class_object.template_name):
+            # todo_eo: Only AirTerminal has been used for this test when all zone equipment objects should be
+            #  included.  Check zonehvac_or_air_terminal_equipment_object_type in the schema for a list of valid
+            #  objects to construct a better regex.
+            zone_equipment = {
+                object_type: object_structure
+                for object_type, object_structure in ez.epjson.items()
+                if object_type.lower().startswith('airterminal:')}
+            try:
+                (zone_equipment_type, zone_equipment_structure), = zone_equipment.items()
+                (zone_equipment_name, zone_equipment_fields), = zone_equipment_structure.items()
+                outlet_node_name = zone_equipment_fields['air_inlet_node_name']
+            except (KeyError, AttributeError, ValueError):
+                raise InvalidTemplateException('Search for zone equipment from Supply Path creation failed for '
+                                               'outlet node.  system {}, zone {}, zone equipment {}'
+                                               .format(system_class_object.template_name, ez.unique_name,
+                                                       zone_equipment))
+            try:
+                (zone_equipment_connection_name, zone_equipment_connection_fields), = \
+                    ez.epjson['ZoneHVAC:EquipmentConnections'].items()
+                inlet_node_name = zone_equipment_connection_fields['zone_return_air_node_or_nodelist_name']
+            except (KeyError, AttributeError, ValueError):
+                raise InvalidTemplateException('Search for ZoneHVAC:EquipmentConnections object from Supply '
+                                               'Path creation failed for inlet node.  system {}, zone {}'
+                                               .format(system_class_object.template_name, ez.unique_name))
+            zone_splitters.append(
+                {
+                    "outlet_node_name": outlet_node_name
+                }
+            )
+            zone_mixers.append(
+                {
+                    "inlet_node_name": inlet_node_name
+                }
+            )
         # create plenums or spliters/mixers, depending on template inputs
-        # create ExpandObjects class object to use some yaml and epjson functions
-        eo = ExpandObjects()
+        # create ExpandObjects class object to use some yaml and epjson functions.  The expansion structure is loaded
+        # once and shared by each system.
+        if self._path_expansion_structure is None:
+            self._path_expansion_structure = ExpandObjects().expansion_structure
+        eo = ExpandObjects(expansion_structure=self._path_expansion_structure)
         eo.unique_name = getattr(system_class_object, 'template_name')
         supply_plenum_name = getattr(system_class_object, 'supply_plenum_name', None)
         if supply_plenum_name:
@@ -421,29 +659,19 @@ class HVACTemplate(EPJSON):
     @staticmethod
     def _get_plant_equipment_waterloop_branches_by_loop_type(
             plant_loop_class_object,
-            expanded_plant_equipment):
+            expanded_plant_equipment,
+            branch_index=None):
         """
         Extract plant equipment branches by loop type and store in epJSON formatted dictionary
 
         :param plant_loop_class_object: ExpandPlantLoop object
         :param expanded_plant_equipment: dictionary of ExpandPlantEquipment objects
-        :return: epJSON formatted dictionary of branch objects for loop connections
+        :param branch_index: (optional) WaterLoopBranchIndex of the expanded objects.  If not provided, it is created.
+        :return: epJSON formatted dictionary of branch objects for loop connections.  Branch objects are shared with
+            the expanded objects and must not be modified.
         """
-        branch_dictionary = {}
-        for pe in expanded_plant_equipment.values():
-            branch_objects = copy.deepcopy(pe.epjson.get('Branch', {}))
-            # Special handling for chillers with condenser water and chilled water branches
-            # todo_eo: find a better way to separate the branches instead of searching for chw or cnd in the branch
-            #  names.  It may be unreliable with future user inputs.
-            if pe.template_type == 'HVACTemplate:Plant:Chiller' and getattr(pe, 'condenser_type', None) == 'WaterCooled':
-                for branch_name, branch_structure in branch_objects.items():
-                    if 'chilledwater' in plant_loop_class_object.template_type.lower() and 'chw' in branch_name.lower():
-                        branch_dictionary.update({branch_name: branch_objects[branch_name]})
-                    if 'condenserwater' in plant_loop_class_object.template_type.lower() and 'cnd' in branch_name.lower():
-                        branch_dictionary.update({branch_name: branch_objects[branch_name]})
-            # typical handling when all plant equipment branches belong in one loop
-            elif pe.template_plant_loop_type in plant_loop_class_object.template_type:
-                branch_dictionary.update(branch_objects)
+        branch_index = branch_index or WaterLoopBranchIndex(expanded_plant_equipment=expanded_plant_equipment)
+        branch_dictionary = branch_index.get_plant_equipment_branches(plant_loop_class_object.template_type)
         if branch_dictionary:
             return {'Branch': branch_dictionary}
         else:
@@ -453,37 +681,22 @@ class HVACTemplate(EPJSON):
     def _get_zone_system_waterloop_branches_by_loop_type(
             plant_loop_class_object,
             expanded_zones,
-            expanded_systems):
+            expanded_systems,
+            branch_index=None):
         """
         Extract zone and system branch objects by loop type and store in epJSON formatted dictionary
 
         :param plant_loop_class_object: ExpandPlantLoop class object
         :param expanded_zones: ExpandZone objects
         :param expanded_systems: ExpandSystem objects
-        :return: epJSON formatted dictionary of branch objects
+        :param branch_index: (optional) WaterLoopBranchIndex of the expanded objects.  If not provided, it is created.
+        :return: epJSON formatted dictionary of branch objects.  Branch objects are shared with the expanded objects
+            and must not be modified.
         """
-        # create list of regex matches for the given loop
-        # todo_eo: object searching regex need to be expanded.
-        if 'chilledwater' in plant_loop_class_object.template_type.lower():
-            branch_rgx = ['^Coil:Cooling:Water($|:DetailedGeometry)+', ]
-        elif 'hotwater' in plant_loop_class_object.template_type.lower():
-            branch_rgx = ['^Coil:Heating:Water($|:DetailedGeometry)+', '^ZoneHVAC:Baseboard.*Water']
-        elif 'mixedwater' in plant_loop_class_object.template_type.lower():
-            branch_rgx = ['^Coil:.*HeatPump.*', ]
-        elif 'condenserwater' in plant_loop_class_object.template_type.lower():
-            return None
-        else:
-            InvalidTemplateException('an invalid loop type was specified when creating plant loop connections: {}'
-                                     .format(plant_loop_class_object.template_type))
-        branch_dictionary = {}
-        object_list = [expanded_zones or {}, expanded_systems or {}]
-        for class_object in object_list:
-            for co in class_object.values():
-                branch_objects = copy.deepcopy(co.epjson.get('Branch', {}))
-                for branch_name, branch_structure in branch_objects.items():
-                    for br in branch_rgx:
-                        if re.match(br, branch_structure['components'][0]['component_object_type']):
-                            branch_dictionary.update({branch_name: branch_objects[branch_name]})
+        branch_index = branch_index or WaterLoopBranchIndex(
+            expanded_zones=expanded_zones,
+            expanded_systems=expanded_systems)
+        branch_dictionary = branch_index.get_zone_system_branches(plant_loop_class_object.template_type)
         if branch_dictionary:
             return {'Branch': branch_dictionary}
         else:
@@ -494,7 +707,8 @@ class HVACTemplate(EPJSON):
             plant_loop_class_object,
             expanded_plant_equipment,
             expanded_systems,
-            expanded_zones):
+            expanded_zones,
+            branch_index=None):
         """
         Separate plant equipment, zone, and system branches into supply and demand sides for a given ExpandPlantLoop
         object.
@@ -503,32 +717,40 @@ class HVACTemplate(EPJSON):
         :param expanded_plant_equipment: expanded dictionary of ExpandPlantEquipment objects
         :param expanded_systems: expanded dictionary of ExpandSystem objects
         :param expanded_zones: expanded dictionary of ExpandZone objects
+        :param branch_index: (optional) WaterLoopBranchIndex of the expanded objects.  If not provided, it is created.
         :return: tuple of demand and supply side branches for processing
         """
+        branch_index = branch_index or WaterLoopBranchIndex(
+            expanded_zones=expanded_zones,
+            expanded_systems=expanded_systems,
+            expanded_plant_equipment=expanded_plant_equipment)
         # Get plant equipment, zone, and system branches
         plant_equipment_branch_dictionary = self._get_plant_equipment_waterloop_branches_by_loop_type(
             plant_loop_class_object=plant_loop_class_object,
-            expanded_plant_equipment=expanded_plant_equipment
-        )
-        zone_system_branch_dictionary = self._get_zone_system_waterloop_branches_by_loop_type(
-            plant_loop_class_object=plant_loop_class_object,
-            expanded_zones=expanded_zones,
-            expanded_systems=expanded_systems
+            expanded_plant_equipment=expanded_plant_equipment,
+            branch_index=branch_index
         )
         # get branches in the loop
         demand_branches = {}
         # Special handling for condenser water loop where the chiller objects are the demand side.
         if 'condenserwater' in plant_loop_class_object.template_type.lower():
-            pebd = copy.deepcopy(plant_equipment_branch_dictionary)
+            supply_branches = {}
             for object_name, object_structure in plant_equipment_branch_dictionary['Branch'].items():
                 try:
                     if re.match(r'Chiller:.*', object_structure['components'][0]['component_object_type']):
-                        demand_branches.update({object_name: pebd['Branch'].pop(object_name)})
+                        demand_branches[object_name] = object_structure
+                    else:
+                        supply_branches[object_name] = object_structure
                 except (AttributeError, KeyError):
                     raise InvalidTemplateException('Branch object is incorrectly formatted: {}'
                                                    .format(plant_equipment_branch_dictionary))
-            supply_branches = pebd['Branch']
         else:
+            zone_system_branch_dictionary = self._get_zone_system_waterloop_branches_by_loop_type(
+                plant_loop_class_object=plant_loop_class_object,
+                expanded_zones=expanded_zones,
+                expanded_systems=expanded_systems,
+                branch_index=branch_index
+            )
             demand_branches = zone_system_branch_dictionary.get('Branch') if zone_system_branch_dictionary else None
             supply_branches = plant_equipment_branch_dictionary.get('Branch') \
                 if plant_equipment_branch_dictionary else None
@@ -539,7 +761,8 @@ class HVACTemplate(EPJSON):
             plant_loop_class_object,
             expanded_plant_equipment,
             expanded_zones=None,
-            expanded_systems=None):
+            expanded_systems=None,
+            branch_index=None):
         """
         Create Branchlist, Connector, ConnectorList, and supply NodeLists objects that connect the PlantLoop to supply
         and demand water objects.  This operation is performed outside of ExpandObjects because it requires outputs
@@ -549,6 +772,7 @@ class HVACTemplate(EPJSON):
         :param expanded_plant_equipment: expanded dictionary of ExpandPlantEquipment objects
         :param expanded_systems: expanded dictionary of ExpandSystem objects
         :param expanded_zones: expanded dictionary of ExpandZone objects
+        :param branch_index: (optional) WaterLoopBranchIndex of the expanded objects
         :return: Updated class epjson attribute with Branchlist, Connector, and ConnectorList objects.
         """
         # Get plant equipment, zone, and system branches.  Split them into demand and supply sides
@@ -556,7 +780,8 @@ class HVACTemplate(EPJSON):
             plant_loop_class_object=plant_loop_class_object,
             expanded_plant_equipment=expanded_plant_equipment,
             expanded_systems=expanded_systems,
-            expanded_zones=expanded_zones
+            expanded_zones=expanded_zones,
+            branch_index=branch_index
         )
         # check to make sure loops aren't empty
         if not demand_branches or not supply_branches:
@@ -630,7 +855,8 @@ class HVACTemplate(EPJSON):
     def _create_plant_equipment_lists(
             self,
             plant_loop_class_object,
-            expanded_plant_equipment):
+            expanded_plant_equipment,
+            branch_index=None):
         """
         Create PlantEquipmentList and CondenserEquipmentList for a given ExpandPlantLoop class object.
         This operation is performed outside of ExpandObjects because it requires outputs from
@@ -638,6 +864,7 @@ class HVACTemplate(EPJSON):
 
         :param plant_loop_class_object: ExpandPlantLoop class object
         :param expanded_plant_equipment: expanded dictionary of ExpandPlantEquipment objects
+        :param branch_index: (optional) WaterLoopBranchIndex of the expanded objects
         :return: Updated class epjson attribute with PlantEquipmentList or CondenserEquipmentlist.
         """
         # Get plant equipment, zone, and system branches.  Split them into demand and supply sides
@@ -645,7 +872,8 @@ class HVACTemplate(EPJSON):
             plant_loop_class_object=plant_loop_class_object,
             expanded_plant_equipment=expanded_plant_equipment,
             expanded_systems=None,
-            expanded_zones=None
+            expanded_zones=None,
+            branch_index=branch_index
         )
         equipment = []
         # Extract priority from each equipment object referenced by the branch and use it to order the equipment list
@@ -693,57 +921,116 @@ class HVACTemplate(EPJSON):
             object_dictionary=resolved_path_dictionary)
         return
 
-    def run(self, input_epjson=None):
+    def _expand_thermostats(self):
         """
-        Execute HVAC Template process workflow
+        Expand thermostat templates
 
-        :param input_epjson: input epJSON file
-        :return: epJSON containing expanded objects from templates
+        :return: expanded_thermostats class attribute
         """
-        # output_epJSON
-        # flush the stream handler
-        # self.logger.stream_flush
-        if not input_epjson:
-            if self.input_epjson:
-                input_epjson = self.input_epjson
-            else:
-                raise InvalidEpJSONException("No epJSON file loaded or provided to HVACTemplate processor")
-        self.epjson_process(epjson_ref=input_epjson)
-        self._hvac_template_preprocess(epjson=self.input_epjson)
         self.logger.info('##### Processing Thermostats #####')
         self.expanded_thermostats = self._expand_templates(
             templates=self.templates_thermostats,
             expand_class=ExpandThermostat)
+        return
+
+    def _expand_zones(self):
+        """
+        Expand zone templates and index them by the systems they reference
+
+        :return: expanded_zones and zone_system_index class attributes
+        """
         self.logger.info('##### Processing Zones #####')
         self.expanded_zones = self._expand_templates(
             templates=self.templates_zones,
             expand_class=ExpandZone)
+        self.zone_system_index = ZoneSystemIndex(self.expanded_zones)
+        return
+
+    def _expand_systems(self):
+        """
+        Expand system templates
+
+        :return: expanded_systems class attribute
+        """
         self.logger.info('##### Processing Systems #####')
         self.expanded_systems = self._expand_templates(
             templates=self.templates_systems,
             expand_class=ExpandSystem)
+        return
+
+    def _create_zone_thermostat_connections(self):
+        """
+        Create ZoneControl:Thermostat objects for all expanded zones
+
+        :return: Objects added to the class epjson attribute
+        """
         self.logger.info('##### Building Zone-Thermostat Connections #####')
         for _, zone_class_object in self.expanded_zones.items():
             self._create_zonecontrol_thermostat(zone_class_object=zone_class_object)
+        return
+
+    def _create_system_zone_connections(self):
+        """
+        Create supply and return path objects for all expanded systems
+
+        :return: Objects added to the class epjson attribute
+        """
         self.logger.info('##### Building System-Zone Connections #####')
         for _, system_class_object in self.expanded_systems.items():
             self._create_system_path_connection_objects(
                 system_class_object=system_class_object,
-                expanded_zones=self.expanded_zones)
+                expanded_zones=self.expanded_zones,
+                zone_system_index=self.zone_system_index)
+        return
+
+    def _expand_plant_loops(self):
+        """
+        Expand plant loop templates
+
+        :return: expanded_plant_loops class attribute
+        """
         self.logger.info('##### Processing Plant Loops #####')
         self.expanded_plant_loops = self._expand_templates(
             templates=self.templates_plant_loops,
             expand_class=ExpandPlantLoop)
+        return
+
+    def _expand_plant_equipment(self):
+        """
+        Expand plant equipment templates
+
+        :return: expanded_plant_equipment class attribute
+        """
         self.logger.info('##### Processing Plant Equipment #####')
         self.expanded_plant_equipment = self._expand_templates(
             templates=self.templates_plant_equipment,
             expand_class=ExpandPlantEquipment,
             plant_loop_class_objects=self.expanded_plant_loops)
+        return
+
+    def _create_additional_plant_loops_and_equipment(self):
+        """
+        Create additional plant loops and equipment from the expanded plant equipment
+
+        :return: Additional objects added to the expanded_plant_loops and expanded_plant_equipment class attributes
+        """
         # Pass through expanded plant equipment objects to create additional plant loops and equipment if necessary
         self._create_additional_plant_loops_and_equipment_from_equipment(
             expanded_plant_equipment=self.expanded_plant_equipment,
             expanded_plant_loops=self.expanded_plant_loops
         )
+        return
+
+    def _create_plant_connections(self):
+        """
+        Create water loop connectors, node lists, and equipment lists for all expanded plant loops
+
+        :return: Objects added to the class epjson attribute
+        """
+        self.water_loop_branch_index = WaterLoopBranchIndex(
+            expanded_zones=self.expanded_zones,
+            expanded_systems=self.expanded_systems,
+            expanded_plant_equipment=self.expanded_plant_equipment)
         self.logger.info('##### Building Plant-Plant Equipment Connections #####')
         # todo_eo: uncomment and test
         for expanded_pl in self.expanded_plant_loops.values():
@@ -751,13 +1038,69 @@ class HVACTemplate(EPJSON):
                 plant_loop_class_object=expanded_pl,
                 expanded_plant_equipment=self.expanded_plant_equipment,
                 expanded_systems=self.expanded_systems,
-                expanded_zones=self.expanded_zones)
+                expanded_zones=self.expanded_zones,
+                branch_index=self.water_loop_branch_index)
             self._create_plant_equipment_lists(
                 plant_loop_class_object=expanded_pl,
-                expanded_plant_equipment=self.expanded_plant_equipment)
+                expanded_plant_equipment=self.expanded_plant_equipment,
+                branch_index=self.water_loop_branch_index)
+        return
+
+    def _get_task_graph(self):
+        """
+        Create the graph of expansion and connection tasks.  Tasks are declared in the order of a serial run, and
+        the inputs and outputs are the class attributes each task reads and writes.
+
+        :return: TaskGraph
+        """
+        return TaskGraph([
+            Task('expand_thermostats', self._expand_thermostats,
+                 inputs=('templates_thermostats', ), outputs=('expanded_thermostats', )),
+            Task('expand_zones', self._expand_zones,
+                 inputs=('templates_zones', ), outputs=('expanded_zones', 'zone_system_index')),
+            Task('expand_systems', self._expand_systems,
+                 inputs=('templates_systems', ), outputs=('expanded_systems', )),
+            Task('create_zone_thermostat_connections', self._create_zone_thermostat_connections,
+                 inputs=('expanded_zones', 'expanded_thermostats'), outputs=('epjson', )),
+            Task('create_system_zone_connections', self._create_system_zone_connections,
+                 inputs=('expanded_systems', 'expanded_zones', 'zone_system_index'), outputs=('epjson', )),
+            Task('expand_plant_loops', self._expand_plant_loops,
+                 inputs=('templates_plant_loops', ), outputs=('expanded_plant_loops', )),
+            Task('expand_plant_equipment', self._expand_plant_equipment,
+                 inputs=('templates_plant_equipment', 'expanded_plant_loops'), outputs=('expanded_plant_equipment', )),
+            Task('create_additional_plant_loops_and_equipment', self._create_additional_plant_loops_and_equipment,
+                 inputs=('expanded_plant_equipment', 'expanded_plant_loops'),
+                 outputs=('expanded_plant_equipment', 'expanded_plant_loops', 'templates', 'templates_plant_loops',
+                          'templates_plant_equipment')),
+            Task('create_plant_connections', self._create_plant_connections,
+                 inputs=('expanded_plant_loops', 'expanded_plant_equipment', 'expanded_systems', 'expanded_zones'),
+                 outputs=('epjson', 'water_loop_branch_index'))])
+
+    @log_custom_exceptions
+    def run(self, input_epjson=None):
+        """
+        Execute HVAC Template process workflow
+
+        :param input_epjson: input epJSON file
+        :return: epJSON containing expanded objects from templates
+        """
+        # output_epJSON
+        # flush the stream handler
+        # self.logger.stream_flush
+        if not input_epjson:
+            if self.input_epjson:
+                input_epjson = self.input_epjson
+            else:
+                raise InvalidEpJSONException("No epJSON file loaded or provided to HVACTemplate processor")
+        self.epjson_process(epjson_ref=input_epjson)
+        # use the schema field types to store template values
+        if self.schema:
+            template_record_types.add_schema(self.schema.schema)
+        self._hvac_template_preprocess(epjson=self.input_epjson)
+        self.task_timings = self._get_task_graph().run(max_workers=self.run_task_workers)
         self.logger.info('##### Creating epJSON #####')
-        # Merge each set of epJSON dictionaries
-        merge_list = [
+        # Present the merge of each set of epJSON dictionaries as a view, which does not copy them
+        output_epjson = EPJSONView([
             self.epjson,
             self.base_objects,
             *[j.epjson for i, j in self.expanded_thermostats.items()],
@@ -765,13 +1108,7 @@ class HVACTemplate(EPJSON):
             *[j.epjson for i, j in self.expanded_systems.items()],
             *[j.epjson for i, j in self.expanded_plant_loops.items()],
             *[j.epjson for i, j in self.expanded_plant_equipment.items()]
-        ]
-        output_epjson = {}
-        for merge_dictionary in merge_list:
-            self.merge_epjson(
-                super_dictionary=output_epjson,
-                object_dictionary=merge_dictionary
-            )
+        ])
         # Create output format
         output_epjson = {
             "epJSON": output_epjson,
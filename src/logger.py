@@ -1,29 +1,35 @@
 import logging
 import os
+import threading
 from pathlib import Path
-from logging.config import fileConfig
 from io import StringIO
 
 loggers = {}
 stream = StringIO()
+# single handler that writes log output to the current capture stream
+stream_handler = logging.StreamHandler(stream)
+# configuration (logging file, log file) that has been applied to the logging module
+logging_configuration = None
+logging_lock = threading.RLock()
 
 this_script_path = Path(__file__).resolve()
 
 
-class Logger:
-    """
-    General logger setup
+def configure_logging(logging_file_name='logging.conf', log_file_name='base'):
     """
+    Apply the logging configuration file.  The configuration is applied when the first Logger is created, and only
+    once per process; calling the function again with the same arguments does nothing.
 
-    def __init__(
-            self,
-            logging_file_name='logging.conf',
-            logger_name='expand_objects_logger',
-            log_file_name='base'):
-        # prevent re-calling same logger handlers once initialized
-        # also prevent bad logger name from being called
-        global loggers
-        # noinspection PyBroadException
+    :param logging_file_name: logging configuration file in the logs directory
+    :param log_file_name: name of the log file, without extension
+    :return: None
+    """
+    global logging_configuration
+    if logging_configuration == (logging_file_name, log_file_name):
+        return
+    with logging_lock:
+        if logging_configuration == (logging_file_name, log_file_name):
+            return
         # Use a different file for testing logger
         logging_dir = str(this_script_path.parent.parent / 'logs')
         log_file_location = os.path.join(
@@ -38,6 +44,7 @@ class Logger:
             if not os.path.isfile(log_file):  # pragma: no cover
                 with open(log_file, 'w'):
                     pass
+        from logging.config import fileConfig
         fileConfig(
             os.path.join(
                 logging_dir,
@@ -48,6 +55,47 @@ class Logger:
                 "testing_log_filename": testing_log_file_location
             }
         )
+        logging_configuration = (logging_file_name, log_file_name)
+    return
+
+
+def start_log_capture():
+    """
+    Direct logging output to a new stream.  This is called at the start of each run so that captured messages
+    only include output from that run.
+
+    :return: new capture stream
+    """
+    global stream
+    with logging_lock:
+        stream = StringIO()
+        stream_handler.setStream(stream)
+    return stream
+
+
+def get_log_capture():
+    """
+    Get the stream that holds logging output for the current run
+
+    :return: capture stream
+    """
+    return stream
+
+
+class Logger:
+    """
+    General logger setup
+    """
+
+    def __init__(
+            self,
+            logging_file_name='logging.conf',
+            logger_name='expand_objects_logger',
+            log_file_name='base'):
+        # prevent re-calling same logger handlers once initialized
+        # also prevent bad logger name from being called
+        configure_logging(logging_file_name=logging_file_name, log_file_name=log_file_name)
+        # noinspection PyBroadException
         # if the code fails, fall back to root logger
         try:
             # if the logger exists, use it instead of creating a new one
@@ -73,9 +121,16 @@ class Logger:
                 logger_name, str(e)
             )
         finally:
-            # add stream handler for output
-            self.stream = stream
-            handler = logging.StreamHandler(self.stream)
-            self.logger.addHandler(handler)
-            self.logger.stream_flush = self.stream.flush()
+            # add stream handler for output.  The handler is shared, so it is only attached once per logger.
+            if stream_handler not in self.logger.handlers:
+                with logging_lock:
+                    if stream_handler not in self.logger.handlers:
+                        self.logger.addHandler(stream_handler)
         return
+
+    @property
+    def stream(self):
+        """
+        Stream that holds logging output for the current run
+        """
+        return stream
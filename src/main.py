@@ -1,12 +1,10 @@
 import argparse
 import os
 import pathlib
-
-from hvac_template import HVACTemplate
 import logging
-import json
 
-from custom_exceptions import InvalidInputException
+from logger import start_log_capture
+from custom_exceptions import InvalidInputException, log_custom_exceptions
 
 
 def build_parser():  # pragma: no cover
@@ -21,6 +19,70 @@ def build_parser():  # pragma: no cover
         '-ns',
         action='store_true',
         help='Skip schema validations')
+    parser.add_argument(
+        '--schema-marker',
+        '-sm',
+        action='store_true',
+        help='Write a marker file next to the schema after it is verified and skip schema verification on '
+             'later runs')
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Keep the expansion structure and schema loaded and process JSON-lines requests from stdin, '
+             'or a Unix socket if --socket is provided.  Each request is a JSON object with a "file" path or '
+             '"epJSON" object')
+    parser.add_argument(
+        '--socket',
+        nargs='?',
+        help='Path of Unix socket to listen on in --serve mode'
+    )
+    parser.add_argument(
+        '--batch',
+        nargs='?',
+        help='Glob pattern of epJSON files, or a manifest file listing one epJSON file per line, to expand with '
+             'a pool of worker processes'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Number of worker processes in --batch mode, or executor workers with --expansion-executor.  Default '
+             'is the number of CPUs'
+    )
+    parser.add_argument(
+        '--expansion-executor',
+        choices=['thread', 'process'],
+        help='Expand the templates of each category (zones, systems, etc.) concurrently with a pool of threads or '
+             'processes'
+    )
+    parser.add_argument(
+        '--batch-status',
+        nargs='?',
+        help='Path of the JSON-lines status manifest written in --batch mode.  Default is '
+             'expandobjects_batch_status.jsonl in the output directory, or the current directory'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='In --batch mode, skip files that were expanded successfully according to the status manifest'
+    )
+    parser.add_argument(
+        '--run-task-workers',
+        type=int,
+        help='Number of expansion phases (zones, systems, plant loops, connections, etc.) that may run at the same '
+             'time.  Phases run in a fixed order by default'
+    )
+    parser.add_argument(
+        '--compact-output',
+        action='store_true',
+        help='Write output files without indentation or whitespace.  orjson is used to encode the output if it is '
+             'installed'
+    )
+    parser.add_argument(
+        '--output-key-order',
+        choices=['sorted', 'top', 'insertion'],
+        help='Order of keys in output files: sorted (default) sorts all keys, top sorts object types only, and '
+             'insertion keeps the order objects were created'
+    )
     parser.add_argument(
         "--file",
         '-f',
@@ -36,9 +98,68 @@ def build_parser():  # pragma: no cover
     return parser
 
 
+def expand_epjson(hvt, input_epjson, no_schema=False, output=None):
+    """
+    Expand the HVACTemplate objects of an epJSON and verify the expanded epJSON.
+
+    :param hvt: HVACTemplate object
+    :param input_epjson: epJSON file location or object
+    :param no_schema: skip validation of the expanded epJSON
+    :param output: (optional) output dictionary to update
+    :return: output dictionary
+    """
+    output = output if output is not None else {'outputPreProcessorMessage': ''}
+    hvt_output = hvt.run(input_epjson=input_epjson)
+    # merge hvac template output to output dictionary
+    for output_key, output_val in hvt_output.items():
+        if output_key == 'outputPreProcessorMessage':
+            output['outputPreProcessorMessage'] = r' '.join([
+                output['outputPreProcessorMessage'],
+                hvt_output['outputPreProcessorMessage']])
+        else:
+            output[output_key] = output_val
+    # verify expanded epJSON is valid if schema validation is turned on.  Base objects were validated
+    # with the input file, so only the expanded objects are checked.
+    if output.get('epJSON') and not no_schema:
+        hvt.validate_epjson_incremental(
+            epjson=output['epJSON'],
+            validated_epjson=hvt.base_objects if hvt.input_epjson_is_valid else {})
+    return output
+
+
+@log_custom_exceptions
 def main(args=None):
+    if args is None:
+        args = build_parser().parse_args()
+    if getattr(args, 'serve', False):
+        from expansion_server import ExpansionServer
+        ExpansionServer(
+            no_schema=args.no_schema,
+            schema_marker=getattr(args, 'schema_marker', False),
+            run_task_workers=getattr(args, 'run_task_workers', None)).serve(socket_path=getattr(args, 'socket', None))
+        return {'outputPreProcessorMessage': ''}
+    if getattr(args, 'batch', None):
+        from batch_expansion import BatchExpansion
+        batch_status = BatchExpansion(
+            no_schema=args.no_schema,
+            schema_marker=getattr(args, 'schema_marker', False),
+            workers=getattr(args, 'workers', None),
+            output_directory=getattr(args, 'output_directory', None),
+            status_location=getattr(args, 'batch_status', None),
+            resume=getattr(args, 'resume', False),
+            run_task_workers=getattr(args, 'run_task_workers', None)).run(batch_reference=args.batch)
+        return {'outputPreProcessorMessage': '', 'batch_status': batch_status}
+    # HVACTemplate loads the expansion classes and dependencies, so it is imported after the arguments are parsed
+    # to keep help output and argument errors fast.
+    from hvac_template import HVACTemplate
+    # capture log messages for this run only
+    start_log_capture()
     hvt = HVACTemplate(
-        no_schema=args.no_schema)
+        no_schema=args.no_schema,
+        schema_marker=getattr(args, 'schema_marker', False),
+        expansion_executor=getattr(args, 'expansion_executor', None),
+        expansion_workers=getattr(args, 'workers', None),
+        run_task_workers=getattr(args, 'run_task_workers', None) or 1)
     output = {'outputPreProcessorMessage': ''}
     if isinstance(args.file, str):
         file_suffix_check = args.file.endswith('.epJSON')
@@ -51,15 +172,7 @@ def main(args=None):
             hvt.logger.info('Processing %s', args.file)
             # todo_eo: use try/except to catch any exception from self.run and output self.stream.getvalue() to
             #  outputPreProcessorMessage for error log and just return output dictionary.
-            hvt_output = hvt.run(input_epjson=args.file)
-            # merge hvac template output to output dictionary
-            for output_key, output_val in hvt_output.items():
-                if output_key == 'outputPreProcessorMessage':
-                    output['outputPreProcessorMessage'] = r' '.join([
-                        output['outputPreProcessorMessage'],
-                        hvt_output['outputPreProcessorMessage']])
-                else:
-                    output[output_key] = output_val
+            output = expand_epjson(hvt=hvt, input_epjson=args.file, no_schema=args.no_schema, output=output)
             # get output directory
             if hasattr(args, 'output_directory') and args.output_directory:
                 output_directory = args.output_directory
@@ -75,21 +188,22 @@ def main(args=None):
                 raise InvalidInputException('file could not be renamed')  # pragma: no cover - unlikely to be hit
             # write output and keep list of written files
             output_file_dictionary = {}
+            from epjson_writer import EPJSONWriter
+            epjson_writer = EPJSONWriter(
+                compact=getattr(args, 'compact_output', False),
+                key_order=getattr(args, 'output_key_order', None) or 'sorted')
             if output.get('epJSON'):
-                # verify expanded epJSON is valid if schema validation is turned on.
-                if not args.no_schema:
-                    hvt.validate_epjson(epjson=output['epJSON'])
                 with open(os.path.join(output_directory, expanded_file_name), 'w') as expanded_file:
-                    json.dump(output['epJSON'], expanded_file, indent=4, sort_keys=True)
+                    epjson_writer.write(output['epJSON'], expanded_file)
                     output_file_dictionary['expanded'] = os.path.join(output_directory, str(expanded_file_name))
             if output.get('epJSON_hvac_templates'):
                 with open(os.path.join(output_directory, hvac_templates_file_name), 'w') as hvac_template_file:
-                    json.dump(output['epJSON_hvac_templates'], hvac_template_file, indent=4, sort_keys=True)
+                    epjson_writer.write(output['epJSON_hvac_templates'], hvac_template_file)
                     output_file_dictionary['hvac_templates'] = \
                         os.path.join(output_directory, str(hvac_templates_file_name))
             if output.get('epJSON_base'):
                 with open(os.path.join(output_directory, base_file_name), 'w') as base_file:
-                    json.dump(output['epJSON_base'], base_file, indent=4, sort_keys=True)
+                    epjson_writer.write(output['epJSON_base'], base_file)
                     output_file_dictionary['base'] = os.path.join(output_directory, str(base_file_name))
             hvt.logger.info('Output files written: {}'.format(output_file_dictionary))
             output['output_files'] = output_file_dictionary
@@ -0,0 +1,139 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from custom_exceptions import PyExpandObjectsException
+
+
+class Task:
+    """
+    Step of a TaskGraph with the names of the results it reads and writes.
+
+    Attributes:
+        name: unique task name
+        function: callable that is run with no arguments
+        inputs: names of results read by the task
+        outputs: names of results written by the task
+    """
+
+    __slots__ = ('name', 'function', 'inputs', 'outputs')
+
+    def __init__(self, name, function, inputs=(), outputs=()):
+        """
+        :param name: unique task name
+        :param function: callable that is run with no arguments
+        :param inputs: names of results read by the task
+        :param outputs: names of results written by the task
+        """
+        self.name = name
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        return
+
+    def __repr__(self):
+        return 'Task({}, inputs={}, outputs={})'.format(self.name, self.inputs, self.outputs)
+
+
+class TaskGraph:
+    """
+    Run tasks in dependency order.  Tasks are declared in the order a serial run would use, and each task depends
+    on the earlier tasks that write a result it reads or writes, and on the earlier tasks that read a result it
+    writes.  Results written by several tasks, such as a shared output dictionary, are therefore written in
+    declaration order, and tasks that do not share results can run concurrently.
+
+    Attributes:
+        tasks: list of Task objects in declaration order
+        dependencies: dictionary of task name to the set of task names it waits for
+        task_timings: dictionary of task name to elapsed seconds from the last run
+    """
+
+    def __init__(self, tasks=()):
+        """
+        :param tasks: Task objects in declaration order
+        """
+        self.tasks = []
+        self.dependencies = {}
+        self.task_timings = {}
+        self._last_writer = {}
+        self._readers = {}
+        for task in tasks:
+            self.add_task(task)
+        return
+
+    def add_task(self, task):
+        """
+        Add a task after the tasks already declared.  Inputs that no earlier task writes are treated as available.
+
+        :param task: Task object
+        :return: None
+        """
+        if task.name in self.dependencies:
+            raise PyExpandObjectsException('Duplicate task name in task graph: {}'.format(task.name))
+        dependencies = set()
+        for name in task.inputs:
+            if name in self._last_writer:
+                dependencies.add(self._last_writer[name])
+        for name in task.outputs:
+            if name in self._last_writer:
+                dependencies.add(self._last_writer[name])
+            dependencies.update(self._readers.get(name, ()))
+        dependencies.discard(task.name)
+        for name in task.inputs:
+            self._readers.setdefault(name, set()).add(task.name)
+        for name in task.outputs:
+            self._last_writer[name] = task.name
+            self._readers[name] = set()
+        self.tasks.append(task)
+        self.dependencies[task.name] = dependencies
+        return
+
+    def _run_task(self, task):
+        """
+        Run a task and record its elapsed time
+
+        :param task: Task object
+        :return: None
+        """
+        start_time = time.perf_counter()
+        task.function()
+        self.task_timings[task.name] = time.perf_counter() - start_time
+        return
+
+    def run(self, max_workers=1):
+        """
+        Run all tasks.  With one worker, tasks are run in declaration order.  Otherwise, each task is submitted to a
+        thread pool as soon as the tasks it depends on have finished.  If a task fails, tasks that are already
+        running are finished, no further tasks are started, and the exception is raised.
+
+        :param max_workers: maximum number of tasks run at the same time
+        :return: dictionary of task name to elapsed seconds
+        """
+        self.task_timings = {}
+        if max_workers <= 1:
+            for task in self.tasks:
+                self._run_task(task)
+            return self.task_timings
+        declaration_order = {task.name: idx for idx, task in enumerate(self.tasks)}
+        remaining = {name: set(dependencies) for name, dependencies in self.dependencies.items()}
+        dependents = {task.name: [] for task in self.tasks}
+        for task in self.tasks:
+            for dependency in remaining[task.name]:
+                dependents[dependency].append(task)
+        ready = [task for task in self.tasks if not remaining[task.name]]
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while ready or running:
+                for task in ready:
+                    running[executor.submit(self._run_task, task)] = task
+                ready = []
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                # check finished tasks in declaration order so the same failure is raised when several fail
+                for future in sorted(done, key=lambda f: declaration_order[running[f].name]):
+                    task = running.pop(future)
+                    future.result()
+                    for dependent in dependents[task.name]:
+                        remaining[dependent.name].discard(task.name)
+                        if not remaining[dependent.name]:
+                            ready.append(dependent)
+                ready.sort(key=lambda t: declaration_order[t.name])
+        return self.task_timings
@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+
+from tests import BaseTest
+from src.expand_objects import ExpandObjects, object_type_pattern_index
+
+
+def make_reference_epjson(object_count):
+    """
+    Create an epJSON dictionary where every object has fields that reference a small set of object types
+
+    :param object_count: number of objects, each with a unique object type
+    :return: epJSON dictionary
+    """
+    epjson = {}
+    for idx in range(object_count):
+        epjson['Test:Object:{}'.format(idx)] = {
+            'Test Object {}'.format(idx): {
+                'inlet_node_name': 'Node {}'.format(idx),
+                'first_object_name': {'Test:Object:0$': 'key'},
+                'first_object_type': {'Test:Object:0$': 'self'},
+                'first_object_inlet': {'Test:Object:0$': 'inlet_node_name'},
+            }
+        }
+    return epjson
+
+
+class TestComplexInputResolution(BaseTest, unittest.TestCase):
+    """
+    Complex inputs previously matched the reference object type against every object type in the epJSON for every
+    field.  Verify each reference is matched against each object type once, so resolution grows linearly with the
+    number of objects.
+    """
+    def setUp(self):
+        self.eo = ExpandObjects()
+        self.eo.unique_name = 'benchmark'
+        return
+
+    def test_resolved_values(self):
+        epjson = self.eo.resolve_objects(epjson=make_reference_epjson(3))
+        self.assertEqual(
+            {
+                'inlet_node_name': 'Node 2',
+                'first_object_name': 'Test Object 0',
+                'first_object_type': 'Test:Object:0',
+                'first_object_inlet': 'Node 0'},
+            epjson['Test:Object:2']['Test Object 2'])
+        return
+
+    def test_reference_matched_once_per_object_type(self):
+        for object_count in (200, 800):
+            with patch.object(
+                    object_type_pattern_index, 'match', wraps=object_type_pattern_index.match) as match_mock:
+                self.eo.resolve_objects(epjson=make_reference_epjson(object_count))
+            # one reference is used by three fields of every object.  Matching it for every field would be
+            # 3 * object_count ** 2 calls.
+            self.assertEqual(object_count, match_mock.call_count)
+        return
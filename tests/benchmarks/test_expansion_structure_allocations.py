@@ -0,0 +1,67 @@
+import copy
+import tracemalloc
+import unittest
+
+from tests import BaseTest
+from src.expand_objects import ExpandObjects, thaw_structure
+
+structure_hierarchies = [
+    ['CommonObjects', 'Schedule', 'Compact', 'ALWAYS_VAL'],
+    ['AutoCreated', 'System', 'Branch', 'Base'],
+    ['OptionTree', 'HVACTemplate', 'Zone', 'VAV'],
+]
+
+
+def measure_peak_allocation(func, repeat=10):
+    """
+    Measure the peak memory allocated while calling a function
+
+    :param func: function to call
+    :param repeat: number of calls
+    :return: peak allocated size in bytes
+    """
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+class TestExpansionStructureAllocations(BaseTest, unittest.TestCase):
+    """
+    Compare memory allocations of structure lookups against copying the full structure on every call, which was
+    the previous get_structure behavior.
+    """
+    def setUp(self):
+        self.eo = ExpandObjects()
+        self.full_structure = thaw_structure(self.eo.expansion_structure)
+        return
+
+    def _full_copy_lookup(self):
+        for structure_hierarchy in structure_hierarchies:
+            structure = copy.deepcopy(self.full_structure)
+            for key in structure_hierarchy:
+                structure = structure[key]
+        return
+
+    def _structure_lookup(self):
+        for structure_hierarchy in structure_hierarchies:
+            self.eo.get_structure(structure_hierarchy=list(structure_hierarchy))
+        return
+
+    def test_get_structure_allocations(self):
+        full_copy_peak = measure_peak_allocation(self._full_copy_lookup)
+        lookup_peak = measure_peak_allocation(self._structure_lookup)
+        self.assertLess(lookup_peak * 5, full_copy_peak)
+        return
+
+    def test_get_structure_does_not_share_output(self):
+        structure_hierarchy = ['AutoCreated', 'System', 'Branch', 'Base']
+        structure_1 = self.eo.get_structure(structure_hierarchy=structure_hierarchy)
+        structure_1['name'] = 'modified'
+        structure_2 = self.eo.get_structure(structure_hierarchy=structure_hierarchy)
+        self.assertNotEqual('modified', structure_2['name'])
+        return
@@ -0,0 +1,79 @@
+import unittest
+
+from tests import BaseTest
+from src.expand_objects import ExpandObjects
+# use the modules imported by the source modules so the same capture stream is referenced
+from logger import start_log_capture
+from custom_exceptions import PyExpandObjectsYamlStructureException, log_custom_exceptions
+
+
+class TestLoggingOverhead(BaseTest, unittest.TestCase):
+    """
+    Logging was previously configured, and a stream handler added, for every object that inherited Logger.  Verify
+    that the number of handlers, and so the cost of writing a message, does not grow with the number of expanded
+    objects.
+    """
+    def setUp(self):
+        self.eo = ExpandObjects()
+        return
+
+    def tearDown(self):
+        start_log_capture()
+        return
+
+    def test_handler_count_is_constant(self):
+        handler_count = len(self.eo.logger.handlers)
+        for _ in range(100):
+            ExpandObjects()
+        self.assertEqual(handler_count, len(self.eo.logger.handlers))
+        return
+
+    def test_message_written_once(self):
+        capture = start_log_capture()
+        for _ in range(100):
+            ExpandObjects()
+        self.eo.logger.info('single message')
+        self.assertEqual(1, capture.getvalue().count('single message'))
+        return
+
+    def test_log_capture_per_run(self):
+        start_log_capture()
+        self.eo.logger.info('first run message')
+        start_log_capture()
+        self.eo.logger.info('second run message')
+        self.assertNotIn('first run message', self.eo.stream.getvalue())
+        self.assertIn('second run message', self.eo.stream.getvalue())
+        return
+
+    def test_exception_creation_does_not_log(self):
+        capture = start_log_capture()
+        handler_count = len(self.eo.logger.handlers)
+        for _ in range(1000):
+            try:
+                raise PyExpandObjectsYamlStructureException('error path message')
+            except PyExpandObjectsYamlStructureException:
+                pass
+        self.assertEqual('', capture.getvalue())
+        self.assertEqual(handler_count, len(self.eo.logger.handlers))
+        return
+
+    def test_exception_logged_once_by_top_level_hook(self):
+        @log_custom_exceptions
+        def inner_function():
+            try:
+                raise PyExpandObjectsYamlStructureException('inner error message')
+            except PyExpandObjectsYamlStructureException:
+                raise PyExpandObjectsYamlStructureException('outer error message')
+
+        @log_custom_exceptions
+        def outer_function():
+            inner_function()
+
+        capture = start_log_capture()
+        with self.assertRaisesRegex(PyExpandObjectsYamlStructureException, 'outer error message'):
+            outer_function()
+        log_output = capture.getvalue()
+        self.assertEqual(1, log_output.count('inner error message'))
+        self.assertEqual(1, log_output.count('outer error message'))
+        self.assertLess(log_output.index('inner error message'), log_output.index('outer error message'))
+        return
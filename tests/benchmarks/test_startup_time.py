@@ -0,0 +1,82 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests import BaseTest
+
+source_dir = Path(__file__).parent.parent.parent / 'src'
+
+# Cumulative import time budget for a command line call that only parses arguments, in microseconds.  Wall clock
+# budgets depend on the machine, so the budget is only checked when the EXPANDOBJECTS_BENCHMARKS environment
+# variable is set.
+import_time_budget = 150000
+
+
+def get_cli_command():
+    """
+    Get the command for the expandobjects console script.  If the package is not installed, the main module is
+    called directly.
+
+    :return: list of command arguments to run with the python interpreter
+    """
+    console_script = shutil.which('expandobjects')
+    if console_script:
+        return [console_script, ]
+    return [str(source_dir / 'main.py'), ]
+
+
+def run_importtime(cli_args):
+    """
+    Run the command line tool with import timing enabled
+
+    :param cli_args: command line arguments
+    :return: dictionary of imported module names and cumulative import times in microseconds, and the total
+        import time of top level imports
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *get_cli_command(), *cli_args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        cwd=str(source_dir))
+    module_times = {}
+    total_time = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_time, module_name = line.split('|')
+        module_times[module_name.strip()] = int(cumulative_time)
+        # top level imports are not indented
+        if not module_name.startswith('  '):
+            total_time += int(cumulative_time)
+    return module_times, total_time
+
+
+class TestStartupTime(BaseTest, unittest.TestCase):
+    """
+    Verify the command line tool only imports expansion modules and optional dependencies when they are needed.
+    """
+    def test_help_startup_imports(self):
+        module_times, _ = run_importtime(['--help', ])
+        for module_name in ['hvac_template', 'expand_objects', 'jsonschema', 'yaml', 'logging.config']:
+            self.assertNotIn(module_name, module_times.keys())
+        return
+
+    @unittest.skipUnless(os.environ.get('EXPANDOBJECTS_BENCHMARKS'), 'Benchmarks are not enabled')
+    def test_help_startup_time(self):
+        _, total_time = run_importtime(['--help', ])
+        self.assertLess(total_time, import_time_budget)
+        return
+
+    def test_no_schema_startup_imports(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            module_times, _ = run_importtime(
+                ['--no-schema', '--file', os.path.join(temp_dir, 'does_not_exist.epJSON')])
+        self.assertIn('hvac_template', module_times.keys())
+        for module_name in ['jsonschema', 'yaml']:
+            self.assertNotIn(module_name, module_times.keys())
+        return
@@ -8,7 +8,7 @@ import sys
 import os
 from argparse import Namespace
 
-from src.epjson_handler import EPJSON
+from src.epjson_handler import EPJSON, json_default
 from src.main import main
 from tests import BaseTest
 
@@ -57,7 +57,7 @@ class BaseSimulationTest(BaseTest, unittest.TestCase):
         """
         input_file_path = test_dir.joinpath('..', *sub_directory, file_name)
         with open(input_file_path, 'w') as f:
-            json.dump(epjson, f, indent=4, sort_keys=True)
+            json.dump(epjson, f, indent=4, sort_keys=True, default=json_default)
         return input_file_path
 
     def get_epjson_object_from_idf_file(self, idf_file_path):
@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from . import BaseTest
+from src.batch_expansion import BatchExpansion, get_batch_files, read_batch_status
+
+test_dir = Path(__file__).parent
+
+example_file = str(test_dir / '..' / 'simulation' / 'ExampleFiles' / 'HVACTemplate-5ZoneVAVWaterCooled.epJSON')
+
+
+class TestBatchExpansion(BaseTest, unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_directory = os.path.join(self.temp_dir, 'output')
+        os.mkdir(self.output_directory)
+        for file_name in ['model_1.epJSON', 'model_2.epJSON', 'model_3.epJSON']:
+            shutil.copy(example_file, os.path.join(self.temp_dir, file_name))
+        with open(os.path.join(self.temp_dir, 'bad_model.epJSON'), 'w') as f:
+            f.write('{bad json')
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        return
+
+    def test_get_batch_files_from_glob(self):
+        shutil.copy(example_file, os.path.join(self.temp_dir, 'model_1_expanded.epJSON'))
+        batch_files = get_batch_files(os.path.join(self.temp_dir, '*.epJSON'))
+        self.assertEqual(
+            ['bad_model.epJSON', 'model_1.epJSON', 'model_2.epJSON', 'model_3.epJSON'],
+            [os.path.basename(i) for i in batch_files])
+        return
+
+    def test_get_batch_files_from_manifest(self):
+        manifest_location = os.path.join(self.temp_dir, 'manifest.txt')
+        with open(manifest_location, 'w') as f:
+            f.write('model_2.epJSON\n\n# comment\n{}\n'.format(os.path.join(self.temp_dir, 'model_1.epJSON')))
+        batch_files = get_batch_files(manifest_location)
+        self.assertEqual(
+            [os.path.join(self.temp_dir, 'model_2.epJSON'), os.path.join(self.temp_dir, 'model_1.epJSON')],
+            batch_files)
+        return
+
+    def test_batch_writes_outputs_and_status(self):
+        batch_expansion = BatchExpansion(no_schema=True, workers=2, output_directory=self.output_directory)
+        batch_status = batch_expansion.run(os.path.join(self.temp_dir, '*.epJSON'))
+        self.assertEqual(4, len(batch_status))
+        status = read_batch_status(batch_expansion.status_location)
+        self.assertEqual('failed', status[os.path.join(self.temp_dir, 'bad_model.epJSON')]['status'])
+        for file_name in ['model_1', 'model_2', 'model_3']:
+            self.assertEqual('success', status[os.path.join(self.temp_dir, file_name + '.epJSON')]['status'])
+            with open(os.path.join(self.output_directory, file_name + '_expanded.epJSON'), 'r') as f:
+                self.assertIn('AirLoopHVAC', json.load(f).keys())
+        return
+
+    def test_batch_resume_skips_expanded_files(self):
+        batch_expansion = BatchExpansion(no_schema=True, workers=2, output_directory=self.output_directory)
+        batch_expansion.run(os.path.join(self.temp_dir, '*.epJSON'))
+        # simulate a crash while writing the last status record
+        with open(batch_expansion.status_location, 'a') as f:
+            f.write('{"file": "partial')
+        batch_expansion.resume = True
+        batch_status = batch_expansion.run(os.path.join(self.temp_dir, '*.epJSON'))
+        self.assertEqual(
+            [os.path.join(self.temp_dir, 'bad_model.epJSON')],
+            [i['file'] for i in batch_status])
+        return
+
+    def test_batch_resume_after_truncated_status_line(self):
+        batch_expansion = BatchExpansion(no_schema=True, workers=1, output_directory=self.output_directory)
+        batch_expansion.run(os.path.join(self.temp_dir, '*.epJSON'))
+        # simulate a crash while writing the last status record
+        with open(batch_expansion.status_location, 'r') as f:
+            status_lines = f.readlines()
+        truncated_file = json.loads(status_lines[-1])['file']
+        with open(batch_expansion.status_location, 'w') as f:
+            f.write(''.join(status_lines[:-1]) + status_lines[-1][:len(status_lines[-1]) // 2])
+        os.remove(os.path.join(self.temp_dir, 'bad_model.epJSON'))
+        batch_expansion.resume = True
+        batch_status = batch_expansion.run(os.path.join(self.temp_dir, '*.epJSON'))
+        self.assertEqual([truncated_file], [i['file'] for i in batch_status])
+        # the new record is written on its own line, so a later resume does not expand the file again
+        status = read_batch_status(batch_expansion.status_location)
+        for file_name in ['model_1', 'model_2', 'model_3']:
+            self.assertEqual('success', status[os.path.join(self.temp_dir, file_name + '.epJSON')]['status'])
+        self.assertEqual([], batch_expansion.run(os.path.join(self.temp_dir, '*.epJSON')))
+        return
@@ -1,8 +1,13 @@
 from pathlib import Path
 import unittest
+from unittest.mock import patch
+import tempfile
+import json
+import os
+import warnings
 
 from . import BaseTest
-from src.epjson_handler import EPJSON
+from src.epjson_handler import EPJSON, EPJSONView, json_default, schema_validator_cache
 # must import exceptions directly from test code
 from src.epjson_handler import UniqueNameException, PyExpandObjectsTypeError, \
     PyExpandObjectsFileNotFoundError, PyExpandObjectsSchemaError, InvalidEpJSONException
@@ -24,14 +29,60 @@ minimum_objects_d = {
 
 test_dir = Path(__file__).parent
 
+minimum_schema = {
+    "epJSON_schema_version": "9.4.0",
+    "epJSON_schema_build": "test",
+    "type": "object"
+}
+
+incremental_schema = {
+    **minimum_schema,
+    "required": ["Building"],
+    "additionalProperties": False,
+    "properties": {
+        "Building": {
+            "type": "object",
+            "maxProperties": 1,
+            "patternProperties": {
+                ".*": {"$ref": "#/definitions/building_fields"}
+            }
+        },
+        "Zone": {
+            "type": "object",
+            "patternProperties": {
+                ".*": {
+                    "type": "object",
+                    "properties": {
+                        "multiplier": {"type": "number"}
+                    }
+                }
+            }
+        }
+    },
+    "definitions": {
+        "building_fields": {
+            "type": "object",
+            "properties": {
+                "north_axis": {"type": "number"}
+            }
+        }
+    }
+}
+
 
 class TestEPJSONHandler(BaseTest, unittest.TestCase):
     def setUp(self):
         self.epjson_handler = EPJSON()
         self.epjson_handler_no_schema = EPJSON(no_schema=True)
+        self.logger_level = self.epjson_handler.logger.level
         self.epjson_handler.logger.setLevel('ERROR')
         return
 
+    def tearDown(self):
+        # logging is only configured once, so the shared logger level must be restored
+        self.epjson_handler.logger.setLevel(self.logger_level)
+        return
+
     def test_merge_bad_objects(self):
         dict_1 = {
             "Zone": {
@@ -379,6 +430,108 @@ class TestEPJSONHandler(BaseTest, unittest.TestCase):
             self.epjson_handler._validate_schema({"properties": {"id": "asdf"}})
         return
 
+    def test_schema_validator_cached(self):
+        schema_validator_cache.invalidate()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            schema_location = os.path.join(temp_dir, 'test.schema.epJSON')
+            with open(schema_location, 'w') as f:
+                json.dump(minimum_schema, f)
+            epjson_handler_1 = EPJSON()
+            with patch.object(epjson_handler_1.Validator, 'check_schema') as mock_check_schema:
+                epjson_handler_1._load_schema(schema_ref=schema_location)
+                epjson_handler_2 = EPJSON()
+                epjson_handler_2._load_schema(schema_ref=schema_location)
+                self.assertEqual(1, mock_check_schema.call_count)
+            self.assertIs(epjson_handler_1.schema, epjson_handler_2.schema)
+            self.assertTrue(epjson_handler_2.schema_is_valid)
+        schema_validator_cache.invalidate()
+        return
+
+    def test_schema_check_skipped_with_marker(self):
+        schema_validator_cache.invalidate()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            schema_location = os.path.join(temp_dir, 'test.schema.epJSON')
+            with open(schema_location, 'w') as f:
+                json.dump(minimum_schema, f)
+            epjson_handler = EPJSON(schema_marker=True)
+            epjson_handler._load_schema(schema_ref=schema_location)
+            self.assertTrue(os.path.isfile(schema_location + '.verified'))
+            # clear the process cache to simulate a new run
+            schema_validator_cache.invalidate()
+            epjson_handler = EPJSON(schema_marker=True)
+            with patch.object(epjson_handler.Validator, 'check_schema') as mock_check_schema:
+                epjson_handler._load_schema(schema_ref=schema_location)
+                mock_check_schema.assert_not_called()
+            self.assertTrue(epjson_handler.schema_is_valid)
+            # a changed schema is checked again
+            schema_validator_cache.invalidate()
+            with open(schema_location, 'w') as f:
+                json.dump({**minimum_schema, 'epJSON_schema_build': 'test_2'}, f)
+            with patch.object(epjson_handler.Validator, 'check_schema') as mock_check_schema:
+                epjson_handler._load_schema(schema_ref=schema_location)
+                mock_check_schema.assert_called_once()
+        schema_validator_cache.invalidate()
+        return
+
+    def test_incremental_validation_checks_new_objects(self):
+        self.epjson_handler._load_schema(schema_ref=incremental_schema)
+        validated_epjson = {
+            "Building": {"Building 1": {"north_axis": 0}},
+            "Zone": {"Zone 1": {"multiplier": 1}}
+        }
+        epjson = {k: dict(v) for k, v in validated_epjson.items()}
+        epjson['Zone']['Zone 2'] = {"multiplier": 2}
+        output = self.epjson_handler.validate_epjson_incremental(epjson=epjson, validated_epjson=validated_epjson)
+        self.assertIs(epjson, output)
+        epjson['Zone']['Zone 3'] = {"multiplier": "bad_value"}
+        with self.assertRaisesRegex(PyExpandObjectsSchemaError, 'Schema Format is invalid'):
+            self.epjson_handler.validate_epjson_incremental(epjson=epjson, validated_epjson=validated_epjson)
+        return
+
+    def test_incremental_validation_resolves_schema_references(self):
+        self.epjson_handler._load_schema(schema_ref=incremental_schema)
+        epjson = {"Building": {"Building 1": {"north_axis": "bad_value"}}}
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            with self.assertRaisesRegex(PyExpandObjectsSchemaError, 'Schema Format is invalid'):
+                self.epjson_handler.validate_epjson_incremental(epjson=epjson, validated_epjson={})
+            epjson['Building']['Building 1']['north_axis'] = 0
+            self.assertIs(epjson, self.epjson_handler.validate_epjson_incremental(epjson=epjson, validated_epjson={}))
+        return
+
+    def test_incremental_validation_skips_validated_objects(self):
+        self.epjson_handler._load_schema(schema_ref=incremental_schema)
+        # An invalid object shared by reference with the validated epJSON is not checked again
+        validated_epjson = {
+            "Building": {"Building 1": {"north_axis": 0}},
+            "Zone": {"Zone 1": {"multiplier": "bad_value"}}
+        }
+        epjson = {k: dict(v) for k, v in validated_epjson.items()}
+        self.epjson_handler.validate_epjson_incremental(epjson=epjson, validated_epjson=validated_epjson)
+        # A copy of the object is checked
+        epjson['Zone']['Zone 1'] = {"multiplier": "bad_value"}
+        with self.assertRaises(PyExpandObjectsSchemaError):
+            self.epjson_handler.validate_epjson_incremental(epjson=epjson, validated_epjson=validated_epjson)
+        return
+
+    def test_incremental_validation_checks_full_epjson_counts(self):
+        self.epjson_handler._load_schema(schema_ref=incremental_schema)
+        validated_epjson = {
+            "Building": {"Building 1": {"north_axis": 0}}
+        }
+        # maxProperties is applied to existing and new objects together
+        epjson = {"Building": {**validated_epjson['Building'], "Building 2": {"north_axis": 0}}}
+        with self.assertRaises(PyExpandObjectsSchemaError):
+            self.epjson_handler.validate_epjson_incremental(epjson=epjson, validated_epjson=validated_epjson)
+        # required objects and unknown object types are checked on the full epJSON
+        with self.assertRaises(PyExpandObjectsSchemaError):
+            self.epjson_handler.validate_epjson_incremental(
+                epjson={"Zone": {"Zone 1": {"multiplier": 1}}}, validated_epjson={})
+        with self.assertRaises(PyExpandObjectsSchemaError):
+            self.epjson_handler.validate_epjson_incremental(
+                epjson={**validated_epjson, "BadObject": {"Bad 1": {}}}, validated_epjson=validated_epjson)
+        return
+
     def test_good_object_is_valid(self):
         self.epjson_handler.epjson_process(
             epjson_ref={
@@ -506,3 +659,51 @@ class TestEPJSONHandler(BaseTest, unittest.TestCase):
         return
 
     # todo_eo: need to provide path for user provided schema location
+
+
+class TestEPJSONView(BaseTest, unittest.TestCase):
+    """
+    Merged view of epJSON dictionaries
+    """
+    def setUp(self):
+        self.layers = [
+            {'Building': {'Test Building': {'north_axis': 0}}, 'Branch': {'Branch 1': {'field': 1}}},
+            {},
+            {'Branch': {'Branch 2': {'field': 2}, 'Branch 1': {'field': 3}}, 'Pipe:Adiabatic': {}}]
+        return
+
+    def test_view_matches_merge(self):
+        merged_epjson = {}
+        for layer in self.layers:
+            EPJSON.merge_epjson(super_dictionary=merged_epjson, object_dictionary=layer)
+        epjson_view = EPJSONView(self.layers)
+        self.assertEqual(merged_epjson, epjson_view)
+        self.assertEqual(list(merged_epjson.keys()), list(epjson_view.keys()))
+        self.assertEqual(list(merged_epjson['Branch'].items()), list(epjson_view['Branch'].items()))
+        self.assertEqual(json.dumps(merged_epjson), json.dumps(epjson_view, default=json_default))
+        return
+
+    def test_view_does_not_copy(self):
+        epjson_view = EPJSONView(self.layers)
+        self.assertIs(self.layers[0]['Building'], epjson_view['Building'])
+        self.assertIs(self.layers[2]['Branch']['Branch 1'], epjson_view['Branch']['Branch 1'])
+        self.assertIs(epjson_view['Branch'], epjson_view['Branch'])
+        self.assertFalse(epjson_view.is_materialized)
+        return
+
+    def test_view_materializes_when_modified(self):
+        epjson_view = EPJSONView(self.layers)
+        epjson_view['Building'] = {'New Building': {}}
+        del epjson_view['Pipe:Adiabatic']
+        self.assertTrue(epjson_view.is_materialized)
+        self.assertEqual({'Building', 'Branch'}, set(epjson_view.keys()))
+        self.assertEqual({'New Building': {}}, epjson_view['Building'])
+        # layers are unchanged
+        self.assertEqual({'Test Building': {'north_axis': 0}}, self.layers[0]['Building'])
+        self.assertIn('Pipe:Adiabatic', self.layers[2])
+        return
+
+    def test_view_bad_layer_raises_error(self):
+        with self.assertRaises(PyExpandObjectsTypeError):
+            EPJSONView([{'Building': []}])
+        return
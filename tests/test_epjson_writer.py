@@ -0,0 +1,70 @@
+import io
+import json
+import unittest
+
+from . import BaseTest
+from src.epjson_writer import EPJSONWriter, InvalidInputException
+from src.epjson_handler import EPJSONView
+
+test_epjson = {
+    'Schedule:Compact': {
+        'HVACTemplate-Always1': {
+            'schedule_type_limits_name': 'Any Number',
+            'data': [{'field': 'Through: 12/31'}, {'field': 'For: AllDays'}, {'field': 1e-06}]}},
+    'Building': {'Test Building': {'north_axis': 0, 'terrain': 'City'}},
+    'Branch': {
+        'Branch 2': {'components': [{'component_name': 'Coil 2', 'component_object_type': 'Coil:Heating:Water'}]},
+        'Branch 1': {'components': []}},
+    'Pipe:Adiabatic': {}}
+
+
+class TestEPJSONWriter(BaseTest, unittest.TestCase):
+    @staticmethod
+    def _write(epjson, **kwargs):
+        output = io.StringIO()
+        EPJSONWriter(**kwargs).write(epjson, output)
+        return output.getvalue()
+
+    def test_indented_output_matches_json_dump(self):
+        for epjson in [test_epjson, {}, {'Building': {}}]:
+            self.assertEqual(json.dumps(epjson, indent=4, sort_keys=True), self._write(epjson))
+        self.assertEqual(json.dumps(test_epjson, indent=4), self._write(test_epjson, key_order='insertion'))
+        return
+
+    def test_compact_output(self):
+        self.assertEqual(
+            json.dumps(test_epjson, sort_keys=True, separators=(',', ':')),
+            self._write(test_epjson, compact=True, use_fast_backend=False))
+        # a fast backend may format numbers differently, so the values are compared
+        self.assertEqual(test_epjson, json.loads(self._write(test_epjson, compact=True)))
+        self.assertNotIn(' ', self._write({'Building': {'Test': {'terrain': 'City'}}}, compact=True))
+        return
+
+    def test_objects_encoded_in_separate_chunks(self):
+        for compact in (False, True):
+            chunks = list(EPJSONWriter(compact=compact).iterencode(test_epjson))
+            for object_name in ['Branch 1', 'Branch 2']:
+                self.assertEqual(1, len([chunk for chunk in chunks if '"{}"'.format(object_name) in chunk]))
+            self.assertFalse([chunk for chunk in chunks if '"Branch 1"' in chunk and '"Branch 2"' in chunk])
+        return
+
+    def test_top_key_order_sorts_object_types_only(self):
+        output = json.loads(self._write(test_epjson, key_order='top'))
+        self.assertEqual(test_epjson, output)
+        self.assertEqual(sorted(test_epjson.keys()), list(output.keys()))
+        self.assertEqual(['Branch 2', 'Branch 1'], list(output['Branch'].keys()))
+        self.assertEqual(['schedule_type_limits_name', 'data'], list(output['Schedule:Compact']['HVACTemplate-Always1']))
+        return
+
+    def test_write_epjson_view(self):
+        epjson_view = EPJSONView([{'Building': test_epjson['Building']}, {'Branch': test_epjson['Branch']}])
+        self.assertEqual(
+            json.dumps({'Branch': test_epjson['Branch'], 'Building': test_epjson['Building']}, indent=4, sort_keys=True),
+            self._write(epjson_view))
+        self.assertFalse(epjson_view.is_materialized)
+        return
+
+    def test_invalid_key_order_raises_error(self):
+        with self.assertRaises(InvalidInputException):
+            EPJSONWriter(key_order='bad_order')
+        return
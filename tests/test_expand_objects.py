@@ -1,8 +1,17 @@
 import unittest
+import copy
 import os
+import pickle
 import re
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
-from src.expand_objects import ExpandObjects
+from src.expand_objects import ExpandObjects, ExpandZone, expansion_structure_cache, option_tree_plan_cache, \
+    OptionTreePlanCache, OptionTreePlan, ObjectTypePatternIndex, object_type_pattern_index, expansion_counters, \
+    TemplateRecordTypes, ExpansionPrototypeCache, expansion_prototype_cache, NameFormatPlan, name_format_plans
+from src.compile_expansion_structure import compile_expansion_structure, load_compiled_expansion_structure, \
+    default_yaml_location
 from src.expand_objects import InvalidTemplateException, PyExpandObjectsTypeError
 from . import BaseTest
 
@@ -69,6 +78,347 @@ class TestExpandObjects(BaseTest, unittest.TestCase):
         self.assertEqual('val', expand_object.expansion_structure['test'])
         return
 
+    def test_expansion_file_loaded_once(self):
+        expansion_structure_cache.invalidate()
+        expansion_structure_cache.clear_stats()
+        eo_1 = ExpandObjects(template=mock_template)
+        eo_2 = ExpandObjects(template=mock_template)
+        self.assertIs(eo_1.expansion_structure, eo_2.expansion_structure)
+        self.assertEqual(1, expansion_structure_cache.misses)
+        self.assertEqual(1, expansion_structure_cache.hits)
+        return
+
+    def test_expansion_file_cache_invalidation(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'test_structure.yaml')
+            with open(file_path, 'w') as f:
+                f.write('test: val_1')
+            eo = ExpandObjects(template=mock_template, expansion_structure=file_path)
+            self.assertEqual('val_1', eo.expansion_structure['test'])
+            # a modified file is loaded again
+            with open(file_path, 'w') as f:
+                f.write('test: val_2')
+            os.utime(file_path, ns=(0, 0))
+            eo = ExpandObjects(template=mock_template, expansion_structure=file_path)
+            self.assertEqual('val_2', eo.expansion_structure['test'])
+            # explicit invalidation forces a reload
+            expansion_structure_cache.clear_stats()
+            expansion_structure_cache.invalidate(file_path)
+            ExpandObjects(template=mock_template, expansion_structure=file_path)
+            self.assertEqual({'hits': 0, 'misses': 1}, {
+                k: v for k, v in expansion_structure_cache.stats().items() if k in ('hits', 'misses')})
+        return
+
+    def test_compiled_expansion_structure_loaded(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'test_structure.yaml')
+            with open(file_path, 'w') as f:
+                f.write('base: &base\n  field_1: val_1\nobject:\n  <<: *base\n  field_2: val_2\n')
+            compiled_path = compile_expansion_structure(yaml_location=file_path)
+            self.assertTrue(compiled_path.is_file())
+            self.assertEqual(
+                {'field_1': 'val_1', 'field_2': 'val_2'},
+                load_compiled_expansion_structure(file_path)['object'])
+            eo = ExpandObjects(template=mock_template, expansion_structure=file_path)
+            self.assertEqual('val_1', eo.expansion_structure['object']['field_1'])
+        return
+
+    def test_compiled_expansion_structure_loaded_after_touch(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'test_structure.yaml')
+            with open(file_path, 'w') as f:
+                f.write('test: val_1')
+            compiled_path = compile_expansion_structure(yaml_location=file_path)
+            # an unchanged YAML file that is newer than the artifact still uses the artifact
+            os.utime(compiled_path, ns=(0, 0))
+            self.assertEqual({'test': 'val_1'}, load_compiled_expansion_structure(file_path))
+        return
+
+    def test_stale_compiled_expansion_structure_ignored(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'test_structure.yaml')
+            with open(file_path, 'w') as f:
+                f.write('test: val_1')
+            compile_expansion_structure(yaml_location=file_path)
+            with open(file_path, 'w') as f:
+                f.write('test: val_2')
+            self.assertIsNone(load_compiled_expansion_structure(file_path))
+            eo = ExpandObjects(template=mock_template, expansion_structure=file_path)
+            self.assertEqual('val_2', eo.expansion_structure['test'])
+        return
+
+    def test_shipped_compiled_expansion_structure_is_current(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compiled_path = compile_expansion_structure(
+                yaml_location=default_yaml_location,
+                output_location=os.path.join(temp_dir, 'compiled.json'))
+            with open(compiled_path, 'r') as f:
+                compiled_text = f.read()
+        with open(str(default_yaml_location).replace('.yaml', '.json'), 'r') as f:
+            self.assertEqual(compiled_text, f.read())
+        return
+
+    def test_expansion_structure_is_read_only(self):
+        expand_object = ExpandObjects(
+            template=mock_template,
+            expansion_structure={'test': {'sub_test': ['val', ]}})
+        with self.assertRaises(TypeError):
+            expand_object.expansion_structure['test']['sub_test'] = 'new_val'
+        structure = expand_object.get_structure(structure_hierarchy=['test', ])
+        structure['sub_test'].append('new_val')
+        self.assertEqual(['val', ], expand_object.get_structure(structure_hierarchy=['test', 'sub_test']))
+        return
+
+    def test_expansion_structure_compared_by_contents(self):
+        structure = ExpandObjects(
+            template=mock_template,
+            expansion_structure={'test': {'sub_test': 'val'}}).expansion_structure
+        self.assertEqual({'test': {'sub_test': 'val'}}, structure)
+        self.assertEqual({'sub_test': 'val'}, structure['test'])
+        self.assertNotEqual({'test': {'sub_test': 'other_val'}}, structure)
+        with self.assertRaises(TypeError):
+            hash(structure)
+        return
+
+    def test_expansion_structure_kept_by_cache_entries(self):
+        prototype_cache = ExpansionPrototypeCache()
+        structure = ExpandObjects(
+            template=mock_template,
+            expansion_structure={'test': {'sub_test': 'val'}}).expansion_structure
+        reference_count = sys.getrefcount(structure)
+        prototype_cache.set((id(structure), 'a'), {'Object:1': {}}, structure=structure)
+        # the structure can not be freed, and its id reused, while the entry is cached
+        self.assertGreater(sys.getrefcount(structure), reference_count)
+        self.assertEqual({'Object:1': {}}, prototype_cache.get((id(structure), 'a')))
+        prototype_cache.invalidate()
+        self.assertEqual(reference_count, sys.getrefcount(structure))
+        return
+
+    def test_option_tree_plan_shared_by_matching_templates(self):
+        expansion_prototype_cache.invalidate()
+        option_tree_plan_cache.invalidate()
+        option_tree_plan_cache.clear_stats()
+        zone_template_2 = copy.deepcopy(mock_zone_template)
+        zone_template_2['HVACTemplate:Zone:VAV']['HVACTemplate:Zone:VAV 1']['zone_name'] = 'SPACE2-1'
+        zone_template_2['HVACTemplate:Zone:VAV']['HVACTemplate:Zone:VAV 1']['constant_minimum_air_flow_fraction'] = 0.4
+        ez_1 = ExpandZone(template=mock_zone_template).run()
+        ez_2 = ExpandZone(template=zone_template_2).run()
+        self.assertEqual({'hits': 1, 'misses': 1, 'entries': 1}, option_tree_plan_cache.stats())
+        self.assertEqual(ez_1.summarize_epjson(ez_1.epjson), ez_2.summarize_epjson(ez_2.epjson))
+        self.assertIn('SPACE2-1 VAV Reheat', ez_2.epjson['AirTerminal:SingleDuct:VAV:Reheat'])
+        self.assertEqual(
+            0.4,
+            ez_2.epjson['Sizing:Zone']['SPACE2-1 Sizing Zone']['cooling_minimum_air_flow_fraction'])
+        # a different branching option compiles a new plan
+        zone_template_3 = copy.deepcopy(mock_zone_template)
+        zone_template_3['HVACTemplate:Zone:VAV']['HVACTemplate:Zone:VAV 1']['reheat_coil_type'] = 'Electric'
+        ExpandZone(template=zone_template_3).run()
+        self.assertEqual({'hits': 1, 'misses': 2, 'entries': 2}, option_tree_plan_cache.stats())
+        return
+
+    def test_option_tree_plan_matches_uncached_expansion(self):
+        expansion_prototype_cache.invalidate()
+        option_tree_plan_cache.invalidate()
+        ez_cached = ExpandZone(template=mock_zone_template).run()
+        expansion_prototype_cache.invalidate()
+        ez_cached = ExpandZone(template=mock_zone_template).run()
+        expansion_prototype_cache.invalidate()
+        option_tree_plan_cache.invalidate()
+        ez_uncached = ExpandZone(template=mock_zone_template).run()
+        self.assertEqual(ez_uncached.epjson, ez_cached.epjson)
+        return
+
+    def test_option_tree_plan_cache_evicts_least_recently_used(self):
+        plan_cache = OptionTreePlanCache(maxsize=2)
+        plan_cache.set('a', OptionTreePlan())
+        plan_cache.set('b', OptionTreePlan())
+        plan_cache.get('a')
+        plan_cache.set('c', OptionTreePlan())
+        self.assertIsNone(plan_cache.get('b'))
+        self.assertIsNotNone(plan_cache.get('a'))
+        self.assertIsNotNone(plan_cache.get('c'))
+        return
+
+    def test_object_type_pattern_index_matches(self):
+        pattern_index = ObjectTypePatternIndex()
+        self.assertTrue(pattern_index.match('^Coil:Cooling:.*', 'Coil:Cooling:Water'))
+        self.assertFalse(pattern_index.match('^Coil:Cooling:.*', 'Coil:Heating:Water'))
+        # matches are anchored at the start, as with re.match
+        self.assertFalse(pattern_index.match('Fan:.*', 'ZoneHVAC:Fan:Test'))
+        self.assertTrue(pattern_index.match('^Coil:Cooling:.*', 'Coil:Cooling:Water'))
+        self.assertEqual({'Coil:Cooling:Water'}, pattern_index._references['^Coil:Cooling:.*'][1])
+        return
+
+    def test_object_type_pattern_index_shared_by_threads(self):
+        pattern_index = ObjectTypePatternIndex()
+        references = ['^Coil:Cooling:{}.*'.format(idx) for idx in range(200)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda reference: pattern_index.match(reference, 'Coil:Cooling:1'), references * 4))
+        self.assertEqual(
+            [reference == '^Coil:Cooling:1.*' for reference in references] * 4,
+            results)
+        return
+
+    def test_object_type_pattern_index_compiled_on_load(self):
+        expansion_structure_cache.invalidate()
+        ExpandObjects(template=mock_template)
+        self.assertIn('AirTerminal:.*', object_type_pattern_index._references)
+        self.assertIn('Fan:.*', object_type_pattern_index._references)
+        return
+
+    def test_template_fields_stored_on_record(self):
+        eo = ExpandObjects(template={
+            'HVACTemplate:Zone:VAV': {
+                'template_name': {
+                    'zone_name': 'test zone',
+                    'flow_fraction': '0.3',
+                    'count': '2',
+                    'bad_number': '1.2.3',
+                    'efficiency': 0.8}}})
+        self.assertEqual('test zone', eo.zone_name)
+        self.assertEqual(0.3, eo.flow_fraction)
+        self.assertEqual(2, eo.count)
+        self.assertEqual('1.2.3', eo.bad_number)
+        self.assertEqual('test zone flow 0.3', '{0.zone_name} flow {0.flow_fraction}'.format(eo))
+        self.assertFalse(hasattr(eo, 'missing_field'))
+        self.assertNotIn('zone_name', vars(eo))
+        self.assertFalse(hasattr(eo.template_record, '__dict__'))
+        # attributes set on the instance take precedence over the record
+        eo.zone_name = 'new zone'
+        self.assertEqual('new zone', eo._get_template_value('zone_name'))
+        return
+
+    def test_template_record_schema_field_types(self):
+        record_types = TemplateRecordTypes()
+        record_types.add_schema({
+            'properties': {
+                'HVACTemplate:Zone:VAV': {
+                    'patternProperties': {
+                        '.*': {
+                            'properties': {
+                                'zone_name': {'type': 'string'},
+                                'flow_fraction': {'type': 'number'},
+                                'maximum_flow': {'anyOf': [{'type': 'number'}, {'type': 'string'}]}}}}}}})
+        template_structure = {'zone_name': '101', 'flow_fraction': '0.3', 'maximum_flow': 'Autosize'}
+        record = record_types.build('HVACTemplate:Zone:VAV', template_structure)
+        self.assertEqual('101', record.zone_name)
+        self.assertEqual(0.3, record.flow_fraction)
+        self.assertEqual('Autosize', record.maximum_flow)
+        # templates with the same fields share a record class
+        second_record = record_types.build('HVACTemplate:Zone:VAV', dict(template_structure, zone_name='102'))
+        self.assertIs(type(record), type(second_record))
+        self.assertEqual({'hits': 1, 'misses': 1, 'record_classes': 1, 'template_types': 1}, record_types.stats())
+        self.assertEqual(record.as_dict(), pickle.loads(pickle.dumps(record)).as_dict())
+        return
+
+    def test_template_record_schema_replaced_by_new_schema(self):
+        def make_schema(field_type):
+            return {
+                'properties': {
+                    'HVACTemplate:Zone:VAV': {
+                        'patternProperties': {'.*': {'properties': {'zone_name': {'type': field_type}}}}}}}
+
+        record_types = TemplateRecordTypes()
+        for field_type, zone_name in [('string', '101'), ('number', 101)] * 3:
+            record_types.add_schema(make_schema(field_type))
+            self.assertEqual(zone_name, record_types.build('HVACTemplate:Zone:VAV', {'zone_name': '101'}).zone_name)
+        # the registered schema is kept alive, so a new schema can not be allocated at the same address
+        schema = make_schema('string')
+        reference_count = sys.getrefcount(schema)
+        record_types.add_schema(schema)
+        self.assertGreater(sys.getrefcount(schema), reference_count)
+        return
+
+    def test_zones_created_from_prototype(self):
+        expansion_prototype_cache.invalidate()
+        expansion_prototype_cache.clear_stats()
+        ez_1 = ExpandZone(template=mock_zone_template).run()
+        zone_template_2 = copy.deepcopy(mock_zone_template)
+        zone_template_2['HVACTemplate:Zone:VAV']['HVACTemplate:Zone:VAV 1']['zone_name'] = 'SPACE2-1'
+        expansion_counters.reset()
+        ez_2 = ExpandZone(template=zone_template_2).run()
+        self.assertEqual({'hits': 1, 'misses': 1, 'entries': 1}, expansion_prototype_cache.stats())
+        self.assertEqual(0, expansion_counters.resolved_objects)
+        # the prototype output matches a full expansion
+        expansion_prototype_cache.invalidate()
+        ez_3 = ExpandZone(template=zone_template_2)
+        ez_3._create_objects()
+        self.assertEqual(ez_3.epjson, ez_2.epjson)
+        self.assertIn('SPACE2-1 VAV Reheat', ez_2.epjson['AirTerminal:SingleDuct:VAV:Reheat'])
+        self.assertNotIn('SPACE2-1 VAV Reheat', ez_1.epjson['AirTerminal:SingleDuct:VAV:Reheat'])
+        return
+
+    def test_zone_prototype_not_used_for_changed_templates(self):
+        expansion_prototype_cache.invalidate()
+        expansion_prototype_cache.clear_stats()
+        zone_template = copy.deepcopy(mock_zone_template)
+        zone_template['HVACTemplate:Zone:VAV']['HVACTemplate:Zone:VAV 1']['zone_name'] = '101'
+        ExpandZone(template=zone_template).run()
+        ez = ExpandZone(template=mock_zone_template)
+        ez.template_vav_system_name = 'VAV Sys 2'
+        ez.run()
+        self.assertEqual({'hits': 0, 'misses': 0, 'entries': 0}, expansion_prototype_cache.stats())
+        return
+
+    def test_expansion_prototype_cache_evicts_least_recently_used(self):
+        prototype_cache = ExpansionPrototypeCache(maxsize=2)
+        prototype_cache.set('a', {'Object:1': {}})
+        prototype_cache.set('b', False)
+        prototype_cache.get('a')
+        prototype_cache.set('c', {'Object:3': {}})
+        self.assertIsNone(prototype_cache.get('b'))
+        self.assertEqual({'Object:3': {}}, prototype_cache.get('c'))
+        self.assertEqual({'hits': 2, 'misses': 1, 'entries': 2}, prototype_cache.stats())
+        return
+
+    def test_name_format_plan(self):
+        eo = ExpandZone(template=mock_zone_template)
+        unique_name_plan = NameFormatPlan('{} Supply Inlet')
+        self.assertIsNone(unique_name_plan.attribute)
+        self.assertFalse(unique_name_plan.numeric)
+        self.assertEqual('SPACE1-1 Supply Inlet', unique_name_plan.render(eo))
+        field_plan = NameFormatPlan('{zone_name} Return Outlet')
+        self.assertEqual('zone_name', field_plan.attribute)
+        self.assertEqual('{0.zone_name} Return Outlet', field_plan.format_string)
+        self.assertEqual('SPACE1-1 Return Outlet', field_plan.render(eo))
+        self.assertTrue(NameFormatPlan('{cooling_design_supply_air_temperature}').numeric)
+        self.assertTrue(NameFormatPlan('Autosize').literal)
+        with self.assertRaises(AttributeError):
+            NameFormatPlan('{missing_field}').render(eo)
+        return
+
+    def test_name_format_plans_compiled_on_load(self):
+        expansion_structure_cache.invalidate()
+        ExpandObjects(template=mock_template)
+        plan = name_format_plans._plans.get('{} Supply Fan')
+        self.assertIsNotNone(plan)
+        self.assertIs(plan, name_format_plans.get('{} Supply Fan'))
+        return
+
+    def test_created_objects_resolved_once(self):
+        ez = ExpandZone(template=mock_zone_template)
+        expansion_counters.reset()
+        output = ez._create_objects()
+        object_count = sum(ez.summarize_epjson(output).values())
+        self.assertEqual(object_count, expansion_counters.resolved_objects)
+        # the returned objects are the ones stored in the class epJSON
+        for object_type, object_structure in output.items():
+            for object_name, object_fields in object_structure.items():
+                self.assertIs(object_fields, ez.epjson[object_type][object_name])
+        return
+
+    def test_resolve_objects_does_not_deep_copy(self):
+        eo = ExpandZone(template=mock_zone_template)
+        epjson = {
+            "Object:1": {"name_1": {"field_1": "value_1"}},
+            "Object:2": {"name_2": {"field_1": {"Object:1": "field_1"}, "field_2": "{} field"}}}
+        expansion_counters.reset()
+        eo.resolve_objects(epjson=epjson)
+        self.assertEqual({'resolved_objects': 2, 'deep_copies': 0}, expansion_counters.stats())
+        self.assertEqual({"field_1": "value_1", "field_2": "SPACE1-1 field"}, epjson['Object:2']['name_2'])
+        return
+
     def test_bad_expansion_dictionary_rejected(self):
         expansion_dictionary = []
         with self.assertRaises(TypeError):
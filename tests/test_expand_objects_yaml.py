@@ -3,7 +3,8 @@ from unittest.mock import MagicMock
 import copy
 import json
 
-from src.expand_objects import ExpandObjects, ExpandZone, ExpandSystem
+from src.expand_objects import ExpandObjects, ExpandZone, ExpandSystem, ComplexInputResolver, BuildPath, \
+    expansion_counters
 from src.expand_objects import PyExpandObjectsTypeError, PyExpandObjectsYamlStructureException, \
     PyExpandObjectsYamlError
 from . import BaseTest
@@ -720,6 +721,86 @@ class TestExpandObjectsYaml(BaseTest, unittest.TestCase):
                 tmp_d[o['field']] = o['value']
         return
 
+    def test_complex_inputs_circular_reference_reported(self):
+        test_d = {
+            "Object:1": {
+                "name_1": {
+                    "field_1": {
+                        "Object:2": "field_1"
+                    }
+                }
+            },
+            "Object:2": {
+                "name_1": {
+                    "field_1": {
+                        "Object:1": "field_1"
+                    }
+                }
+            }
+        }
+        eo = ExpandZone(template=mock_zone_template)
+        output = eo._resolve_complex_input(
+            epjson=test_d,
+            field_name="field_test",
+            input_value={
+                "Object:2": "field_1"
+            }
+        )
+        with self.assertRaisesRegex(
+                PyExpandObjectsYamlStructureException,
+                'Circular complex input reference.*Object:2:name_1:field_1 -> Object:1:name_1:field_1 -> '
+                'Object:2:name_1:field_1'):
+            [o for o in output]
+        return
+
+    def test_complex_inputs_long_reference_chain(self):
+        # the chain is longer than the interpreter recursion limit
+        chain_length = 1200
+        test_d = {"Object:0": {"name_0": {"field_1": "value_0"}}}
+        for idx in range(1, chain_length):
+            test_d["Object:{}".format(idx)] = {
+                "name_{}".format(idx): {
+                    "field_1": {
+                        "Object:{}$".format(idx - 1): "field_1"
+                    }
+                }
+            }
+        eo = ExpandZone(template=mock_zone_template)
+        output = eo._resolve_complex_input(
+            epjson=test_d,
+            field_name="field_test",
+            input_value={
+                "Object:{}$".format(chain_length - 1): "field_1"
+            }
+        )
+        self.assertEqual('value_0', [o for o in output][0]['value'])
+        return
+
+    def test_complex_inputs_shared_reference_resolved_once(self):
+        test_d = {
+            "Object:1": {
+                "name_1": {
+                    "field_1": "value_1"
+                }
+            },
+            "Object:2": {
+                "name_1": {
+                    "field_1": {
+                        "Object:1": "field_1"
+                    }
+                }
+            }
+        }
+        eo = ExpandZone(template=mock_zone_template)
+        resolver = ComplexInputResolver(expand_object=eo, epjson=test_d)
+        resolver.resolve(field_name='field_a', input_value={"Object:2": "field_1"})
+        resolved_node = resolver._resolved_nodes[('Object:2', 'name_1', 'field_1')]
+        self.assertEqual(
+            [{'field': 'field_b', 'value': 'value_1'}, ],
+            resolver.resolve(field_name='field_b', input_value={"Object:2": "field_1"}))
+        self.assertIs(resolved_node, resolver._resolved_nodes[('Object:2', 'name_1', 'field_1')])
+        return
+
     def test_complex_inputs_list(self):
         test_d = {
             "Object:2": {
@@ -1435,6 +1516,56 @@ class TestExpandObjectsYaml(BaseTest, unittest.TestCase):
         self.assertEqual("value_2", output[1]["Object:2"]["field_3"])
         return
 
+    def test_build_path_action_does_not_modify_input_list(self):
+        build_path = copy.deepcopy(mock_build_path)
+        action_instruction = {
+            'ObjectReference': 'Fan:.*',
+            'ActionType': 'Remove'
+        }
+        eo = ExpandObjects()
+        expansion_counters.reset()
+        output = eo._apply_build_path_action(build_path=build_path, action_instructions=action_instruction)
+        self.assertEqual(0, expansion_counters.deep_copies)
+        self.assertEqual(mock_build_path, build_path)
+        self.assertEqual(len(build_path) - 1, len(output))
+        # super objects are shared, not copied
+        self.assertIs(build_path[0], output[0])
+        return
+
+    def test_build_path_occurrence_index(self):
+        build_path = BuildPath([
+            {"Object:A": {"Fields": {}}},
+            [{"Object:B": {"Fields": {}}}, {"Object:A": {"Fields": {}}}],
+            {"Object:C": {"Fields": {}}}])
+        self.assertEqual(4, len(build_path))
+        self.assertEqual((0, 2), build_path.find('Object:A', 1))
+        self.assertEqual((2, 2), build_path.find('Object:A', 2))
+        self.assertEqual((None, 2), build_path.find('Object:A', 3))
+        self.assertEqual((1, 4), build_path.find('Object:.*', 2))
+        build_path.insert(0, [{"Object:A": {"Fields": {}}}, {"Object:D": {"Fields": {}}}])
+        self.assertEqual((2, 3), build_path.find('Object:A', 2))
+        build_path.replace(1, {"Object:E": {"Fields": {}}})
+        build_path.remove(-1)
+        self.assertEqual(
+            ['Object:A', 'Object:E', 'Object:A', 'Object:B', 'Object:A'],
+            [list(super_object.keys())[0] for super_object in build_path])
+        return
+
+    def test_build_path_connected_in_place(self):
+        build_path = BuildPath([
+            {"Object:1": {"Fields": {"field_1": "value_1", "field_2": "value_2"},
+                          "Connectors": {"AirLoop": {"Inlet": "field_1", "Outlet": "field_2"}}}},
+            {"Object:2": {"Fields": {"field_3": "value_3", "field_4": "value_4"},
+                          "Connectors": {"AirLoop": {"Inlet": "field_3", "Outlet": "field_4"}}}}])
+        eo = ExpandObjects()
+        expansion_counters.reset()
+        output = eo._connect_and_convert_build_path_to_object_list(build_path=build_path)
+        self.assertEqual(0, expansion_counters.deep_copies)
+        self.assertEqual("value_2", output[1]["Object:2"]["field_3"])
+        self.assertIs(build_path[1]["Object:2"]["Fields"], output[1]["Object:2"])
+        self.assertIsInstance(eo.build_path, list)
+        return
+
     def test_retrieve_build_path_objects_from_option_tree(self):
         eo = ExpandSystem(template=mock_system_template)
         test_system_option_tree = copy.deepcopy(mock_system_option_tree)
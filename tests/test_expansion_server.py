@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from . import BaseTest
+from src.expansion_server import ExpansionServer
+
+test_dir = Path(__file__).parent
+
+example_file = str(test_dir / '..' / 'simulation' / 'ExampleFiles' / 'HVACTemplate-5ZoneVAVWaterCooled.epJSON')
+
+
+class TestExpansionServer(BaseTest, unittest.TestCase):
+    def setUp(self):
+        self.expansion_server = ExpansionServer(no_schema=True)
+        with open(example_file, 'r') as f:
+            self.example_epjson = json.load(f)
+        return
+
+    def test_stdio_requests(self):
+        input_stream = io.StringIO('\n'.join([
+            json.dumps({'epJSON': self.example_epjson}),
+            '',
+            'not json',
+            json.dumps({'bad_key': 'bad_value'}),
+            json.dumps({'file': 'does/not/exist.epJSON'})]) + '\n')
+        output_stream = io.StringIO()
+        self.expansion_server.serve_stdio(input_stream=input_stream, output_stream=output_stream)
+        responses = [json.loads(i) for i in output_stream.getvalue().splitlines()]
+        self.assertEqual(4, len(responses))
+        self.assertEqual(4, self.expansion_server.request_count)
+        for output_key in ['epJSON', 'epJSON_base', 'epJSON_hvac_templates', 'outputPreProcessorMessage']:
+            self.assertIn(output_key, responses[0].keys())
+        self.assertIn('AirLoopHVAC', responses[0]['epJSON'].keys())
+        self.assertNotIn('HVACTemplate:System:VAV', responses[0]['epJSON'].keys())
+        self.assertIn('##### HVACTemplate #####', responses[0]['outputPreProcessorMessage'])
+        self.assertRegex(responses[1]['error'], 'Request is not valid JSON')
+        self.assertRegex(responses[2]['error'], 'Request does not contain a file or epJSON object')
+        self.assertRegex(responses[3]['outputPreProcessorMessage'], 'File does not exist')
+        return
+
+    def test_requests_use_separate_log_captures(self):
+        first_response = self.expansion_server.handle_request({'epJSON': self.example_epjson})
+        second_response = self.expansion_server.handle_request({'epJSON': self.example_epjson})
+        self.assertEqual(
+            first_response['outputPreProcessorMessage'].count('##### HVACTemplate #####'),
+            second_response['outputPreProcessorMessage'].count('##### HVACTemplate #####'))
+        self.assertEqual(first_response['epJSON'], second_response['epJSON'])
+        return
+
+    def test_run_task_workers_output_matches_serial_run(self):
+        serial_response = self.expansion_server.handle_request({'epJSON': self.example_epjson})
+        concurrent_response = ExpansionServer(no_schema=True, run_task_workers=4).handle_request(
+            {'epJSON': self.example_epjson})
+        self.assertEqual(serial_response['epJSON'], concurrent_response['epJSON'])
+        return
+
+    def test_file_request_writes_output(self):
+        with tempfile.TemporaryDirectory() as output_directory:
+            response = self.expansion_server.handle_request({
+                'file': example_file,
+                'output_directory': output_directory})
+            self.assertIn('epJSON', response.keys())
+            self.assertTrue(os.path.isfile(response['output_files']['expanded']))
+        return
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets are not available')
+    def test_socket_requests(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, 'expandobjects.sock')
+            socket_server = self.expansion_server.create_socket_server(socket_path)
+            server_thread = threading.Thread(target=socket_server.serve_forever)
+            server_thread.start()
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.connect(socket_path)
+                    with client.makefile('rw') as client_file:
+                        for _ in range(2):
+                            client_file.write(json.dumps({'epJSON': self.example_epjson}) + '\n')
+                            client_file.flush()
+                            response = json.loads(client_file.readline())
+                            self.assertIn('AirLoopHVAC', response['epJSON'].keys())
+            finally:
+                socket_server.shutdown()
+                socket_server.server_close()
+                server_thread.join()
+        self.assertEqual(2, self.expansion_server.request_count)
+        return
@@ -1,7 +1,7 @@
 import unittest
 
 from src.hvac_template import HVACTemplate
-from src.hvac_template import InvalidTemplateException, InvalidEpJSONException
+from src.hvac_template import InvalidTemplateException, InvalidEpJSONException, InvalidInputException
 from . import BaseTest
 
 minimum_objects_d = {
@@ -846,3 +846,67 @@ class TestHVACTemplateObject(BaseTest, unittest.TestCase):
 
     # todo_eo: wrap all dictionary unpacking (_, _), = dict.items() with exceptions and test
     # todo_eo: make check that no loops are empty
+
+
+class TestHVACTemplateExpansionExecutor(BaseTest, unittest.TestCase):
+    """
+    Concurrent expansion of the templates of each category
+    """
+    epjson = {
+        **minimum_objects_d,
+        **mock_thermostat_template,
+        **mock_chw_plant_loop_template,
+        **mock_plant_equipment_template,
+        **mock_system_template,
+        **mock_tower_template,
+        "HVACTemplate:Zone:VAV": {
+            **mock_zone_template["HVACTemplate:Zone:VAV"],
+            "HVACTemplate:Zone:VAV 2": {
+                **mock_zone_template["HVACTemplate:Zone:VAV"]["HVACTemplate:Zone:VAV 1"],
+                "zone_name": "SPACE2-1"
+            }
+        }
+    }
+
+    def test_invalid_expansion_executor_raises_error(self):
+        with self.assertRaises(InvalidInputException):
+            HVACTemplate(no_schema=True, expansion_executor='bad_executor')
+        return
+
+    def test_process_expansion_executor_with_run_task_workers_raises_error(self):
+        with self.assertRaisesRegex(InvalidInputException, 'run task worker'):
+            HVACTemplate(no_schema=True, expansion_executor='process', run_task_workers=2)
+        hvac_template = HVACTemplate(no_schema=True, expansion_executor='thread', run_task_workers=2)
+        self.assertEqual(2, hvac_template.run_task_workers)
+        return
+
+    def test_expansion_executor_output_matches_serial_expansion(self):
+        serial_output = HVACTemplate(no_schema=True).run(input_epjson=self.epjson)['epJSON']
+        for expansion_executor in ('thread', 'process'):
+            hvac_template = HVACTemplate(no_schema=True, expansion_executor=expansion_executor, expansion_workers=2)
+            output = hvac_template.run(input_epjson=self.epjson)['epJSON']
+            self.assertEqual(serial_output, output)
+            # merged objects keep the serial order
+            self.assertEqual(
+                [list(i.keys()) for i in serial_output.values()],
+                [list(i.keys()) for i in output.values()])
+            self.assertEqual(
+                ['HVACTemplate:Zone:VAV 1', 'HVACTemplate:Zone:VAV 2'],
+                list(hvac_template.expanded_zones.keys()))
+            self.assertEqual('SPACE2-1', hvac_template.expanded_zones['HVACTemplate:Zone:VAV 2'].zone_name)
+        return
+
+    def test_run_tasks_output_matches_serial_run(self):
+        serial_output = HVACTemplate(no_schema=True).run(input_epjson=self.epjson)['epJSON']
+        hvac_template = HVACTemplate(no_schema=True, run_task_workers=4)
+        output = hvac_template.run(input_epjson=self.epjson)['epJSON']
+        self.assertEqual(serial_output, output)
+        self.assertEqual(
+            [list(i.keys()) for i in serial_output.values()],
+            [list(i.keys()) for i in output.values()])
+        self.assertEqual(
+            {'expand_thermostats', 'expand_zones', 'expand_systems', 'create_zone_thermostat_connections',
+             'create_system_zone_connections', 'expand_plant_loops', 'expand_plant_equipment',
+             'create_additional_plant_loops_and_equipment', 'create_plant_connections'},
+            set(hvac_template.task_timings.keys()))
+        return
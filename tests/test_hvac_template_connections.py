@@ -2,7 +2,7 @@ import copy
 import unittest
 from unittest.mock import MagicMock, PropertyMock
 
-from src.hvac_template import HVACTemplate
+from src.hvac_template import HVACTemplate, ZoneSystemIndex, WaterLoopBranchIndex
 from src.hvac_template import InvalidTemplateException
 from src.expand_objects import ExpandObjects, ExpandSystem, ExpandZone, ExpandPlantLoop, ExpandPlantEquipment
 from . import BaseTest
@@ -941,3 +941,87 @@ class TestHVACTemplateObjectConnections(BaseTest, unittest.TestCase):
             self.hvac_template.epjson['CondenserEquipmentList']['Condenser Water Loop All Equipment']
             ['equipment'][0]['equipment_name'])
         return
+
+
+class TestZoneSystemIndex(BaseTest, unittest.TestCase):
+    """
+    Index of expanded zones by the system they reference
+    """
+    def test_zone_system_index(self):
+        expanded_zones = {}
+        for zone_name, system_field, system_name in [
+                ('SPACE1-1', 'template_vav_system_name', 'VAV Sys 1'),
+                ('SPACE2-1', 'template_vav_system_name', 'VAV Sys 2'),
+                ('SPACE3-1', 'template_vav_system_name', 'VAV Sys 1'),
+                ('SPACE4-1', 'dedicated_outdoor_air_system_name', 'VAV Sys 1')]:
+            ez = MagicMock(spec=['unique_name', system_field])
+            ez.unique_name = zone_name
+            setattr(ez, system_field, system_name)
+            expanded_zones[zone_name] = ez
+        zone_system_index = ZoneSystemIndex(expanded_zones)
+        self.assertEqual(
+            ['SPACE1-1', 'SPACE3-1'],
+            [ez.unique_name for ez in zone_system_index.get_zones('template_vav_system_name', 'VAV Sys 1')])
+        self.assertEqual(
+            ['SPACE4-1', ],
+            [ez.unique_name for ez in zone_system_index.get_zones('dedicated_outdoor_air_system_name', 'VAV Sys 1')])
+        self.assertEqual([], zone_system_index.get_zones('template_vav_system_name', 'VAV Sys 3'))
+        return
+
+
+class TestWaterLoopBranchIndex(BaseTest, unittest.TestCase):
+    """
+    Index of expanded zone, system, and plant equipment branches by water loop type
+    """
+    @staticmethod
+    def _make_expanded_object(branch_components, **kwargs):
+        eo = MagicMock(spec=['epjson', *kwargs.keys()])
+        eo.epjson = {'Branch': {
+            branch_name: {'components': [{'component_object_type': component_type, 'component_name': branch_name}]}
+            for branch_name, component_type in branch_components.items()}}
+        for field, value in kwargs.items():
+            setattr(eo, field, value)
+        return eo
+
+    def test_water_loop_branch_index(self):
+        expanded_zones = {'SPACE1-1': self._make_expanded_object(
+            {'SPACE1-1 Reheat Coil HW Branch': 'Coil:Heating:Water',
+             'SPACE1-1 Baseboard HW Branch': 'ZoneHVAC:Baseboard:Convective:Water'})}
+        expanded_systems = {'VAV Sys 1': self._make_expanded_object(
+            {'VAV Sys 1 Cooling Coil ChW Branch': 'Coil:Cooling:Water'})}
+        expanded_plant_equipment = {
+            'Main Chiller': self._make_expanded_object(
+                {'Main Chiller ChW Branch': 'Chiller:Electric:EIR',
+                 'Main Chiller Cnd Branch': 'Chiller:Electric:EIR'},
+                template_type='HVACTemplate:Plant:Chiller',
+                condenser_type='WaterCooled',
+                template_plant_loop_type='ChilledWater'),
+            'Main Tower': self._make_expanded_object(
+                {'Main Tower Cnd Branch': 'CoolingTower:SingleSpeed'},
+                template_type='HVACTemplate:Plant:Tower',
+                template_plant_loop_type='CondenserWater')}
+        branch_index = WaterLoopBranchIndex(
+            expanded_zones=expanded_zones,
+            expanded_systems=expanded_systems,
+            expanded_plant_equipment=expanded_plant_equipment)
+        self.assertEqual(
+            ['SPACE1-1 Reheat Coil HW Branch', 'SPACE1-1 Baseboard HW Branch'],
+            list(branch_index.get_zone_system_branches('HVACTemplate:Plant:HotWaterLoop').keys()))
+        self.assertEqual(
+            ['VAV Sys 1 Cooling Coil ChW Branch'],
+            list(branch_index.get_zone_system_branches('HVACTemplate:Plant:ChilledWaterLoop').keys()))
+        self.assertIsNone(branch_index.get_zone_system_branches('HVACTemplate:Plant:CondenserWaterLoop'))
+        self.assertEqual(
+            ['Main Chiller ChW Branch'],
+            list(branch_index.get_plant_equipment_branches('HVACTemplate:Plant:ChilledWaterLoop').keys()))
+        self.assertEqual(
+            ['Main Chiller Cnd Branch', 'Main Tower Cnd Branch'],
+            list(branch_index.get_plant_equipment_branches('HVACTemplate:Plant:CondenserWaterLoop').keys()))
+        # branches are shared with the expanded objects, not copied
+        self.assertIs(
+            expanded_systems['VAV Sys 1'].epjson['Branch']['VAV Sys 1 Cooling Coil ChW Branch'],
+            branch_index.get_zone_system_branches('HVACTemplate:Plant:ChilledWaterLoop')[
+                'VAV Sys 1 Cooling Coil ChW Branch'])
+        with self.assertRaises(InvalidTemplateException):
+            branch_index.get_zone_system_branches('HVACTemplate:Plant:BadLoop')
+        return
@@ -0,0 +1,74 @@
+import threading
+import unittest
+
+from . import BaseTest
+from src.task_graph import Task, TaskGraph, PyExpandObjectsException
+
+
+class TestTaskGraph(BaseTest, unittest.TestCase):
+    def setUp(self):
+        self.run_order = []
+        return
+
+    def _record(self, name, event=None, wait_event=None):
+        def function():
+            if wait_event:
+                self.assertTrue(wait_event.wait(timeout=10))
+            self.run_order.append(name)
+            if event:
+                event.set()
+            return
+        return function
+
+    def test_dependencies_from_inputs_and_outputs(self):
+        task_graph = TaskGraph([
+            Task('a', self._record('a'), outputs=('x', )),
+            Task('b', self._record('b'), outputs=('y', )),
+            Task('c', self._record('c'), inputs=('x', 'y'), outputs=('out', )),
+            Task('d', self._record('d'), inputs=('x', ), outputs=('out', )),
+            Task('e', self._record('e'), outputs=('x', ))])
+        self.assertEqual(set(), task_graph.dependencies['a'])
+        self.assertEqual({'a', 'b'}, task_graph.dependencies['c'])
+        # shared outputs are written in declaration order
+        self.assertEqual({'a', 'c'}, task_graph.dependencies['d'])
+        # outputs are not written until earlier readers have finished
+        self.assertEqual({'a', 'c', 'd'}, task_graph.dependencies['e'])
+        return
+
+    def test_serial_run_uses_declaration_order(self):
+        task_graph = TaskGraph([
+            Task('a', self._record('a'), outputs=('x', )),
+            Task('b', self._record('b'), outputs=('y', )),
+            Task('c', self._record('c'), inputs=('x', 'y'))])
+        task_timings = task_graph.run()
+        self.assertEqual(['a', 'b', 'c'], self.run_order)
+        self.assertEqual(['a', 'b', 'c'], list(task_timings.keys()))
+        return
+
+    def test_independent_tasks_run_concurrently(self):
+        # task a can only finish after task b has run, so the graph only completes if they run at the same time
+        b_finished = threading.Event()
+        task_graph = TaskGraph([
+            Task('a', self._record('a', wait_event=b_finished), outputs=('x', )),
+            Task('b', self._record('b', event=b_finished), outputs=('y', )),
+            Task('c', self._record('c'), inputs=('x', 'y'))])
+        task_timings = task_graph.run(max_workers=2)
+        self.assertEqual(['b', 'a', 'c'], self.run_order)
+        self.assertEqual({'a', 'b', 'c'}, set(task_timings.keys()))
+        return
+
+    def test_failed_task_stops_dependent_tasks(self):
+        def fail():
+            raise PyExpandObjectsException('task failed')
+        task_graph = TaskGraph([
+            Task('a', fail, outputs=('x', )),
+            Task('b', self._record('b'), inputs=('x', ))])
+        with self.assertRaisesRegex(PyExpandObjectsException, 'task failed'):
+            task_graph.run(max_workers=2)
+        self.assertEqual([], self.run_order)
+        return
+
+    def test_duplicate_task_name_raises_error(self):
+        with self.assertRaises(PyExpandObjectsException):
+            TaskGraph([Task('a', self._record('a')), Task('a', self._record('a'))])
+        return